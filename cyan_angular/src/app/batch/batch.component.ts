@@ -12,6 +12,7 @@ import {
   BatchJob,
   BatchLocation,
   BatchStatus,
+  JobProgress,
   JobsTableParams,
   columnNames,
   csvKeys
@@ -39,7 +40,9 @@ export class BatchComponent {
   status: string = '';  // job status
   pollStatusDelay: number = 2000;  // milliseconds
   intervalProcess: ReturnType<typeof setInterval>;  // keeps track of status polling
+  statusStream: EventSource;  // job status server-sent events
   currentJobStatus: BatchStatus;
+  currentJobProgress: JobProgress = null;  // locations done and eta of running job
   currentInputFilename: string = '';
   finishedStates: string[] = ['FAILURE', 'REVOKED', 'SUCCESS'];
   inProgressStates: string[] = ['RETRY', 'PENDING', 'RECEIVED', 'STARTED'];
@@ -92,6 +95,14 @@ export class BatchComponent {
   stopJobPolling(): void {
     console.log("Stopping job status polling.")
     clearInterval(this.intervalProcess);
+    this.closeStatusStream();
+  }
+
+  closeStatusStream(): void {
+    if (this.statusStream) {
+      this.statusStream.close();
+      this.statusStream = null;
+    }
   }
 
   handleError(error: string): void {
@@ -106,6 +117,68 @@ export class BatchComponent {
   }
 
   pollJobStatus(batchStatus: BatchStatus): void {
+    /*
+    Follows user's job status on the status event stream,
+    or with a polling loop if the browser can't stream.
+    */
+    if (typeof EventSource !== 'undefined') {
+      this.streamJobStatus(batchStatus);
+    } else {
+      this.startJobPolling(batchStatus);
+    }
+  }
+
+  streamJobStatus(batchStatus: BatchStatus): void {
+    /*
+    Listens for user's job status on the status event stream. Falls back
+    to polling if the stream is unavailable (e.g., all stream slots busy),
+    and reconnects with a new ticket when the server ends the stream.
+    */
+    console.log("Starting job status stream.")
+    this.downloaderService.getStatusStreamTicket().subscribe(
+      response => {
+        this.openJobStatusStream(batchStatus, response['ticket']);
+      },
+      error => {
+        this.startJobPolling(batchStatus);
+      }
+    );
+  }
+
+  openJobStatusStream(batchStatus: BatchStatus, ticket: string): void {
+    /*
+    Opens the status event stream with a stream ticket.
+    */
+    let connected = false;
+    this.statusStream = this.downloaderService.openStatusStream(ticket);
+    this.statusStream.onopen = () => {
+      connected = true;
+      // Catches up on changes made before the stream was subscribed:
+      this.downloaderService.checkBatchJobStatus(batchStatus).subscribe(response => {
+        if (this.updateJobStatus(response)) {
+          this.stopJobPolling();
+        }
+      });
+    };
+    this.statusStream.addEventListener('job', (event: MessageEvent) => {
+      let response = JSON.parse(event.data);
+      if (response['job_id'] != batchStatus.job_id) { return; }
+      if (this.updateJobStatus(response)) {
+        this.stopJobPolling();
+      }
+    });
+    this.statusStream.onerror = () => {
+      this.closeStatusStream();
+      if (!this.authService.checkUserAuthentication()) { return; }
+      if (connected) {
+        this.streamJobStatus(batchStatus);
+      } else {
+        this.startJobPolling(batchStatus);
+      }
+    };
+  }
+
+  startJobPolling(batchStatus: BatchStatus): void {
     /*
     Polling loop that checks on user's job status.
     */
@@ -117,30 +190,37 @@ export class BatchComponent {
         return;
       }
       this.downloaderService.checkBatchJobStatus(batchStatus).subscribe(response => {
-        if (response['status'].length > 0) {
-          this.status = response['status'];
-        }
-
-        // Updates "Run" tab info
-        this.currentJobStatus.job_id = response['job_id'];
-        this.currentJobStatus.job_status = response['job_status'];
-
-        // Updates "Jobs" tab info
-        this.updateTableJob(response['job']);
-
-        if (
-          response['status'].includes("Failed")
-          || this.finishedStates.includes(response['job_status'])
-        ) {
+        if (this.updateJobStatus(response)) {
           // Stops if job failed or is in a finished state.
           this.stopJobPolling();
-          return;
         }
-
       });
     }, this.pollStatusDelay);
   }
 
+  updateJobStatus(response: object): boolean {
+    /*
+    Updates job info from a job status response,
+    returns true if the job failed or is finished.
+    */
+    if (response['status'].length > 0) {
+      this.status = response['status'];
+    }
+
+    // Updates "Run" tab info
+    this.currentJobStatus.job_id = response['job_id'];
+    this.currentJobStatus.job_status = response['job_status'];
+    this.currentJobProgress = response['progress'] || null;
+
+    // Updates "Jobs" tab info
+    this.updateTableJob(response['job']);
+
+    return (
+      response['status'].includes("Failed")
+      || this.finishedStates.includes(response['job_status'])
+    );
+  }
+
   validateUploadedFile(event): any {
     /*
     Validates user-uploaded CSV file.
@@ -66,6 +66,7 @@ export class AddComment implements OnInit {
       newComment.browser = commentData.browser;
       newComment.comment_text = commentData.comment_text;
       newComment.comment_images = commentData.comment_images
+      newComment.comment_image_urls = commentData.comment_image_urls
       newComment.replies = [];
     }
   	return newComment;
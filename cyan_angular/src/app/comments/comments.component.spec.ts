@@ -1,7 +1,7 @@
 import { Component } from '@angular/core';
 import { async, ComponentFixture, TestBed } from '@angular/core/testing';
 import { RouterTestingModule } from '@angular/router/testing';
-import { HttpClientModule } from '@angular/common/http';
+import { HttpClientModule, HttpResponse, HttpHeaders } from '@angular/common/http';
 import { MatDialogModule, MatDialog } from '@angular/material/dialog';
 import { OverlayModule } from '@angular/cdk/overlay';
 import { of } from 'rxjs';
@@ -79,11 +79,28 @@ describe('CommentsComponent', () => {
   it('should test getComments() - ', () => {
     let testComments: Comment[] = [testComment];
     spyOn<any>(component['downloader'], 'getAllComments')
-      .and.returnValue(of(testComments));
+      .and.returnValue(of(new HttpResponse({
+        body: testComments,
+        headers: new HttpHeaders({'X-Next-Cursor': 'cursor'})
+      })));
 
     component.getComments();
 
     expect(component.comments[0].title).toEqual(testComment.title);
+    expect(component.nextCursor).toEqual('cursor');
+  });
+
+  it('should test loadMoreComments() appends next page', () => {
+    let testComments: Comment[] = [testComment];
+    let downloaderSpy = spyOn<any>(component['downloader'], 'getAllComments')
+      .and.returnValue(of(new HttpResponse({body: testComments})));
+    component.nextCursor = 'cursor';
+
+    component.loadMoreComments();
+
+    expect(downloaderSpy).toHaveBeenCalledWith('cursor');
+    expect(component.comments.length).toEqual(2);
+    expect(component.nextCursor).toBeNull();
   });
 
   it('should test viewComment() dialog open', () => {    
@@ -114,6 +131,6 @@ export class MockDialog {
 }
 export class MockDownloaderService {
   getAllComments() {
-    return of([{test: "test"}]);
+    return of(new HttpResponse({body: [{test: "test"}]}));
   }
 }
\ No newline at end of file
@@ -1,6 +1,7 @@
 import { Component, OnInit, Inject, Output } from '@angular/core';
 import { Subscription } from 'rxjs';
 import { DatePipe } from '@angular/common';
+import { HttpResponse } from '@angular/common/http';
 import { MatDialog } from '@angular/material/dialog';
 import { MatIconModule } from '@angular/material/icon';
 
@@ -21,6 +22,7 @@ import { Comment, Reply } from '../models/comment';
 export class CommentsComponent implements OnInit {
 
 	comments: Comment[] = [];
+  nextCursor: string = null;  // cursor for next page of comments, null on last page
 
   downloaderSub: Subscription;
 
@@ -48,26 +50,39 @@ export class CommentsComponent implements OnInit {
   		c.browser = comment.browser;
       c.comment_text = comment.comment_text;
       c.comment_images = comment.comment_images;
+      c.comment_image_urls = comment.comment_image_urls || [];
   		c.replies = comment.replies || [];  // NOTE: Defaulting to blank array
   		commentObjects.push(c);
   	});
   	return commentObjects;
   }
 
-  getComments() {
+  getComments(cursor: string = null) {
   	/*
-  	Gets all users' comments.
+  	Gets a page of users' comments, appending it to the
+  	loaded comments when a cursor is given.
   	*/
     if (this.downloaderSub) {
       this.downloaderSub.unsubscribe();
     }
     this.loaderService.show();
-    this.downloaderSub = this.downloader.getAllComments().subscribe((comments: Comment[]) => {
-      this.comments = this.createComments(comments);
+    this.downloaderSub = this.downloader.getAllComments(cursor).subscribe((response: HttpResponse<Comment[]>) => {
+      let comments = this.createComments(response.body);
+      this.comments = cursor ? this.comments.concat(comments) : comments;
+      this.nextCursor = response.headers.get('X-Next-Cursor');
       this.loaderService.hide();
     });
   }
 
+  loadMoreComments() {
+    /*
+    Gets the next page of comments.
+    */
+    if (this.nextCursor) {
+      this.getComments(this.nextCursor);
+    }
+  }
+
   viewComment(comment: Comment) {
   	/*
   	Opens user comment in dialog.
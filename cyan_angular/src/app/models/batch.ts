@@ -22,6 +22,14 @@ export class BatchStatus {
   job_num: string = "";
 }
 
+export interface JobProgress {
+  total: number;
+  done: number;
+  failed: number;
+  throughput: number;  // locations per second
+  eta: number;  // seconds remaining
+}
+
 export interface JobsTableParams {
   jobNum: string;
 	jobId: string;
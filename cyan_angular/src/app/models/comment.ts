@@ -7,6 +7,7 @@ export class Comment {
 	browser: string;
 	comment_text: string;
 	comment_images: CommentImage[];
+	comment_image_urls: string[];  // original images of comment_images thumbnails
 	replies: Reply[];
 }
 
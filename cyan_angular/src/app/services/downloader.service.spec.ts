@@ -220,11 +220,13 @@ describe('DownloaderService', () => {
 	});
 
 	it('should test getAllComments', () => {
-		let httpSpy = spyOn(service, 'executeAuthorizedGetRequest');
+		spyOn<any>(service['authService'], 'checkUserAuthentication')
+			.and.returnValue(true);
+		let httpSpy = spyOn<any>(service['http'], 'get');
 
-		service.getAllComments();
+		service.getAllComments('cursor');
 
-		expect(httpSpy).toHaveBeenCalled();
+		expect(httpSpy.calls.mostRecent().args[0]).toContain('comment?cursor=cursor');
 	});
 
 	it('should test addUserComment', () => {
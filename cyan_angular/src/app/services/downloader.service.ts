@@ -169,12 +169,20 @@ export class DownloaderService {
     return this.executeAuthorizedPostRequest(url, settings);
   }
 
-  getAllComments() {
+  getAllComments(cursor: string = null) {
     /*
-    Gets all users' comments.
+    Gets a page of users' comments, newest first. The response's
+    X-Next-Cursor header is the cursor for the next page.
     */
+    if (!this.authService.checkUserAuthentication()) { return; }
     let url = this.envService.config.baseServerUrl + 'comment';
-    return this.executeAuthorizedGetRequest(url);
+    if (cursor) {
+      url += '?cursor=' + encodeURIComponent(cursor);
+    }
+    return this.http.get(url, {
+      ...this.envService.getHeaders(),
+      observe: 'response'
+    });
   }
 
   addUserComment(comment: Comment) {
@@ -217,6 +225,25 @@ export class DownloaderService {
     return this.executeAuthorizedPostRequest(url, batchStatusRequest);
   }
 
+  getStatusStreamTicket() {
+    /*
+    Gets a single-use ticket for opening the status stream.
+    */
+    let url = this.envService.config.baseServerUrl + 'status/stream/ticket';
+    return this.executeAuthorizedPostRequest(url, {});
+  }
+
+  openStatusStream(ticket: string): EventSource {
+    /*
+    Opens server-sent events stream of user's job/report status changes.
+    EventSource can't set headers, so ticket and app name are query params.
+    */
+    let url = this.envService.config.baseServerUrl + 'status/stream' +
+      '?ticket=' + encodeURIComponent(ticket) +
+      '&app_name=' + encodeURIComponent(this.envService.config.appName);
+    return new EventSource(url);
+  }
+
   getBatchJobs(batchJob: string = "") {
     /*
     Returns batch job(s).
@@ -36,6 +36,7 @@ export class ReportsResultsComponent implements OnInit {
   status: string = '';  // job status
   pollStatusDelay: number = 2000;  // milliseconds
   intervalProcess: ReturnType<typeof setInterval>;  // keeps track of status polling
+  statusStream: EventSource;  // report status server-sent events
   currentJobStatus: ReportStatus;
 
   @ViewChild(MatSort) sort: MatSort;
@@ -79,6 +80,14 @@ export class ReportsResultsComponent implements OnInit {
   stopJobPolling(): void {
     console.log("Stopping job status polling.")
     clearInterval(this.intervalProcess);
+    this.closeStatusStream();
+  }
+
+  closeStatusStream(): void {
+    if (this.statusStream) {
+      this.statusStream.close();
+      this.statusStream = null;
+    }
   }
 
   getAllUserReports() {
@@ -268,9 +277,71 @@ export class ReportsResultsComponent implements OnInit {
 
   pollJobStatus(reportStatus: ReportStatus): void {
     /*
-    Polling loop that checks on user's job status.
+    Follows user's report status on the status event stream,
+    or with a polling loop if the browser can't stream.
     */
-    console.log("Starting job status polling.")
+    if (typeof EventSource !== 'undefined') {
+      this.streamReportStatus(reportStatus);
+    } else {
+      this.startReportPolling(reportStatus);
+    }
+  }
+
+  streamReportStatus(reportStatus: ReportStatus): void {
+    /*
+    Listens for user's report status on the status event stream. Falls back
+    to polling if the stream is unavailable (e.g., all stream slots busy),
+    and reconnects with a new ticket when the server ends the stream.
+    */
+    console.log("Starting report status stream.")
+    this.downloaderService.getStatusStreamTicket().subscribe(
+      response => {
+        this.openReportStatusStream(reportStatus, response['ticket']);
+      },
+      error => {
+        this.startReportPolling(reportStatus);
+      }
+    );
+  }
+
+  openReportStatusStream(reportStatus: ReportStatus, ticket: string): void {
+    /*
+    Opens the status event stream with a stream ticket.
+    */
+    let connected = false;
+    this.statusStream = this.downloaderService.openStatusStream(ticket);
+    this.statusStream.onopen = () => {
+      connected = true;
+      // Catches up on changes made before the stream was subscribed:
+      this.downloaderService.getReportStatus(reportStatus.report_id).subscribe(response => {
+        if (this.updateReportStatus(response)) {
+          this.stopJobPolling();
+        }
+      });
+    };
+    this.statusStream.addEventListener('report', (event: MessageEvent) => {
+      let response = JSON.parse(event.data);
+      if (response['report_id'] != reportStatus.report_id) { return; }
+      if (this.updateReportStatus(response)) {
+        this.stopJobPolling();
+      }
+    });
+    this.statusStream.onerror = () => {
+      this.closeStatusStream();
+      if (!this.authService.checkUserAuthentication()) { return; }
+      if (connected) {
+        this.streamReportStatus(reportStatus);
+      } else {
+        this.startReportPolling(reportStatus);
+      }
+    };
+  }
+
+  startReportPolling(reportStatus: ReportStatus): void {
+    /*
+    Polling loop that checks on user's report status.
+    */
+    console.log("Starting report status polling.")
     this.intervalProcess = setInterval(() => {
       if (!this.authService.checkUserAuthentication()) { 
         // Prevents polling forever from idle user
@@ -278,33 +349,37 @@ export class ReportsResultsComponent implements OnInit {
         return;
       }
       this.downloaderService.getReportStatus(reportStatus.report_id).subscribe(response => {
-
         console.log("Report status from polling: ", response);
-
-        if (response['status'].length > 0) {
-          this.status = response['status'];
-        }
-
-        // Updates "Run" tab info
-        this.currentJobStatus.report_id = response['report_id'];
-        this.currentJobStatus.report_status = response['report_status'];
-
-        // Updates "Jobs" tab info
-        this.updateTableJob(response['report']);
-
-        if (
-          response['status'].includes("Failed")
-          || this.finishedStates.includes(response['report_status'])
-        ) {
+        if (this.updateReportStatus(response)) {
           // Stops if job failed or is in a finished state.
           this.stopJobPolling();
-          return;
         }
-
       });
     }, this.pollStatusDelay);
   }
 
+  updateReportStatus(response: object): boolean {
+    /*
+    Updates report info from a report status response,
+    returns true if the report failed or is finished.
+    */
+    if (response['status'].length > 0) {
+      this.status = response['status'];
+    }
+
+    // Updates "Run" tab info
+    this.currentJobStatus.report_id = response['report_id'];
+    this.currentJobStatus.report_status = response['report_status'];
+
+    // Updates "Jobs" tab info
+    this.updateTableJob(response['report']);
+
+    return (
+      response['status'].includes("Failed")
+      || this.finishedStates.includes(response['report_status'])
+    );
+  }
+
   updateTableJob(reportData: ReportsTableParams) {
     /*
     Updates job info in "Jobs" table.
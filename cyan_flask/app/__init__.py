@@ -5,7 +5,6 @@ import os
 import sys
 import logging
 import json
-import simplejson
 
 
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
@@ -20,8 +19,13 @@ from config.set_environment import DeployEnv
 runtime_env = DeployEnv()
 runtime_env.load_deployment_environment()
 
+from log_config import configure_logging
+
+configure_logging()  # queued logging, level from LOG_LEVEL/ENV_NAME
+
 from endpoints import api
 from models import db, migrate
+from json_provider import JSONProvider
 
 # from config.secrets.crypt import CryptManager
 from cyan_flask.crypt import CryptManager
@@ -64,14 +68,14 @@ app.config.update(
     SECRET_KEY=secret_key,  # set here as well as os.environ?
     SQLALCHEMY_DATABASE_URI=mysql_url,
     SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    MAX_CONTENT_LENGTH=int(
+        os.environ.get("MAX_CONTENT_LENGTH", 16 * 1024 * 1024)
+    ),  # request body limit (e.g., comment image uploads)
 )
+app.json = JSONProvider(app)
 
 CORS(app, origins=["http://localhost:4200", "http://127.0.0.1:4200"])
 
-logging.basicConfig(
-    level=logging.DEBUG
-)  # sets logging level for logger (vary with dev vs prod?)
-
 
 def init_app():
     with app.app_context():
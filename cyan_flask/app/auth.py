@@ -2,8 +2,6 @@ import os
 from os.path import basename
 import datetime
 import time
-import hashlib
-import binascii
 import jwt
 import smtplib
 from email.mime.application import MIMEApplication
@@ -14,10 +12,12 @@ import logging
 
 from cyan_flask.crypt import CryptManager
 from csv_handler import CSVHandler
+import hashing
 
 
 crypt_manager = CryptManager()
 csv_handler = CSVHandler()
+password_hasher = hashing.PasswordHasher()
 
 
 class PasswordHandler:
@@ -120,21 +120,22 @@ class PasswordHandler:
         return crypt_manager.decrypt_message(crypt_manager.get_key(), smtp_pass)
 
     def hash_password(self, password):
-        salt = hashlib.sha256(os.urandom(60)).hexdigest().encode("ascii")
-        password_hash = hashlib.pbkdf2_hmac(
-            "sha512", password.encode("utf-8"), salt, 100000
-        )
-        password_hex = binascii.hexlify(password_hash)
-        password_salted = (salt + password_hex).decode("ascii")
-        return password_salted
+        """
+        Hashes password with the configured scheme (PASSWORD_HASH_SCHEME).
+        """
+        return hashing.executor.run(password_hasher.hash, password)
 
     def test_password(self, password_0, password_1):
-        salt = password_0[:64]
-        password_1_hash = hashlib.pbkdf2_hmac(
-            "sha512", password_1.encode("utf-8"), salt.encode("ascii"), 100000
-        )
-        password_1_hex = binascii.hexlify(password_1_hash).decode("ascii")
-        return password_0[64:] == password_1_hex
+        """
+        Checks password_1 against stored hash password_0.
+        """
+        return hashing.executor.run(password_hasher.verify, password_0, password_1)
+
+    def needs_rehash(self, password_hash):
+        """
+        Checks if stored hash should be upgraded to the configured scheme.
+        """
+        return password_hasher.needs_rehash(password_hash)
 
     def send_password_reset_email(self, request):
         """
@@ -212,8 +213,6 @@ class JwtHandler:
         """
         token = request.headers.get("Authorization", None)
         if token:
-            print(token)
-            print(self.decode_auth_token(token.split(" ")[1]))
             return self.decode_auth_token(token.split(" ")[1])["sub"]
         return None
 
@@ -0,0 +1,701 @@
+"""
+Redis caches, batch job progress/checkpoints and status
+events shared by the flask app and celery workers.
+"""
+import os
+import json
+import time
+import datetime
+import logging
+import threading
+import secrets
+from decimal import Decimal, ROUND_HALF_UP
+import redis
+
+
+_redis_client = None
+
+
+def get_redis_client():
+    """
+    Gets redis client for caches (separate db from the celery broker).
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            host=os.environ.get("REDIS_HOSTNAME", "localhost"),
+            port=int(os.environ.get("REDIS_PORT", 6379)),
+            db=int(os.environ.get("REDIS_CACHE_DB", 1)),
+            socket_timeout=float(os.environ.get("REDIS_CACHE_TIMEOUT", 2)),
+        )
+    return _redis_client
+
+
+class CyanoCache:
+    """
+    LRU-bounded cache of cyano location data responses.
+    Keys are coordinates snapped to a grid plus the data frequency
+    and the period of the latest satellite image, and entries expire
+    when the next daily/weekly image is due.
+    """
+
+    prefix = "cyano_cache"
+    trim_script = """
+        local expired = redis.call("ZRANGEBYSCORE", KEYS[2], "-inf", ARGV[1])
+        for i = 1, #expired, 1000 do
+            local batch = {unpack(expired, i, math.min(i + 999, #expired))}
+            redis.call("ZREM", KEYS[1], unpack(batch))
+            redis.call("ZREM", KEYS[2], unpack(batch))
+        end
+        return redis.call("ZCARD", KEYS[1])
+    """
+
+    def __init__(self, client=None):
+        self.client = client
+        self.enabled = os.environ.get("CYANO_CACHE_ENABLED", "true").lower() == "true"
+        self.max_entries = int(os.environ.get("CYANO_CACHE_MAX_ENTRIES", 100000))
+        self.grid_degrees = float(
+            os.environ.get("CYANO_CACHE_GRID_DEGREES", 0.0001)
+        )  # coordinate grid size (well within a 300m OLCI pixel)
+        self.ingest_hour = int(
+            os.environ.get("CYANO_CACHE_INGEST_HOUR", 12)
+        )  # UTC hour new images are available
+        self.weekly_ingest_day = int(
+            os.environ.get("CYANO_CACHE_WEEKLY_INGEST_DAY", 1)
+        )  # weekday new weekly images are available (Monday = 0)
+        self.lru_key = "{}:lru".format(self.prefix)  # scored by last use
+        self.expiry_key = "{}:expiry".format(self.prefix)  # scored by expiry time
+        self.hits_key = "{}:hits".format(self.prefix)
+        self.misses_key = "{}:misses".format(self.prefix)
+        self.script = None
+
+    def get_client(self):
+        return self.client or get_redis_client()
+
+    def get_data_period(self, frequency, now=None):
+        """
+        Gets start of the current image period for the data frequency
+        and the time the next image is due.
+        """
+        now = now or datetime.datetime.utcnow()
+        period = datetime.timedelta(days=7 if frequency == "weekly" else 1)
+        start = now.replace(hour=self.ingest_hour, minute=0, second=0, microsecond=0)
+        if frequency == "weekly":
+            start -= datetime.timedelta(
+                days=(now.weekday() - self.weekly_ingest_day) % 7
+            )
+        if start > now:
+            start -= period
+        return start, start + period
+
+    def snap_to_grid(self, coordinate):
+        """
+        Gets index of the grid cell nearest to a coordinate
+        (decimal math avoids float rounding at cell edges).
+        """
+        grid_index = Decimal(str(coordinate)) / Decimal(str(self.grid_degrees))
+        return int(grid_index.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    def build_key(self, request_data, now=None):
+        """
+        Builds cache key from (lat, lon, frequency, data period).
+        """
+        frequency = request_data["type"]
+        lat_index = self.snap_to_grid(request_data["latitude"])
+        lon_index = self.snap_to_grid(request_data["longitude"])
+        period_start, _ = self.get_data_period(frequency, now)
+        return "{}:{}:{}:{}:{}".format(
+            self.prefix,
+            frequency,
+            period_start.strftime("%Y%m%d%H"),
+            lat_index,
+            lon_index,
+        )
+
+    def get(self, request_data):
+        """
+        Gets cached location response, or None if not cached.
+        """
+        if not self.enabled:
+            return None
+        key = self.build_key(request_data)
+        try:
+            client = self.get_client()
+            cached_response = client.get(key)
+            pipeline = client.pipeline()
+            if cached_response is None:
+                pipeline.incr(self.misses_key)
+            else:
+                pipeline.incr(self.hits_key)
+                pipeline.zadd(self.lru_key, {key: time.time()})  # marks recent use
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logging.warning("CyanoCache get error: {}".format(e))
+            return None
+        if cached_response is None:
+            return None
+        return json.loads(cached_response)
+
+    def set(self, request_data, response):
+        """
+        Caches location response until the next image is due,
+        evicting least recently used entries over max_entries
+        (after dropping expired entries from the LRU index).
+        """
+        if not self.enabled:
+            return
+        now = datetime.datetime.utcnow()
+        key = self.build_key(request_data, now)
+        _, next_image = self.get_data_period(request_data["type"], now)
+        ttl = max(int((next_image - now).total_seconds()), 1)
+        try:
+            client = self.get_client()
+            if self.script is None:
+                self.script = client.register_script(self.trim_script)
+            now_ts = time.time()
+            pipeline = client.pipeline()
+            pipeline.set(key, json.dumps(response), ex=ttl)
+            pipeline.zadd(self.lru_key, {key: now_ts})
+            pipeline.zadd(self.expiry_key, {key: now_ts + ttl})
+            self.script(
+                keys=[self.lru_key, self.expiry_key], args=[now_ts], client=pipeline
+            )  # drops expired entries, counts live ones
+            num_entries = pipeline.execute()[-1]
+            if num_entries > self.max_entries:
+                evicted = client.zpopmin(self.lru_key, num_entries - self.max_entries)
+                if evicted:
+                    evicted_keys = [evicted_key for evicted_key, _ in evicted]
+                    client.zrem(self.expiry_key, *evicted_keys)
+                    client.delete(*evicted_keys)
+        except redis.exceptions.RedisError as e:
+            logging.warning("CyanoCache set error: {}".format(e))
+
+    def get_stats(self):
+        """
+        Gets cache hit/miss counters and number of entries.
+        """
+        try:
+            client = self.get_client()
+            pipeline = client.pipeline()
+            pipeline.get(self.hits_key)
+            pipeline.get(self.misses_key)
+            pipeline.zcard(self.lru_key)
+            hits, misses, entries = pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logging.warning("CyanoCache get_stats error: {}".format(e))
+            return {"error": "cache unavailable"}
+        return {
+            "hits": int(hits or 0),
+            "misses": int(misses or 0),
+            "entries": entries,
+        }
+
+
+class JobProgress:
+    """
+    Batch job progress (locations done/failed) kept in a redis hash
+    per job, so status polls don't touch the job table. Workers add
+    to the counters through a ProgressReporter, which flushes at most
+    once per update_interval. Chunks have their own counters, so a
+    chunk run again after its worker was lost restarts its count.
+    """
+
+    prefix = "job_progress"
+
+    def __init__(self, client=None):
+        self.client = client
+        self.update_interval = float(
+            os.environ.get("JOB_PROGRESS_INTERVAL", 1)
+        )  # min seconds between a reporter's redis updates
+        self.ttl = int(os.environ.get("JOB_PROGRESS_TTL", 86400))
+
+    def get_client(self):
+        return self.client or get_redis_client()
+
+    def build_key(self, job_id):
+        return "{}:{}".format(self.prefix, job_id)
+
+    def start(self, job_id, total):
+        """
+        Initializes a job's progress with its number of locations.
+        """
+        key = self.build_key(job_id)
+        try:
+            pipeline = self.get_client().pipeline()
+            pipeline.delete(key)
+            pipeline.hset(
+                key,
+                mapping={
+                    "total": total,
+                    "done": 0,
+                    "failed": 0,
+                    "started": time.time(),
+                    "updated": time.time(),
+                },
+            )
+            pipeline.expire(key, self.ttl)
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logging.warning("JobProgress start error: {}".format(e))
+
+    def build_fields(self, chunk_index=None):
+        if chunk_index is None:
+            return "done", "failed"
+        return "done:{}".format(chunk_index), "failed:{}".format(chunk_index)
+
+    def seed(self, job_id, chunk_index, done):
+        """
+        Sets a chunk's counters when it (re)starts, with 'done' locations
+        already saved by an earlier run of the chunk.
+        """
+        key = self.build_key(job_id)
+        done_field, failed_field = self.build_fields(chunk_index)
+        try:
+            pipeline = self.get_client().pipeline()
+            pipeline.hset(
+                key,
+                mapping={done_field: done, failed_field: 0, "updated": time.time()},
+            )
+            pipeline.expire(key, self.ttl)
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logging.warning("JobProgress seed error: {}".format(e))
+
+    def add(self, job_id, done=0, failed=0, chunk_index=None):
+        """
+        Adds to a job's (or one of its chunks') done/failed location counters.
+        """
+        key = self.build_key(job_id)
+        done_field, failed_field = self.build_fields(chunk_index)
+        try:
+            pipeline = self.get_client().pipeline()
+            pipeline.hincrby(key, done_field, done)
+            pipeline.hincrby(key, failed_field, failed)
+            pipeline.hset(key, "updated", time.time())
+            pipeline.expire(key, self.ttl)
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logging.warning("JobProgress add error: {}".format(e))
+
+    def get(self, job_id, now=None):
+        """
+        Gets a job's progress with its throughput (locations/s) and
+        estimated seconds remaining, or None if there's no progress.
+        """
+        try:
+            progress = self.get_client().hgetall(self.build_key(job_id))
+        except redis.exceptions.RedisError as e:
+            logging.warning("JobProgress get error: {}".format(e))
+            return None
+        progress = {key.decode(): float(value) for key, value in progress.items()}
+        if "total" not in progress:
+            return None
+        counters = {"done": 0, "failed": 0}
+        for field, value in progress.items():
+            counter = field.split(":")[0]  # job or chunk counter
+            if counter in counters:
+                counters[counter] += int(value)
+        total, done, failed = (
+            int(progress["total"]),
+            counters["done"],
+            counters["failed"],
+        )
+        elapsed = (now or time.time()) - progress["started"]
+        throughput = (done + failed) / elapsed if elapsed > 0 else 0
+        remaining = max(total - done - failed, 0)
+        return {
+            "total": total,
+            "done": done,
+            "failed": failed,
+            "throughput": round(throughput, 2),
+            "eta": round(remaining / throughput) if throughput else None,
+        }
+
+    def reporter(self, job_id, chunk_index=None, on_flush=None):
+        return ProgressReporter(self, job_id, chunk_index, on_flush)
+
+
+class ProgressReporter:
+    """
+    Thread-safe buffer of a task's progress, flushed to
+    JobProgress at most once per update_interval. The optional
+    on_flush() is called after each flush (e.g., to publish progress).
+    """
+
+    def __init__(self, job_progress, job_id, chunk_index=None, on_flush=None):
+        self.job_progress = job_progress
+        self.job_id = job_id
+        self.chunk_index = chunk_index
+        self.on_flush = on_flush
+        self.done = 0
+        self.failed = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, done=0, failed=0):
+        with self.lock:
+            self.done += done
+            self.failed += failed
+            if time.monotonic() - self.last_flush < self.job_progress.update_interval:
+                return
+            done, failed = self._take()
+        self._send(done, failed)
+
+    def flush(self):
+        """
+        Sends buffered progress (e.g., when a task finishes).
+        """
+        with self.lock:
+            done, failed = self._take()
+        if done or failed:
+            self._send(done, failed)
+
+    def _send(self, done, failed):
+        self.job_progress.add(self.job_id, done, failed, self.chunk_index)
+        if self.on_flush:
+            self.on_flush()
+
+    def _take(self):
+        done, failed = self.done, self.failed
+        self.done, self.failed = 0, 0
+        self.last_flush = time.monotonic()
+        return done, failed
+
+
+class SharedRateLimiter:
+    """
+    Rate limiter shared by every worker running a job's chunks: request
+    slots are reserved in redis (on the redis clock), so the job's
+    requests start at most 'rate' per second however many chunks run.
+    Falls back to spacing requests locally if redis is unavailable.
+    """
+
+    prefix = "rate_limit"
+    reserve_script = """
+        local now = redis.call("TIME")
+        now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+        local start = math.max(now, tonumber(redis.call("GET", KEYS[1]) or "0"))
+        redis.call("SET", KEYS[1], tostring(start + tonumber(ARGV[1])), "EX", ARGV[2])
+        return tostring(start - now)
+    """
+
+    def __init__(self, name, rate, client=None):
+        self.client = client
+        self.key = "{}:{}".format(self.prefix, name)
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_start = time.monotonic()  # local fallback
+        self.lock = threading.Lock()
+        self.script = None
+
+    def get_client(self):
+        return self.client or get_redis_client()
+
+    def reserve(self):
+        """
+        Reserves the next request slot, returns seconds until it starts.
+        """
+        try:
+            if self.script is None:
+                self.script = self.get_client().register_script(self.reserve_script)
+            return float(self.script(keys=[self.key], args=[self.interval, 3600]))
+        except redis.exceptions.RedisError as e:
+            logging.warning("SharedRateLimiter reserve error: {}".format(e))
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        return start - now
+
+    def wait(self):
+        """
+        Blocks until the caller's request slot is reached.
+        """
+        if not self.interval:
+            return
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class JobCheckpoints:
+    """
+    Checkpoints of a batch job's chunks (locations done, spool file
+    offset, rows written) kept in a redis hash per job, so a chunk
+    redelivered after its worker was lost resumes where it stopped.
+    """
+
+    prefix = "job_checkpoint"
+
+    def __init__(self, client=None):
+        self.client = client
+        self.ttl = int(os.environ.get("JOB_CHECKPOINT_TTL", 86400))
+
+    def get_client(self):
+        return self.client or get_redis_client()
+
+    def build_key(self, job_id):
+        return "{}:{}".format(self.prefix, job_id)
+
+    def get(self, job_id, chunk_index):
+        """
+        Gets a chunk's checkpoint ({"locations", "offset", "rows"}),
+        or None if the chunk has no checkpoint.
+        """
+        try:
+            checkpoint = self.get_client().hget(self.build_key(job_id), chunk_index)
+        except redis.exceptions.RedisError as e:
+            logging.warning("JobCheckpoints get error: {}".format(e))
+            return None
+        if checkpoint is None:
+            return None
+        locations, offset, rows = (int(value) for value in checkpoint.split(b":"))
+        return {"locations": locations, "offset": offset, "rows": rows}
+
+    def save(self, job_id, chunk_index, locations, offset, rows):
+        key = self.build_key(job_id)
+        try:
+            pipeline = self.get_client().pipeline()
+            pipeline.hset(key, chunk_index, "{}:{}:{}".format(locations, offset, rows))
+            pipeline.expire(key, self.ttl)
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logging.warning("JobCheckpoints save error: {}".format(e))
+
+    def add_attempt(self, job_id, chunk_index):
+        """
+        Counts a run of a chunk, returns the chunk's number of runs.
+        """
+        key = self.build_key(job_id)
+        try:
+            pipeline = self.get_client().pipeline()
+            pipeline.hincrby(key, "attempts:{}".format(chunk_index), 1)
+            pipeline.expire(key, self.ttl)
+            return pipeline.execute()[0]
+        except redis.exceptions.RedisError as e:
+            logging.warning("JobCheckpoints add_attempt error: {}".format(e))
+            return 1
+
+    def clear(self, job_id):
+        try:
+            self.get_client().delete(self.build_key(job_id))
+        except redis.exceptions.RedisError as e:
+            logging.warning("JobCheckpoints clear error: {}".format(e))
+
+
+class ChunkLeases:
+    """
+    Leases fencing each chunk of a batch job to one worker. A chunk that's
+    redelivered (after visibility_timeout) while its first run is still
+    going waits for the lease instead of writing the same spool file.
+    Runs renew their lease as they checkpoint, and a lost worker's lease
+    expires after ttl seconds, so ttl must exceed the longest gap between
+    a chunk's checkpoints (one location's requests).
+    """
+
+    prefix = "job_chunk_lease"
+    renew_script = """
+        if redis.call("GET", KEYS[1]) == ARGV[1] then
+            return redis.call("EXPIRE", KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    release_script = """
+        if redis.call("GET", KEYS[1]) == ARGV[1] then
+            return redis.call("DEL", KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, client=None):
+        self.client = client
+        self.ttl = int(os.environ.get("BATCH_CHUNK_LEASE_SECONDS", 120))
+
+    def get_client(self):
+        return self.client or get_redis_client()
+
+    def build_key(self, job_id, chunk_index):
+        return "{}:{}:{}".format(self.prefix, job_id, chunk_index)
+
+    def acquire(self, job_id, chunk_index, owner):
+        """
+        Takes a chunk's lease for 'owner', returns False if another run
+        holds it. Runs unfenced (returns True) if redis is unavailable.
+        """
+        try:
+            return bool(
+                self.get_client().set(
+                    self.build_key(job_id, chunk_index), owner, nx=True, ex=self.ttl
+                )
+            )
+        except redis.exceptions.RedisError as e:
+            logging.warning("ChunkLeases acquire error: {}".format(e))
+            return True
+
+    def renew(self, job_id, chunk_index, owner):
+        """
+        Extends owner's lease, returns False if the lease was lost.
+        """
+        return self._run_script(self.renew_script, job_id, chunk_index, owner) != 0
+
+    def release(self, job_id, chunk_index, owner):
+        self._run_script(self.release_script, job_id, chunk_index, owner)
+
+    def _run_script(self, script, job_id, chunk_index, owner):
+        try:
+            return self.get_client().eval(
+                script, 1, self.build_key(job_id, chunk_index), owner, self.ttl
+            )
+        except redis.exceptions.RedisError as e:
+            logging.warning("ChunkLeases error: {}".format(e))
+            return None
+
+
+class ReportStatusCache:
+    """
+    Short-lived cache of in-flight reports' status from the waterbody
+    service, so repeated polls of a report share one upstream request.
+    """
+
+    prefix = "report_status"
+
+    def __init__(self, client=None):
+        self.client = client
+        self.ttl = int(os.environ.get("REPORT_STATUS_CACHE_TTL", 5))
+
+    def get_client(self):
+        return self.client or get_redis_client()
+
+    def build_key(self, report_id):
+        return "{}:{}".format(self.prefix, report_id)
+
+    def get(self, report_id):
+        """
+        Gets cached report status, or None if not cached.
+        """
+        try:
+            cached_status = self.get_client().get(self.build_key(report_id))
+        except redis.exceptions.RedisError as e:
+            logging.warning("ReportStatusCache get error: {}".format(e))
+            return None
+        if cached_status is None:
+            return None
+        return json.loads(cached_status)
+
+    def set(self, report_id, report_status):
+        try:
+            self.get_client().set(
+                self.build_key(report_id), json.dumps(report_status), ex=self.ttl
+            )
+        except redis.exceptions.RedisError as e:
+            logging.warning("ReportStatusCache set error: {}".format(e))
+
+
+class StatusEvents:
+    """
+    Redis pub/sub channel per user for job/report status changes,
+    streamed to the browser as server-sent events.
+    """
+
+    prefix = "status_events"
+
+    def __init__(self, client=None):
+        self.client = client
+
+    def get_client(self):
+        return self.client or get_redis_client()
+
+    def build_channel(self, user_id):
+        return "{}:{}".format(self.prefix, user_id)
+
+    def publish(self, user_id, event, data):
+        """
+        Publishes a status event (e.g., "job", "report") to a user's channel.
+        """
+        try:
+            self.get_client().publish(
+                self.build_channel(user_id), json.dumps({"event": event, "data": data})
+            )
+        except redis.exceptions.RedisError as e:
+            logging.warning("StatusEvents publish error: {}".format(e))
+
+    def subscribe(self, user_id):
+        """
+        Subscribes to a user's channel. The caller closes the returned pubsub.
+        """
+        pubsub = self.get_client().pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.build_channel(user_id))
+        except redis.exceptions.RedisError:
+            pubsub.close()
+            raise
+        return pubsub
+
+    def get_events(self, pubsub, duration, heartbeat):
+        """
+        Generator of a subscribed user's status events for up to 'duration'
+        seconds. Yields (event, data), or None every 'heartbeat' seconds
+        without events.
+        """
+        end_time = time.monotonic() + duration
+        while time.monotonic() < end_time:
+            timeout = min(heartbeat, max(end_time - time.monotonic(), 0))
+            message = pubsub.get_message(timeout=timeout)
+            if message is None:
+                yield None
+                continue
+            status_event = json.loads(message["data"])
+            yield status_event["event"], status_event["data"]
+
+
+class StreamTickets:
+    """
+    Short-lived, single-use tickets for opening a status stream. EventSource
+    can't send headers, so a ticket goes in the stream URL (and access logs)
+    instead of the session token.
+    """
+
+    prefix = "stream_ticket"
+
+    def __init__(self, client=None):
+        self.client = client
+        self.ttl = int(os.environ.get("STATUS_STREAM_TICKET_SECONDS", 30))
+
+    def get_client(self):
+        return self.client or get_redis_client()
+
+    def build_key(self, ticket):
+        return "{}:{}".format(self.prefix, ticket)
+
+    def create(self, username, token_expiry):
+        """
+        Creates a ticket for a user, valid until used or ttl seconds.
+        Returns None if redis is unavailable.
+        """
+        ticket = secrets.token_urlsafe(32)
+        try:
+            self.get_client().set(
+                self.build_key(ticket),
+                json.dumps({"username": username, "exp": token_expiry}),
+                ex=self.ttl,
+            )
+        except redis.exceptions.RedisError as e:
+            logging.warning("StreamTickets create error: {}".format(e))
+            return None
+        return ticket
+
+    def redeem(self, ticket):
+        """
+        Uses up a ticket, returning its {"username", "exp"}, or None if
+        the ticket is unknown, expired or already used.
+        """
+        try:
+            pipeline = self.get_client().pipeline()
+            pipeline.get(self.build_key(ticket))
+            pipeline.delete(self.build_key(ticket))
+            stored_ticket, _ = pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logging.warning("StreamTickets redeem error: {}".format(e))
+            return None
+        if stored_ticket is None:
+            return None
+        return json.loads(stored_ticket)
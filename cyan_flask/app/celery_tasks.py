@@ -6,9 +6,14 @@ import os
 import sys
 import logging
 import time
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import json
-from celery import Celery
+from celery import Celery, chord
+from celery.signals import worker_ready
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 
 # import mysql.connector
 import datetime
@@ -17,8 +22,19 @@ import uuid
 
 # Local imports:
 from csv_handler import CSVHandler
+from image_handler import ImageHandler
+from upstream import UpstreamClient
+from cache import (
+    ChunkLeases,
+    CyanoCache,
+    JobProgress,
+    JobCheckpoints,
+    SharedRateLimiter,
+    StatusEvents,
+)
+import utils
 from auth import PasswordHandler
-from models import User, Job, db
+from models import User, Job, Notifications, db
 from config.set_environment import DeployEnv
 from cyan_flask.build_db import DBHandler
 from cyan_flask.crypt import CryptManager
@@ -32,6 +48,18 @@ redis_port = os.environ.get("REDIS_PORT", 6379)
 logging.info("REDIS_HOSTNAME: {}".format(redis_hostname))
 logging.info("REDIS_PORT: {}".format(redis_port))
 
+# Result backend storage: "metadata" keeps a small job summary per task,
+# "none" stores no task results (job state is still kept in the job table).
+result_mode = os.environ.get("CELERY_RESULT_MODE", "metadata")
+result_expires = int(os.environ.get("CELERY_RESULT_EXPIRES", 86400))  # seconds
+
+notifications_refresh_seconds = int(
+    os.environ.get("NOTIFICATIONS_REFRESH_SECONDS", 300)
+)  # celery beat interval for refreshing the notifications table
+notifications_lookback_days = int(
+    os.environ.get("NOTIFICATIONS_LOOKBACK_DAYS", 365)
+)  # age of oldest notifications requested from the feed
+
 celery_instance = Celery(
     "tasks",
     broker="redis://{}:{}/0".format(redis_hostname, redis_port),
@@ -44,20 +72,44 @@ celery_instance.conf.update(
     accept_content=["json"],
     task_serializer="json",
     result_serializer="json",
-    task_ignore_result=False,
+    task_ignore_result=result_mode == "none",
+    result_expires=result_expires,  # TTL of task results in redis
     task_track_started=True,
+    worker_prefetch_multiplier=1,  # spreads a job's chunks across workers
+    # Seconds before an unacked (acks_late) task is redelivered. A chunk
+    # redelivered while still running waits for its lease (see ChunkLeases).
+    broker_transport_options={
+        "visibility_timeout": int(os.environ.get("CELERY_VISIBILITY_TIMEOUT", 3600))
+    },
     worker_max_tasks_per_child=50000000,
+    beat_schedule={
+        "refresh-notifications": {
+            "task": "celery_tasks.refresh_notifications",
+            "schedule": notifications_refresh_seconds,
+        },
+    },
 )
 
 crypt_manager = CryptManager()
 csv_handler = CSVHandler()
+image_handler = ImageHandler()
 email_handler = PasswordHandler()
+cyano_cache = CyanoCache()
+job_progress = JobProgress()
+job_checkpoints = JobCheckpoints()
+chunk_leases = ChunkLeases()
+status_events = StatusEvents()
+upstream_client = UpstreamClient(
+    pool_maxsize=int(os.environ.get("BATCH_MAX_CONCURRENT_REQUESTS", 8))
+)  # one keep-alive connection per concurrent batch request
 
 
-@celery_instance.task(bind=True)
+@celery_instance.task(bind=True, acks_late=True, reject_on_worker_lost=True)
 def run_batch_job(self, request_obj):
     """
     Celery task that initiates processing of user batch request.
+    Acked when done, so it's redelivered if its worker is lost and
+    resumes from the job's checkpoints.
 
     TODO: More exception handling
     """
@@ -65,7 +117,6 @@ def run_batch_job(self, request_obj):
 
     username = request_obj["username"]
     locations = request_obj["locations"]
-    filename = request_obj["filename"]
     job_id = request_obj["job_id"]
 
     user_job = celery_handler.get_job_from_db(username, job_id)
@@ -77,68 +128,172 @@ def run_batch_job(self, request_obj):
         # TODO: How to handle this in a way that user can be notified?
         return
 
+    if user_job.job_status not in celery_handler.pending_states:
+        logging.info("Skipping job {} ({}).".format(job_id, user_job.job_status))
+        return  # canceled, or finished before a redelivery
+
     logging.info("User job: {}".format(user_job))
 
-    received_datetime = user_job.received_datetime
-    started_datetime = datetime.datetime.utcnow()
+    resumed = user_job.job_status == "STARTED"  # redelivered after worker was lost
+    if not resumed:
+        user_job.started_datetime = (
+            datetime.datetime.utcnow()
+        )  # sets job start time in db
+        user_job.job_status = "STARTED"  # sets job status in db
+        db.session.commit()
+        celery_handler.publish_job_status(user_job)
+        job_progress.start(job_id, len(locations))
+
+    location_chunks = celery_handler.split_locations(locations)
+    if len(location_chunks) > 1:
+        if resumed and user_job.num_chunks:
+            return  # chunks already dispatched
+        # Fans out chunks to workers, merge_batch_job finishes the job:
+        celery_handler.start_chunks(user_job, request_obj, location_chunks)
+        return
 
-    user_job.started_datetime = started_datetime  # sets job start time in db
-    user_job.job_status = "STARTED"  # sets job status in db
-    db.session.commit()
+    chunk_summary = celery_handler.run_chunk(
+        request_obj, 0, celery_handler.create_progress_publisher(user_job)
+    )
+    return celery_handler.finish_job(user_job, request_obj, [chunk_summary])
 
-    try:
-        # Makes requests for location data:
-        location_responses = []
-        for location in locations:
-            time.sleep(0.1)  # little delay b/w calls
-            response = celery_handler.make_cyano_request(location)
-            response.update({
-                "input_latitude": location["latitude"],
-                "input_longitude": location["longitude"]
-            })
-            location_responses.append(response)
-    except Exception as e:
-        logging.error("run_batch_job error getting location data: {}".format(e))
-        celery_handler.handle_failed_job(user_job)
-        return
 
-    try:
-        # Creates CSV object from location responses (list of rows):
-        csv_data = csv_handler.create_csv(username, filename, location_responses)
-        # logging.info("CSV created for {}: {}".format(username, filename))
-    except Exception as e:
-        logging.error("run_batch_job error creating CSV results file: {}".format(e))
-        celery_handler.handle_failed_job(user_job)
+@celery_instance.task(
+    name="celery_tasks.run_batch_chunk",
+    ignore_result=False,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def run_batch_chunk(request_obj, chunk_index):
+    """
+    Celery task that gets location data for one chunk of a
+    fanned out batch job and saves its rows as a CSV chunk.
+    Errors are returned (not raised) so the chord's merge task still runs.
+    """
+    celery_handler = CeleryHandler()
+
+    job_id = request_obj["job_id"]
+
+    user_job = celery_handler.get_job_from_db(request_obj["username"], job_id)
+    if not user_job or user_job.job_status in celery_handler.fail_states:
+        return {"chunk": chunk_index, "error": "job canceled or not found"}
+
+    chunk_summary = celery_handler.run_chunk(
+        request_obj, chunk_index, celery_handler.create_progress_publisher(user_job)
+    )
+    if "error" not in chunk_summary:
+        celery_handler.update_chunks_done(job_id)
+    return chunk_summary
+
+
+@celery_instance.task(
+    name="celery_tasks.merge_batch_job",
+    ignore_result=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
+def merge_batch_job(chunk_summaries, request_obj):
+    """
+    Celery chord callback that merges a batch job's CSV chunks,
+    then emails the results like run_batch_job.
+    """
+    celery_handler = CeleryHandler()
+
+    job_id = request_obj["job_id"]
+
+    user_job = celery_handler.get_job_from_db(request_obj["username"], job_id)
+    if not user_job:
+        logging.error("merge_batch_job no user job found for job id '{}'".format(job_id))
+        csv_handler.remove_csv_chunks(job_id)
         return
 
-    try:
-        # Sends email to user about job being complete:
-        email_handler.send_batch_job_complete_email(request_obj)
-    except Exception as e:
-        logging.error("run_batch_job error sending email of CSV results: {}".format(e))
-        celery_handler.handle_failed_job(user_job)
+    result_metadata = celery_handler.finish_job(user_job, request_obj, chunk_summaries)
+    if result_metadata:
+        celery_handler.store_job_result(job_id, result_metadata)
+    return result_metadata
+
+
+@celery_instance.task(name="celery_tasks.create_comment_thumbnail", ignore_result=True)
+def create_comment_thumbnail(filename):
+    """
+    Creates thumbnail of a user's comment image.
+    """
+    thumbnail_filename = image_handler.create_thumbnail(filename)
+    if not thumbnail_filename:
+        logging.warning("Unable to create thumbnail for image {}".format(filename))
+
+
+@celery_instance.task(name="celery_tasks.refresh_notifications", ignore_result=True)
+def refresh_notifications():
+    """
+    Celery beat task that upserts the /cyan/cyano/notifications
+    feed into the shared notifications table.
+    """
+    notifications = utils.make_notifications_request(
+        time.time() - notifications_lookback_days * 86400
+    )
+    if notifications is None:
+        logging.warning("refresh_notifications unable to get notifications feed.")
         return
+    if len(notifications) > 0:
+        save_notifications(notifications)
+    logging.info("Notifications refreshed: {}".format(len(notifications)))
 
-    # Removes CSV from disk after it has been sent as email attachment:
-    csv_handler.remove_csv_file(filename)
 
-    # Updates user job in db:
-    user_job.job_status = "SUCCESS"  # updates job status in db
-    user_job.finished_datetime = (
-        datetime.datetime.utcnow()
-    )  # sets job complete datetime
-    db.session.commit()
-    user_job.queue_time = celery_handler.calculate_queue_time(
-        user_job
-    )  # sets job's queue time (s)
-    user_job.exec_time = celery_handler.calculate_exec_time(
-        user_job
-    )  # sets job's execution time (s)
+@worker_ready.connect
+def refresh_notifications_on_startup(sender, **kwargs):
+    """
+    Fills the notifications table when a worker starts
+    instead of waiting for the first beat interval.
+    """
+    refresh_notifications.delay()
+
+
+def save_notifications(notifications):
+    """
+    Inserts new notifications and updates existing ones in one statement.
+    """
+    insert_stmt = mysql_insert(Notifications.__table__).values(
+        [Notifications.create_feed_row(notification) for notification in notifications]
+    )
+    upsert_stmt = insert_stmt.on_duplicate_key_update(
+        date=insert_stmt.inserted.date,
+        subject=insert_stmt.inserted.subject,
+        body=insert_stmt.inserted.body,
+    )
+    db.session.execute(upsert_stmt)
     db.session.commit()
 
-    logging.info("Task complete.")
 
-    return csv_data
+class ChunkLeaseLost(Exception):
+    """
+    Raised when a chunk's lease expired and another run took over the chunk.
+    """
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces out the start of
+    upstream requests to at most 'rate' per second.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_start = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """
+        Blocks until the caller's request slot is reached.
+        """
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
 
 
 class CeleryHandler:
@@ -155,15 +310,27 @@ class CeleryHandler:
         self.pending_states = ["RETRY", "PENDING", "RECEIVED", "STARTED"]
         self.fail_states = ["FAILURE", "REVOKED"]
         self.locations_limit = 1e4  # limit on num locations in job
-        self.cyano_request_timeout = 30  # seconds
-
-    def start_task(self, request_obj):
+        self.max_concurrent_requests = int(
+            os.environ.get("BATCH_MAX_CONCURRENT_REQUESTS", 8)
+        )  # max cyano requests in flight per job
+        self.requests_per_second = float(
+            os.environ.get("BATCH_REQUESTS_PER_SECOND", 20)
+        )  # politeness limit on cyano requests started per second
+        self.chunk_size = int(
+            os.environ.get("BATCH_CHUNK_SIZE", 500)
+        )  # locations per fanned out chunk task, 0 disables fan-out
+        self.max_attempts = int(
+            os.environ.get("BATCH_MAX_ATTEMPTS", 3)
+        )  # runs of a chunk (worker lost mid-chunk) before the job fails
+        self.lease_poll_seconds = 5  # wait between checks of a leased chunk
+
+    def start_task(self, request_obj, user):
         """
         Starts celery task and saves job/task ID to job table.
+        The user is the requesting user's row, already loaded by the caller.
         """
         logging.info("Starting task, request: {}".format(request_obj))
 
-        username = request_obj["username"]
         locations = request_obj["locations"]
         filename = request_obj["filename"]
 
@@ -171,13 +338,10 @@ class CeleryHandler:
 
         request_obj["job_id"] = job_id
 
-        user = User.query.filter_by(username=username).first()  # gets user from db
-        user_jobs = Job.query.filter_by(user_id=user.id).all()  # gets user jobs
-
         # Creates initial job entry:
         job_obj = Job(
             user_id=user.id,
-            job_num=len(user_jobs) + 1,
+            job_num=User.next_job_num(user.id),
             job_id=job_id,
             job_status="RECEIVED",
             input_file=filename,
@@ -195,38 +359,237 @@ class CeleryHandler:
 
         return job_obj
 
-    def get_active_user_job(self, username):
+    def split_locations(self, locations):
         """
-        Gets current/active user job from job table.
+        Splits a job's locations into chunks of chunk_size
+        (one chunk if chunking is disabled).
+        """
+        if self.chunk_size < 1:
+            return [locations]
+        return [
+            locations[i : i + self.chunk_size]
+            for i in range(0, len(locations), self.chunk_size)
+        ] or [locations]
+
+    def start_chunks(self, user_job, request_obj, location_chunks):
+        """
+        Dispatches a job's location chunks as a chord of run_batch_chunk
+        tasks, with merge_batch_job as its callback.
+        """
+        user_job.num_chunks = len(location_chunks)
+        user_job.chunks_done = 0
+        db.session.commit()
+
+        chunk_tasks = [
+            run_batch_chunk.s(dict(request_obj, locations=chunk), chunk_index)
+            for chunk_index, chunk in enumerate(location_chunks)
+        ]
+        merge_request = dict(request_obj, locations=[])  # chunks have the locations
+        chord(chunk_tasks)(merge_batch_job.s(merge_request))
+
+    def run_chunk(self, request_obj, chunk_index, on_progress=None):
         """
-        user = User.query.filter_by(username=username).first()  # gets user from db
-        active_user_job = (
-            Job.query.filter_by(user_id=user.id)
-            .filter(
-                (Job.job_status == "PENDING")
-                | (Job.job_status == "RECEIVED")
-                | (Job.job_status == "RETRY")
-                | (Job.job_status == "STARTED")
+        Runs a chunk of a job while holding its lease (see ChunkLeases),
+        so a chunk redelivered while it's still running waits for that run
+        to finish (or lose its worker) instead of writing the same files.
+        on_progress() is called as the chunk's progress is flushed.
+        Returns the chunk's summary, with "error" if it failed.
+        """
+        job_id = request_obj["job_id"]
+        owner = str(uuid.uuid4())
+        while True:
+            if not chunk_leases.acquire(job_id, chunk_index, owner):
+                time.sleep(self.lease_poll_seconds)
+                continue
+            try:
+                return self.save_chunk(request_obj, chunk_index, owner, on_progress)
+            except ChunkLeaseLost:
+                logging.warning(
+                    "run_chunk lost lease of chunk {} of job {}.".format(
+                        chunk_index, job_id
+                    )
+                )  # waits for the run that took over
+            finally:
+                chunk_leases.release(job_id, chunk_index, owner)
+
+    def save_chunk(self, request_obj, chunk_index, owner, on_progress=None):
+        """
+        Gets location data for a chunk of a job and saves its rows as a
+        CSV chunk, checkpointing as locations are written. A chunk run
+        again after its worker was lost skips saved or checkpointed work.
+        Returns the chunk's summary, with "error" if it failed.
+        """
+        job_id = request_obj["job_id"]
+        locations = request_obj["locations"]
+
+        chunk_summary = csv_handler.get_chunk_summary(job_id, chunk_index)
+        if chunk_summary:
+            return chunk_summary  # saved before the worker was lost
+
+        attempts = job_checkpoints.add_attempt(job_id, chunk_index)
+        if attempts > self.max_attempts:
+            logging.error(
+                "run_chunk chunk {} of job {} lost its worker {} times.".format(
+                    chunk_index, job_id, attempts - 1
+                )
             )
-            .first()
+            return {"chunk": chunk_index, "error": "too many attempts"}
+
+        checkpoint = csv_handler.check_chunk_checkpoint(
+            job_id, chunk_index, job_checkpoints.get(job_id, chunk_index)
         )
-        return active_user_job
+        if checkpoint:
+            logging.info(
+                "Resuming chunk {} of job {} after {} locations.".format(
+                    chunk_index, job_id, checkpoint["locations"]
+                )
+            )
+        skipped = checkpoint["locations"] if checkpoint else 0
+        job_progress.seed(
+            job_id, chunk_index, skipped
+        )  # replaces counts from an earlier run of the chunk
+        last_renewal = time.monotonic()
+
+        def save_checkpoint(locations_done, offset, row_count):
+            nonlocal last_renewal
+            if time.monotonic() - last_renewal >= chunk_leases.ttl / 4:
+                if not chunk_leases.renew(job_id, chunk_index, owner):
+                    raise ChunkLeaseLost()  # another run took over the chunk
+                last_renewal = time.monotonic()
+            job_checkpoints.save(job_id, chunk_index, locations_done, offset, row_count)
+
+        progress = job_progress.reporter(job_id, chunk_index, on_progress)
+        try:
+            chunk_summary = csv_handler.save_csv_chunk(
+                job_id,
+                chunk_index,
+                self.fetch_locations(
+                    locations[skipped:],
+                    progress,
+                    SharedRateLimiter(job_id, self.requests_per_second),
+                ),
+                checkpoint,
+                save_checkpoint,
+            )
+        except ChunkLeaseLost:
+            raise
+        except Exception as e:
+            logging.error(
+                "run_chunk error getting chunk {} of job {}: {}".format(
+                    chunk_index, job_id, e
+                )
+            )
+            return {"chunk": chunk_index, "error": str(e)}
+        finally:
+            progress.flush()
+
+        chunk_summary["chunk"] = chunk_index
+        return chunk_summary
+
+    def finish_job(self, user_job, request_obj, chunk_summaries):
+        """
+        Merges a job's CSV chunks and completes the job,
+        or fails the job if any chunk failed.
+        """
+        job_id = request_obj["job_id"]
+
+        if user_job.job_status == "SUCCESS":
+            csv_handler.remove_csv_chunks(job_id)
+            return  # completed before a redelivery
+
+        errors = [chunk for chunk in chunk_summaries if "error" in chunk]
+        if errors:
+            logging.error("finish_job chunk errors for job {}: {}".format(job_id, errors))
+            if user_job.job_status not in self.fail_states:
+                self.handle_failed_job(user_job)
+            csv_handler.remove_csv_chunks(job_id)
+            job_checkpoints.clear(job_id)
+            return
+
+        csv_summary = csv_handler.merge_csv_chunks(
+            job_id, request_obj["filename"], chunk_summaries
+        )
+        csv_handler.remove_csv_chunks(job_id)
+        job_checkpoints.clear(job_id)
+
+        return self.complete_job(user_job, request_obj, csv_summary)
+
+    def update_chunks_done(self, job_id):
+        """
+        Atomically increments a job's count of finished chunks.
+        """
+        Job.query.filter_by(job_id=job_id).update(
+            {Job.chunks_done: Job.chunks_done + 1}, synchronize_session=False
+        )
+        db.session.commit()
+
+    def complete_job(self, user_job, request_obj, csv_summary):
+        """
+        Emails the job's CSV results to the user and marks the job complete.
+        Returns the job's result metadata, or None if the job failed.
+        """
+        filename = request_obj["filename"]
+
+        if "error" in csv_summary:
+            logging.error("complete_job error saving CSV results file.")
+            self.handle_failed_job(user_job)
+            return
+
+        try:
+            # Sends email to user about job being complete:
+            email_handler.send_batch_job_complete_email(request_obj)
+        except Exception as e:
+            logging.error("complete_job error sending email of CSV results: {}".format(e))
+            self.handle_failed_job(user_job)
+            return
+
+        # Removes CSV from disk after it has been sent as email attachment:
+        csv_handler.remove_csv_file(filename)
+
+        # Updates user job in db:
+        user_job.job_status = "SUCCESS"  # updates job status in db
+        user_job.finished_datetime = (
+            datetime.datetime.utcnow()
+        )  # sets job complete datetime
+        db.session.commit()
+        user_job.queue_time = self.calculate_queue_time(
+            user_job
+        )  # sets job's queue time (s)
+        user_job.exec_time = self.calculate_exec_time(
+            user_job
+        )  # sets job's execution time (s)
+        db.session.commit()
+        self.publish_job_status(user_job)
+
+        result_metadata = self.create_result_metadata(user_job, csv_summary)
+
+        logging.info(
+            "Task complete: {}, result size: {} bytes".format(
+                result_metadata, len(json.dumps(result_metadata))
+            )
+        )
+        logging.info("Cyano cache stats: {}".format(cyano_cache.get_stats()))
+
+        return result_metadata
+
+    def get_active_user_job(self, username):
+        """
+        Gets current/active user job from job table.
+        """
+        return Job.get_active_user_job(username)
 
     def get_job_from_db(self, username, job_id):
         """
         Checks celery job status in DB instead of
         from AsyncResult (see check_celery_job_status())
         """
-        user = User.query.filter_by(username=username).first()  # gets user from db
-        user_job = Job.query.filter_by(user_id=user.id, job_id=job_id).first()
-        return user_job
+        return Job.get_user_job(username, job_id)
 
     def get_all_jobs(self, username):
         """
         Gets all user's jobs from db.
         """
-        user = User.query.filter_by(username=username).first()
-        return Job.query.filter_by(user_id=user.id).all()
+        return Job.get_user_jobs(username)
 
     def check_celery_job_status(self, job_id):
         """
@@ -272,7 +635,12 @@ class CeleryHandler:
         """
         Gets cyano data for location using
         /cyan/cyano/location/data/{lat}/{lon}/all?type=olci&frequency={weekly,daily}
+        Responses are cached until the next image for the frequency is due.
         """
+        cached_response = cyano_cache.get(request_data)
+        if cached_response is not None:
+            return cached_response
+
         lat = request_data["latitude"]
         lon = request_data["longitude"]
         data_type = request_data["type"]
@@ -284,12 +652,99 @@ class CeleryHandler:
         )
 
         try:
-            response = requests.get(url, timeout=self.cyano_request_timeout)
-            return json.loads(response.content)
+            response = upstream_client.get(url, endpoint="cyano")
+            location_data = json.loads(response.content)
         except requests.exceptions.RequestException as e:
             logging.error("make_cyano_request exception occurred: {}".format(e))
             raise e
 
+        if response.status_code == 200:
+            cyano_cache.set(request_data, location_data)
+
+        return location_data
+
+    def fetch_locations(self, locations, progress=None, rate_limiter=None):
+        """
+        Generator that gets cyano data for a list of locations using
+        a pool of threads, with at most max_concurrent_requests in flight
+        and request starts spaced out by the rate limiter (a job's
+        SharedRateLimiter when its chunks run on several workers).
+        Yields location responses in the same order as the input locations.
+        Locations done/failed are counted in the optional ProgressReporter.
+        """
+        rate_limiter = rate_limiter or RateLimiter(self.requests_per_second)
+
+        def fetch(location):
+            rate_limiter.wait()
+            try:
+                response = self.make_cyano_request(location)
+            except Exception:
+                if progress:
+                    progress.add(failed=1)
+                raise
+            response.update(
+                {
+                    "input_latitude": location["latitude"],
+                    "input_longitude": location["longitude"],
+                }
+            )
+            if progress:
+                progress.add(done=1)
+            return response
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_requests)
+        pending = collections.deque()
+        try:
+            for location in locations:
+                pending.append(executor.submit(fetch, location))
+                # Bounds number of queued/unconsumed responses:
+                if len(pending) >= 2 * self.max_concurrent_requests:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()  # skips queued requests after an error
+            executor.shutdown(wait=True)
+
+    def create_result_metadata(self, user_job, csv_summary):
+        """
+        Creates the job summary that's stored in the result backend
+        in place of the CSV data (the CSV is emailed to the user, then
+        removed, so the summary doesn't name the file).
+        """
+        return {
+            "job_id": user_job.job_id,
+            "job_status": user_job.job_status,
+            "row_count": csv_summary.get("row_count"),
+            "byte_size": csv_summary.get("byte_size"),
+            "exec_time": user_job.exec_time,
+        }
+
+    def store_job_result(self, job_id, result_metadata):
+        """
+        Stores a fanned out job's result metadata as the job's task result,
+        since run_batch_job returned (with no result) before the merge.
+        """
+        if result_mode == "none":
+            return
+        try:
+            celery_instance.backend.store_result(job_id, result_metadata, "SUCCESS")
+        except Exception as e:
+            logging.warning("store_job_result error: {}".format(e))
+
+    def get_result_memory_usage(self, job_id):
+        """
+        Gets memory used (bytes) by a job's result in the redis
+        result backend. Returns None if no result is stored.
+        """
+        try:
+            backend = celery_instance.backend
+            return backend.client.memory_usage(backend.get_key_for_task(job_id))
+        except Exception as e:
+            logging.warning("get_result_memory_usage error: {}".format(e))
+            return None
+
     def calculate_queue_time(self, user_job):
         """
         Calculates time user's job spent in celery queue.
@@ -313,3 +768,44 @@ class CeleryHandler:
             datetime.datetime.utcnow()
         )  # sets job complete datetime
         db.session.commit()
+        self.publish_job_status(user_job)
+
+    def create_job_status(self, user_job):
+        """
+        Creates a job's status response (same as the batch/status endpoint).
+        """
+        return {
+            "status": "Failed - error processing job."
+            if user_job.job_status in self.fail_states
+            else "",
+            "job_id": user_job.job_id,
+            "job_status": user_job.job_status,
+            "job": Job.create_jobs_json([user_job])[0],
+            "progress": job_progress.get(user_job.job_id)
+            if user_job.job_status in self.pending_states
+            else None,  # locations done/failed, throughput and eta (s)
+        }
+
+    def create_progress_publisher(self, user_job):
+        """
+        Returns a callback that publishes a running job's status with
+        its latest progress (called from fetch threads, so it doesn't
+        touch the db session).
+        """
+        user_id = user_job.user_id
+        job_status = self.create_job_status(user_job)
+
+        def publish_progress():
+            status_events.publish(
+                user_id,
+                "job",
+                dict(job_status, progress=job_progress.get(job_status["job_id"])),
+            )
+
+        return publish_progress
+
+    def publish_job_status(self, user_job):
+        """
+        Publishes a job's status to the user's status event stream.
+        """
+        status_events.publish(user_job.user_id, "job", self.create_job_status(user_job))
@@ -1,11 +1,11 @@
 import os
 import csv
+import shutil
 import logging
 
 
 class CSVHandler:
     def __init__(self):
-        self.csv_object = []
         self.location_data_headers = {
             "metaInfo": [
                 "locationName",
@@ -28,20 +28,6 @@ class CSVHandler:
             "imageDate", "satelliteImageType", "satelliteImageFrequency", "cellConcentration_cells/mL", "maxCellConcentration_cells/mL",
             "cell_latitude", "cell_longitude", "validCellsCount"]
 
-    def create_csv(self, username, input_filename, locations_data):
-        """
-        Creates CSV from /locations/data response.
-        """
-        csv_data = []
-        csv_data.append(self.csv_headers)
-        for location in locations_data:
-            csv_data += self.create_rows_for_location(location)
-
-        # Save CSV data to file:
-        self.save_csv_file(username, input_filename, csv_data)
-
-        return csv_data
-
     def create_rows_for_location(self, location):
         """
         Creates row as a list for CSV.
@@ -72,25 +58,128 @@ class CSVHandler:
             location_rows.append(row_data)
         return location_rows
 
-    def save_csv_file(self, username, input_filename, csv_data):
+    def save_csv_chunk(
+        self, job_id, chunk_index, locations_data, checkpoint=None, save_checkpoint=None
+    ):
+        """
+        Streams rows (without headers) for a chunk of a job's locations
+        to the chunk's spool file, then moves it into place.
+        A checkpoint ({"locations", "offset", "rows"}) from an earlier run
+        resumes the spool file, with locations_data starting after its
+        locations. save_checkpoint(locations, offset, rows) is called
+        after each location's rows are written.
+        Returns summary of the saved chunk.
+        """
+        chunk_path = self.build_chunk_path(job_id, chunk_index)
+        spool_path = self.build_spool_path(job_id, chunk_index)
+        locations_done = checkpoint["locations"] if checkpoint else 0
+        row_count = checkpoint["rows"] if checkpoint else 0
+        try:
+            os.makedirs(self.build_chunks_dir(job_id), exist_ok=True)
+            with open(spool_path, "r+" if checkpoint else "w", newline="") as csv_file:
+                if checkpoint:
+                    csv_file.seek(checkpoint["offset"])
+                    csv_file.truncate()  # drops rows written after the checkpoint
+                writer = csv.writer(csv_file, delimiter=",")
+                for location in locations_data:
+                    for row in self.create_rows_for_location(location):
+                        writer.writerow(row)
+                        row_count += 1
+                    locations_done += 1
+                    if save_checkpoint:
+                        csv_file.flush()
+                        save_checkpoint(locations_done, csv_file.tell(), row_count)
+            os.replace(spool_path, chunk_path)
+        except IOError as e:
+            logging.warning(
+                " csv_handler.py save_csv_chunk error saving chunk {} of job {}:\n {}".format(
+                    chunk_index, job_id, e
+                )
+            )
+            return {"error": "error saving csv chunk"}
+        return {"chunk": chunk_index, "row_count": row_count}
+
+    def check_chunk_checkpoint(self, job_id, chunk_index, checkpoint):
+        """
+        Returns a chunk's checkpoint if its spool file has the
+        checkpoint's rows, otherwise None (chunk starts over).
+        """
+        spool_path = self.build_spool_path(job_id, chunk_index)
+        if (
+            checkpoint
+            and os.path.isfile(spool_path)
+            and os.path.getsize(spool_path) >= checkpoint["offset"]
+        ):
+            return checkpoint
+        return None
+
+    def get_chunk_summary(self, job_id, chunk_index):
         """
-        Saves user csv to file.
+        Gets summary of a saved chunk, or None if it hasn't been saved.
+        """
+        chunk_path = self.build_chunk_path(job_id, chunk_index)
+        if not os.path.isfile(chunk_path):
+            return None
+        with open(chunk_path, "r", newline="") as chunk_file:
+            row_count = sum(1 for _ in csv.reader(chunk_file))
+        return {"chunk": chunk_index, "row_count": row_count}
+
+    def merge_csv_chunks(self, job_id, input_filename, chunk_summaries):
+        """
+        Concatenates a job's CSV chunks, in chunk order, into the user csv.
+        Returns summary of the saved CSV file.
         """
         output_filename = self.generate_output_filename(input_filename)
         full_filename = self.build_csv_file_path(output_filename)
+        row_count = 1  # headers
         try:
             with open(full_filename, "w", newline="") as csv_file:
-                writer = csv.writer(csv_file, delimiter=",")
-                for row in csv_data:
-                    writer.writerow(row)
-            return output_filename
+                csv.writer(csv_file, delimiter=",").writerow(self.csv_headers)
+                for chunk_summary in sorted(chunk_summaries, key=lambda c: c["chunk"]):
+                    chunk_path = self.build_chunk_path(job_id, chunk_summary["chunk"])
+                    with open(chunk_path, "r", newline="") as chunk_file:
+                        shutil.copyfileobj(chunk_file, csv_file)
+                    row_count += chunk_summary["row_count"]
         except IOError as e:
             logging.warning(
-                " utils.py save_csv_file error saving csv {}:\n {}".format(
+                " csv_handler.py merge_csv_chunks error merging csv {}:\n {}".format(
                     input_filename, e
                 )
             )
             return {"error": "error saving csv"}
+        return {
+            "output_file": output_filename,
+            "file_path": full_filename,
+            "row_count": row_count,
+            "byte_size": os.path.getsize(full_filename),
+        }
+
+    def remove_csv_chunks(self, job_id):
+        """
+        Removes a job's CSV chunks directory from disk.
+        """
+        shutil.rmtree(self.build_chunks_dir(job_id), ignore_errors=True)
+
+    def build_chunks_dir(self, job_id):
+        """
+        Builds absolute path of directory for a job's CSV chunks.
+        """
+        return self.build_csv_file_path(os.path.join("chunks", job_id))
+
+    def build_chunk_path(self, job_id, chunk_index):
+        """
+        Builds absolute path of a job's saved CSV chunk.
+        """
+        return os.path.join(
+            self.build_chunks_dir(job_id), "{:05d}.csv".format(chunk_index)
+        )
+
+    def build_spool_path(self, job_id, chunk_index):
+        """
+        Builds absolute path of the file a CSV chunk is written to
+        before it's saved (kept across runs for resuming the chunk).
+        """
+        return self.build_chunk_path(job_id, chunk_index) + ".part"
 
     def build_csv_file_path(self, filename):
         """
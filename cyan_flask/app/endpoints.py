@@ -1,16 +1,23 @@
 import os
-import simplejson
 from flask import request, g
 from flask_restful import Api, Resource, reqparse
 import logging
 
 # Local imports:
-from auth import JwtHandler
-from middleware import login_required, check_headers
+from middleware import (
+    login_required,
+    check_headers,
+    stream_login_required,
+    check_stream_headers,
+)
 import web_app_api
+from json_provider import output_json
 
 
 api = Api()
+api.representation("application/json")(
+    output_json
+)  # serializes responses once with the app's JSON provider
 
 
 base_url = "{}:{}".format(os.environ.get("FLASK_HOST"), os.environ.get("FLASK_PORT"))
@@ -74,9 +81,6 @@ class Login(Resource):
         # Gets user from user table:
         args = self.parser.parse_args()
         results, status_code = web_app_api.login_user(args)
-        results = simplejson.loads(
-            simplejson.dumps(results)
-        )  # NOTE: Standard json lib unable to handle Decimal type (using simplejson)
         return results, status_code
 
 
@@ -91,7 +95,7 @@ class AddLocation(Resource):
     def post(self, id=None):
         # Adds a new location to location table:
         args = request.get_json()
-        args["owner"] = JwtHandler().get_user_from_token(request)
+        args["owner"] = g.user
         headers = get_auth_headers()
         results, status_code = web_app_api.add_location(args)
         return results, status_code, headers
@@ -107,7 +111,7 @@ class EditLocation(Resource):
     @check_headers
     def post(self):
         args = request.get_json()
-        args["owner"] = JwtHandler().get_user_from_token(request)
+        args["owner"] = g.user
         headers = get_auth_headers()
         results, status_code = web_app_api.edit_location(args)
         return results, status_code, headers
@@ -122,7 +126,7 @@ class DeleteLocation(Resource):
     @login_required
     @check_headers
     def get(self, _id=""):
-        user = JwtHandler().get_user_from_token(request)
+        user = g.user
         headers = get_auth_headers()
         results, status_code = web_app_api.delete_location(user, _id)
         return results, status_code, headers
@@ -136,10 +140,9 @@ class GetUserLocations(Resource):
     @login_required
     @check_headers
     def get(self):
-        user = JwtHandler().get_user_from_token(request)
+        user = g.user
         headers = get_auth_headers()
         results = web_app_api.get_user_locations(user)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, 200, headers
 
 
@@ -151,10 +154,9 @@ class GetLocation(Resource):
     @login_required
     @check_headers
     def get(self, _id=""):
-        user = JwtHandler().get_user_from_token(request)
+        user = g.user
         headers = get_auth_headers()
         results, status_code = web_app_api.get_location(user, _id)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
@@ -166,7 +168,7 @@ class EditNotification(Resource):
     @login_required
     @check_headers
     def get(self, _id=""):
-        user = JwtHandler().get_user_from_token(request)
+        user = g.user
         headers = get_auth_headers()
         results, status_code = web_app_api.edit_notifications(user, _id)
         return results, status_code, headers
@@ -180,7 +182,7 @@ class DeleteNotification(Resource):
     @login_required
     @check_headers
     def get(self):
-        user = JwtHandler().get_user_from_token(request)
+        user = g.user
         headers = get_auth_headers()
         results, status_code = web_app_api.delete_notifications(user)
         return results, status_code, headers
@@ -199,7 +201,7 @@ class EditSettings(Resource):
     @check_headers
     def post(self):
         args = request.get_json()
-        args["owner"] = JwtHandler().get_user_from_token(request)
+        args["owner"] = g.user
         headers = get_auth_headers()
         results, status_code = web_app_api.edit_settings(args)
         return results, status_code, headers
@@ -216,7 +218,6 @@ class Refresh(Resource):
     @login_required
     @check_headers
     def get(self):
-        user = JwtHandler().get_user_from_token(request)
         headers = get_auth_headers()
         return {"status": "success"}, 200, headers
 
@@ -248,9 +249,7 @@ class Reset(Resource):
         parser = parser_base.copy()
         parser.add_argument("newPassword", type=str)
         args = request.get_json()
-        args["email"] = JwtHandler().get_user_token(request)[
-            "sub"
-        ]  # 'sub' key should have user's email address
+        args["email"] = g.user  # 'sub' key should have user's email address
         results, status_code = web_app_api.set_new_password(
             args
         )  # update user's email in db (middleware validates user)
@@ -267,12 +266,16 @@ class Comment(Resource):
     @check_headers
     def get(self):
         """
-        Get all user comments.
+        Gets a page of user comments.
+        Query params: cursor (from X-Next-Cursor header), limit.
         """
-        # user = JwtHandler().get_user_from_token(request)
         headers = get_auth_headers()
-        results, status_code = web_app_api.get_comments()
-        results = simplejson.loads(simplejson.dumps(results))
+        results, next_cursor, status_code = web_app_api.get_comments(
+            request.args.get("cursor"), request.args.get("limit")
+        )
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor  # absent on last page
+            headers["Access-Control-Expose-Headers"] = "Authorization, X-Next-Cursor"
         return results, status_code, headers
 
     @login_required
@@ -283,14 +286,21 @@ class Comment(Resource):
         """
         args = request.get_json()
         headers = get_auth_headers()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         results, status_code = web_app_api.add_user_comment(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
+class CommentImage(Resource):
+    """
+    Endpoint for user comment images. URLs are signed
+    instead of using the auth token, which <img> requests can't send.
+    """
+
+    def get(self, filename=""):
+        return web_app_api.get_comment_image(filename, request.args.get("sig"))
+
+
 class Reply(Resource):
     """
     Endpoints for user comment replies.
@@ -303,12 +313,9 @@ class Reply(Resource):
         Adds replay to a user's comment.
         """
         args = request.get_json()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         headers = get_auth_headers()
         results, status_code = web_app_api.add_comment_reply(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
@@ -324,12 +331,9 @@ class BatchJobStatus(Resource):
         to check job status in User DB table.
         """
         args = request.get_json()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         headers = get_auth_headers()
         results, status_code = web_app_api.get_batch_status(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
@@ -345,13 +349,12 @@ class Batch(Resource):
         """
         Gets batch job from db for user.
         """
-        user = JwtHandler().get_user_from_token(request)
+        user = g.user
         headers = get_auth_headers()
         if not job_id:
             results, status_code = web_app_api.get_all_batch_jobs({"username": user})
         else:
             results, status_code = web_app_api.get_batch_job(user, job_id)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
     @login_required
@@ -362,12 +365,9 @@ class Batch(Resource):
         POST: location list, username (from token),
         """
         args = request.get_json()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         headers = get_auth_headers()
         results, status_code = web_app_api.start_batch_job(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
@@ -380,12 +380,9 @@ class BatchJobCancel(Resource):
     @check_headers
     def post(self):
         args = request.get_json()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         headers = get_auth_headers()
         results, status_code = web_app_api.cancel_batch_job(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
@@ -401,14 +398,13 @@ class Report(Resource):
         """
         Gets batch job from db for user.
         """
-        user = JwtHandler().get_user_from_token(request)
+        user = g.user
         # user = "nick"
         headers = get_auth_headers()
         if not report_id:
             results, status_code = web_app_api.get_all_reports({"username": user})
         else:
             results, status_code = web_app_api.get_report(user, report_id)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
     @login_required
@@ -419,15 +415,12 @@ class Report(Resource):
         POST: location list, username (from token),
         """
         args = request.get_json()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         headers = get_auth_headers()
         args["token"] = headers.get("Authorization")
         args["origin"] = request.environ.get("HTTP_ORIGIN")
         args["app_name"] = os.getenv("APP_NAME")
         results, status_code = web_app_api.start_report(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
@@ -445,12 +438,9 @@ class ReportStatus(Resource):
         to check job status in User DB table.
         """
         args = request.get_json()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         headers = get_auth_headers()
         results, status_code = web_app_api.get_report_status(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
@@ -463,12 +453,9 @@ class ReportCancel(Resource):
     @check_headers
     def post(self):
         args = request.get_json()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         headers = get_auth_headers()
         results, status_code = web_app_api.cancel_report(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
@@ -484,16 +471,42 @@ class ReportUpdate(Resource):
         Ex: Request from WB when report is finished.
         """
         args = request.get_json()
-        args["username"] = JwtHandler().get_user_from_token(
-            request
-        )  # gets username from token
+        args["username"] = g.user  # gets username from token
         headers = get_auth_headers()
         # TODO: Additional request handling.
         results, status_code = web_app_api.update_report(args)
-        results = simplejson.loads(simplejson.dumps(results))
         return results, status_code, headers
 
 
+class StatusStreamTicket(Resource):
+    """
+    Endpoint for a single-use ticket that opens the user's status stream.
+    URL: /app/api/status/stream/ticket
+    """
+
+    @login_required
+    @check_headers
+    def post(self):
+        headers = get_auth_headers()
+        results, status_code = web_app_api.create_stream_ticket(
+            g.user, g.claims["exp"]
+        )
+        return results, status_code, headers
+
+
+class StatusStream(Resource):
+    """
+    Server-sent events stream of a user's job and report status changes.
+    EventSource can't set headers, so a stream ticket and the app name
+    are query params.
+    URL: /app/api/status/stream
+    """
+
+    @check_stream_headers
+    @stream_login_required
+    def get(self):
+        return web_app_api.get_status_stream(g.user, g.claims["exp"])
+
 
 # Test endpoint:
 api.add_resource(StatusTest, "/test")
@@ -524,6 +537,7 @@ api.add_resource(Reset, api_url + "reset")
 
 # Comment endpoint:
 api.add_resource(Comment, api_url + "comment")
+api.add_resource(CommentImage, api_url + "comment/image/<string:filename>")
 
 # Reply endpoint:
 api.add_resource(Reply, api_url + "reply")
@@ -539,4 +553,8 @@ api.add_resource(ReportStatus, api_url + "report/status")
 api.add_resource(ReportCancel, api_url + "report/cancel")
 api.add_resource(ReportUpdate, api_url + "report/update")
 
+# Status stream endpoints:
+api.add_resource(StatusStream, api_url + "status/stream")
+api.add_resource(StatusStreamTicket, api_url + "status/stream/ticket")
+
 print("CyAN Flask app started.")
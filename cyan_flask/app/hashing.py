@@ -0,0 +1,177 @@
+"""
+Password hashing with versioned hash formats.
+
+Stored hashes identify their algorithm and cost so the configured
+scheme can change without invalidating existing passwords:
+
+    <64 hex salt><128 hex hash>               legacy pbkdf2-sha512, 100000 rounds
+    $pbkdf2-sha512$<rounds>$<salt>$<hex hash>  pbkdf2-sha512
+    $2b$<rounds>$<salt+hash>                   bcrypt
+
+Hashing runs in a small bounded thread pool so a burst of logins
+queues up behind a few hashes instead of using up the web workers.
+"""
+import os
+import hmac
+import hashlib
+import binascii
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import bcrypt
+
+
+LEGACY_SALT_LENGTH = 64
+LEGACY_ROUNDS = 100000
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Raised when the hashing pool is full.
+    """
+
+    pass
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords for the configured scheme.
+    """
+
+    schemes = ["pbkdf2-sha512", "bcrypt"]
+
+    def __init__(self, scheme=None, rounds=None):
+        self.scheme = scheme or os.environ.get("PASSWORD_HASH_SCHEME", "pbkdf2-sha512")
+        if self.scheme not in self.schemes:
+            raise ValueError("Unknown password hash scheme: {}".format(self.scheme))
+        self.rounds = int(rounds or self.get_default_rounds(self.scheme))
+
+    def get_default_rounds(self, scheme):
+        """
+        Gets cost setting for a scheme (bcrypt rounds are log2).
+        """
+        if scheme == "bcrypt":
+            return os.environ.get("PASSWORD_BCRYPT_ROUNDS", 12)
+        return os.environ.get("PASSWORD_PBKDF2_ROUNDS", LEGACY_ROUNDS)
+
+    def hash(self, password):
+        """
+        Hashes password with the configured scheme.
+        """
+        if self.scheme == "bcrypt":
+            return bcrypt.hashpw(
+                password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds)
+            ).decode("ascii")
+        salt = hashlib.sha256(os.urandom(60)).hexdigest()
+        password_hex = self._pbkdf2(password, salt, self.rounds)
+        return "$pbkdf2-sha512${}${}${}".format(self.rounds, salt, password_hex)
+
+    def verify(self, password_hash, password):
+        """
+        Checks password against a stored hash of any supported format.
+        """
+        scheme, rounds, salt, expected = self.parse(password_hash)
+        if scheme == "bcrypt":
+            return bcrypt.checkpw(
+                password.encode("utf-8"), password_hash.encode("ascii")
+            )
+        if scheme is None:
+            return False
+        return hmac.compare_digest(self._pbkdf2(password, salt, rounds), expected)
+
+    def needs_rehash(self, password_hash):
+        """
+        Checks if a stored hash uses a different scheme or cost
+        than the configured one.
+        """
+        scheme, rounds, _, _ = self.parse(password_hash)
+        return scheme != self.scheme or rounds != self.rounds
+
+    def parse(self, password_hash):
+        """
+        Splits stored hash into (scheme, rounds, salt, hash).
+        Scheme is None for unrecognized hashes.
+        """
+        if password_hash.startswith("$pbkdf2-sha512$"):
+            try:
+                _, _, rounds, salt, password_hex = password_hash.split("$")
+                return "pbkdf2-sha512", int(rounds), salt, password_hex
+            except ValueError:
+                return None, None, None, None
+        if password_hash.startswith(("$2a$", "$2b$", "$2y$")):
+            try:
+                return "bcrypt", int(password_hash.split("$")[2]), None, None
+            except (IndexError, ValueError):
+                return None, None, None, None
+        if not password_hash.startswith("$") and len(password_hash) > LEGACY_SALT_LENGTH:
+            return (
+                "pbkdf2-sha512",
+                LEGACY_ROUNDS,
+                password_hash[:LEGACY_SALT_LENGTH],
+                password_hash[LEGACY_SALT_LENGTH:],
+            )
+        return None, None, None, None
+
+    def _pbkdf2(self, password, salt, rounds):
+        password_hash = hashlib.pbkdf2_hmac(
+            "sha512", password.encode("utf-8"), salt.encode("ascii"), rounds
+        )
+        return binascii.hexlify(password_hash).decode("ascii")
+
+
+class HashingExecutor:
+    """
+    Bounded pool for running password hashes off the request thread.
+    At most max_workers hashes run at once per process and at most
+    max_queued wait; callers past that get PasswordHashingBusy.
+    """
+
+    def __init__(self, max_workers=None, max_queued=None, timeout=None):
+        self.max_workers = max_workers or int(
+            os.environ.get("PASSWORD_HASH_WORKERS", 1)
+        )
+        self.max_queued = max_queued or int(os.environ.get("PASSWORD_HASH_QUEUE", 4))
+        self.timeout = timeout or float(
+            os.environ.get("PASSWORD_HASH_TIMEOUT", 10)
+        )  # seconds a request waits for its hash
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queued)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def get_executor(self):
+        """
+        Gets the current process's pool (pools don't survive forks).
+        """
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="password-hash",
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    def run(self, fn, *args):
+        """
+        Runs fn in the pool and waits for its result.
+        """
+        if not self._slots.acquire(blocking=False):
+            logging.warning("Password hashing pool full, rejecting request")
+            raise PasswordHashingBusy()
+        try:
+            future = self.get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            logging.warning("Password hashing timed out after {}s".format(self.timeout))
+            raise PasswordHashingBusy()
+
+
+executor = HashingExecutor()  # shared pool for the process
@@ -0,0 +1,97 @@
+"""
+Validation and thumbnailing of user comment images.
+"""
+import os
+import io
+import logging
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Local imports:
+import utils
+
+
+class ImageHandler:
+    """
+    Checks uploaded images against byte/pixel limits and
+    creates the thumbnails sent with comments.
+    """
+
+    allowed_formats = {"JPEG", "PNG", "GIF", "WEBP", "BMP"}
+
+    def __init__(self):
+        self.max_bytes = int(
+            os.environ.get("COMMENT_IMAGE_MAX_BYTES", 5 * 1024 * 1024)
+        )  # decoded image size
+        self.max_pixels = int(os.environ.get("COMMENT_IMAGE_MAX_PIXELS", 25000000))
+        self.thumbnail_size = int(
+            os.environ.get("COMMENT_THUMBNAIL_SIZE", 400)
+        )  # max thumbnail width/height
+        self.thumbnail_quality = int(os.environ.get("COMMENT_THUMBNAIL_QUALITY", 80))
+        Image.MAX_IMAGE_PIXELS = self.max_pixels  # guards against decompression bombs
+
+    def validate_image(self, image_data):
+        """
+        Checks image size and type from its header (doesn't decode pixels).
+        Returns error message, or None if image is valid.
+        """
+        if len(image_data) > self.max_bytes:
+            return "Image exceeds {:g} MB".format(self.max_bytes / 1024 / 1024)
+        try:
+            with Image.open(io.BytesIO(image_data)) as image:
+                width, height = image.size
+                image_format = image.format
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            return "Invalid image"
+        if image_format not in self.allowed_formats:
+            return "Unsupported image type"
+        if width * height > self.max_pixels:
+            return "Image exceeds {:g} megapixels".format(self.max_pixels / 1000000)
+        return None
+
+    def create_thumbnail(self, filename):
+        """
+        Creates JPEG thumbnail of a saved user image.
+        Returns thumbnail filename, or None on error.
+        """
+        thumbnail_filename = utils.get_thumbnail_filename(filename)
+        if os.path.exists(utils._build_image_file_path(thumbnail_filename)):
+            return thumbnail_filename  # same image already thumbnailed
+        image = utils.get_image_source(utils._build_image_file_path(filename))
+        if isinstance(image, dict):
+            return None
+        _, image_data = image
+        thumbnail_path = utils._build_image_file_path(thumbnail_filename)
+        temp_path = "{}.{}.tmp".format(thumbnail_path, os.getpid())
+        size = (self.thumbnail_size, self.thumbnail_size)
+        try:
+            with Image.open(io.BytesIO(image_data)) as image:
+                image.draft("RGB", size)  # decodes large JPEGs at reduced scale
+                thumbnail = ImageOps.exif_transpose(image)
+                thumbnail.thumbnail(size)
+                thumbnail = self._convert_to_rgb(thumbnail)
+                thumbnail.save(
+                    temp_path,
+                    "JPEG",
+                    quality=self.thumbnail_quality,
+                    optimize=True,
+                )
+            os.replace(temp_path, thumbnail_path)  # atomic, no partial thumbnails
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            logging.warning(
+                "image_handler.py create_thumbnail error for {}: {}".format(filename, e)
+            )
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        return thumbnail_filename
+
+    def _convert_to_rgb(self, image):
+        """
+        Converts image to RGB for JPEG, flattening transparency onto white.
+        """
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            return background
+        return image.convert("RGB")
@@ -0,0 +1,65 @@
+"""
+JSON serialization for API responses.
+
+Encodes Decimal, datetime and ORM rows directly so responses are
+serialized once. Uses orjson when it's installed.
+"""
+import datetime
+from decimal import Decimal
+from flask import current_app, make_response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(obj):
+    """
+    Converts types the json encoder doesn't handle.
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)  # e.g., location latitude/longitude
+    if isinstance(obj, datetime.datetime):
+        return obj.strftime("%Y-%m-%d %H:%M:%S")  # same as utils.get_datetime_string
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    if hasattr(obj, "__table__"):
+        return {
+            column.key: getattr(obj, column.key) for column in obj.__table__.columns
+        }  # ORM row
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    raise TypeError(
+        "Object of type {} is not JSON serializable".format(type(obj).__name__)
+    )
+
+
+class JSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider with Decimal/datetime/ORM row support.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(
+                obj,
+                default=default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            ).decode("utf-8")
+        kwargs.setdefault("default", default)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return super().dumps(obj, **kwargs)
+
+
+def output_json(data, code, headers=None):
+    """
+    flask-restful representation that serializes with the app's provider.
+    """
+    response = make_response(current_app.json.dumps(data), code)
+    response.mimetype = "application/json"
+    response.headers.extend(headers or {})
+    return response
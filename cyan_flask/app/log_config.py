@@ -0,0 +1,94 @@
+"""
+Logging setup for the flask app and celery workers.
+
+Records are put on an in-memory queue by the request thread and
+written to stderr by a background listener thread, so logging
+never blocks a request on a write.
+"""
+import os
+import sys
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+
+LOG_FORMAT = (
+    "time=%(asctime)s level=%(levelname)s logger=%(name)s "
+    "pid=%(process)d msg=%(message)s"
+)
+
+DEFAULT_LOG_LEVELS = {
+    "dev": "DEBUG",
+    "test": "INFO",
+    "prod": "WARNING",
+}  # by ENV_NAME suffix (e.g., local_docker_dev)
+
+
+class ProcessQueueHandler(QueueHandler):
+    """
+    Queue handler that starts its listener thread in each process
+    (uWSGI forks workers after the app is loaded, and threads don't
+    survive a fork).
+    """
+
+    def __init__(self, handlers, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.handlers = handlers
+        self.maxsize = maxsize
+        self.listener = None
+        self.listener_pid = None
+        self.listener_lock = threading.Lock()  # one listener per process
+
+    def start_listener(self):
+        self.queue = queue.Queue(self.maxsize)
+        self.listener = QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+        self.listener_pid = os.getpid()
+
+    def stop_listener(self):
+        if self.listener and self.listener_pid == os.getpid():
+            self.listener.stop()
+
+    def enqueue(self, record):
+        if self.listener_pid != os.getpid():
+            with self.listener_lock:
+                if self.listener_pid != os.getpid():  # not started by another thread
+                    self.start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # drops records rather than blocking the request
+
+
+def get_log_level(env_name=None):
+    """
+    Gets log level from LOG_LEVEL, or a default for the environment.
+    """
+    log_level = os.environ.get("LOG_LEVEL")
+    if log_level:
+        return log_level.upper()
+    env_name = env_name or os.environ.get("ENV_NAME", "")
+    for suffix, level in DEFAULT_LOG_LEVELS.items():
+        if env_name.endswith(suffix):
+            return level
+    return "INFO"
+
+
+def configure_logging():
+    """
+    Routes root logger through a queue handler.
+    """
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    queue_handler = ProcessQueueHandler([stream_handler])
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(get_log_level())
+    atexit.register(queue_handler.stop_listener)  # flushes queued records
+    return queue_handler
@@ -3,23 +3,74 @@ from flask import request, g, abort
 import json
 import logging
 import os
+from urllib.parse import urlparse
 
 # Local imports:
 from auth import JwtHandler
+from cache import StreamTickets
 
 
-def _check_for_refresh(auth_token):
+jwt_handler = JwtHandler()
+stream_tickets = StreamTickets()
+
+
+def get_refresh_window():
+    """
+    Gets seconds before expiry a new token is issued, defaulting to
+    a quarter of the session (capped at half, so fresh tokens are reused).
+    """
+    session_seconds = int(os.getenv("SESSION_EXPIRE_SECONDS", 300))
+    return min(
+        int(os.getenv("TOKEN_REFRESH_WINDOW_SECONDS", session_seconds // 4)),
+        session_seconds // 2,
+    )
+
+
+refresh_window = get_refresh_window()
+
+
+def _check_for_refresh(auth_token, claims):
     """
     Gets new token for valid user if token
-    is near expiring.
+    is near expiring, otherwise returns the same token.
     """
-    expiry_time = JwtHandler().check_time_delta(auth_token["exp"])
-    if expiry_time >= 0:
-        auth_token = JwtHandler().encode_auth_token(auth_token["sub"])
+    expiry_time = jwt_handler.check_time_delta(claims["exp"])
+    if expiry_time <= refresh_window:
+        return jwt_handler.encode_auth_token(claims["sub"])
     return auth_token
 
 
+def _authenticate(auth_token):
+    """
+    Validates a token and stores the auth context on g
+    (g.user, g.claims, g.token). Returns error response, or None if valid.
+    """
+    try:
+        resp = jwt_handler.decode_auth_token(auth_token)
+        if "error" not in resp:
+            g.user = resp["sub"]
+            g.claims = resp
+            g.token = _check_for_refresh(
+                auth_token, resp
+            )  # gets new token if almost expired
+        else:
+            return resp, 401, {"Content-Type": "application/json"}
+    except Exception as e:
+        logging.warning("Error in cyan_flask middleware.py: {}".format(e))
+        return (
+            {"error": "Error authenticating user token"},
+            401,
+            {"Content-Type": "application/json"},
+        )
+    return None
+
+
 def login_required(f):
+    """
+    Validates the request's token once and stores the
+    auth context on g (g.user, g.claims, g.token).
+    """
+
     @wraps(f)
     def wrap(*args, **kwargs):
         authorization = request.headers.get("authorization", None)
@@ -31,51 +82,128 @@ def login_required(f):
             )
         try:
             auth_token = authorization.split(" ")[1]
-            resp = JwtHandler().decode_auth_token(auth_token)
-            if "error" not in resp:
-                g.user = resp["sub"]
-                _token = _check_for_refresh(resp)  # gets new token if almost expired
-                g.token = _token
-            else:
-                return resp, 401, {"Content-Type": "application/json"}
-        except Exception as e:
-            logging.warning("Error in cyan_flask middleware.py: {}".format(e))
+        except IndexError:
             return (
                 {"error": "Error authenticating user token"},
                 401,
                 {"Content-Type": "application/json"},
             )
+        error_response = _authenticate(auth_token)
+        if error_response:
+            return error_response
         return f(*args, **kwargs)
 
     return wrap
 
 
-def check_headers(f):
+def stream_login_required(f):
+    """
+    login_required for EventSource requests, which can't set headers.
+    Redeems the single-use stream ticket in the "ticket" query parameter
+    (see StreamTickets) and stores the auth context on g (g.user, g.claims).
+    """
+
     @wraps(f)
     def wrap(*args, **kwargs):
+        ticket = request.args.get("ticket")
+        stream_ticket = stream_tickets.redeem(ticket) if ticket else None
+        if not stream_ticket:
+            return (
+                {"error": "Invalid or expired stream ticket"},
+                401,
+                {"Content-type": "application/json"},
+            )
+        g.user = stream_ticket["username"]
+        g.claims = {"sub": stream_ticket["username"], "exp": stream_ticket["exp"]}
+        return f(*args, **kwargs)
+
+    return wrap
 
-        origin = request.environ.get("HTTP_ORIGIN", "")
-        app_header = request.headers.get("App-Name", "")
 
-        host_domain = os.getenv("HOST_DOMAIN")
-        app_name = os.getenv("APP_NAME")
+class HeaderValidator:
+    """
+    Validates request Origin and App-Name headers against
+    settings read once at startup.
+    """
+
+    def __init__(self, allowed_origins=None, app_name=None, log_every=None):
+        if allowed_origins is None:
+            allowed_origins = [os.getenv("HOST_DOMAIN", "")] + os.getenv(
+                "ALLOWED_ORIGINS", ""
+            ).split(",")
+        self.allowed_origins = frozenset(
+            [self.normalize_origin(origin) for origin in allowed_origins if origin.strip()]
+            + [""]
+        )  # empty for requests without an Origin header (e.g., same-origin GET)
+        self.app_name = app_name if app_name is not None else os.getenv("APP_NAME")
+        self.log_every = log_every or int(
+            os.getenv("HEADER_REJECTION_LOG_EVERY", 100)
+        )  # logs 1 of every N rejected requests
+        self.rejections = 0
+
+    @staticmethod
+    def normalize_origin(url):
+        """
+        Gets origin (scheme://host[:port]) of a configured URL, which
+        may have a path (e.g., HOST_DOMAIN is the reset-password link base).
+        """
+        url = url.strip()
+        parsed_url = urlparse(url)
+        if not parsed_url.scheme or not parsed_url.netloc:
+            return url.rstrip("/")
+        return "{}://{}".format(parsed_url.scheme, parsed_url.netloc).lower()
 
-        logging.warning(
-            "HTTP Origin: {}\nHOST_DOMAIN: {} \
-            \nApp-Name: {}\nAPP_NAME: {}".format(
-                origin, host_domain,
-                app_header, app_name
+    def is_valid(self, origin, app_header):
+        return origin in self.allowed_origins and app_header == self.app_name
+
+    def log_rejection(self, origin, app_header):
+        self.rejections += 1
+        if self.rejections % self.log_every == 1 or self.log_every == 1:
+            logging.warning(
+                "Request Origin or App does not match, skipping request "
+                "(origin={}, app_name={}, rejections={})".format(
+                    origin, app_header, self.rejections
+                )
             )
-        )
 
-        if not origin in host_domain or app_header != app_name:
-            logging.warning("Request Origin or App does not match. Skipping request.")
+
+header_validator = HeaderValidator()
+
+
+def check_headers(f):
+    @wraps(f)
+    def wrap(*args, **kwargs):
+        origin = request.environ.get("HTTP_ORIGIN", "")
+        app_header = request.headers.get("App-Name", "")
+        if not header_validator.is_valid(origin, app_header):
+            header_validator.log_rejection(origin, app_header)
             return (
                 {"error": "Not a valid request"},
                 418,
                 {"Content-Type": "application/json"},
             )
+        return f(*args, **kwargs)
 
+    return wrap
+
+
+def check_stream_headers(f):
+    """
+    check_headers for EventSource requests, with the app name
+    sent as the "app_name" query parameter.
+    """
+
+    @wraps(f)
+    def wrap(*args, **kwargs):
+        origin = request.environ.get("HTTP_ORIGIN", "")
+        app_header = request.args.get("app_name", "")
+        if not header_validator.is_valid(origin, app_header):
+            header_validator.log_rejection(origin, app_header)
+            return (
+                {"error": "Not a valid request"},
+                418,
+                {"Content-Type": "application/json"},
+            )
         return f(*args, **kwargs)
 
     return wrap
@@ -19,6 +19,28 @@ class User(db.Model):
     password = db.Column(db.String(256), nullable=False)
     created = db.Column(db.DateTime, nullable=False)
     last_visit = db.Column(db.DateTime, nullable=False)
+    job_count = db.Column(db.Integer, nullable=False, server_default="0")
+    report_count = db.Column(db.Integer, nullable=False, server_default="0")
+
+    @classmethod
+    def next_job_num(cls, user_id):
+        return cls._increment(user_id, cls.job_count)
+
+    @classmethod
+    def next_report_num(cls, user_id):
+        return cls._increment(user_id, cls.report_count)
+
+    @classmethod
+    def _increment(cls, user_id, counter):
+        """
+        Atomically increments a user's counter column, returning the new value.
+        The UPDATE locks the user's row until the session commits, so
+        concurrent requests get unique numbers.
+        """
+        cls.query.filter_by(id=user_id).update(
+            {counter: counter + 1}, synchronize_session=False
+        )
+        return db.session.query(counter).filter(cls.id == user_id).scalar()
 
 
 class Location(db.Model):
@@ -50,13 +72,54 @@ class Location(db.Model):
 
 
 class Notifications(db.Model):
+    """
+    Notifications from the /cyan/cyano/notifications feed,
+    stored once and shared by all users.
+    """
+
     __tablename__ = "notifications"
-    owner = db.Column(db.String(35), nullable=False, primary_key=True)
-    id = db.Column(db.Integer, nullable=False, primary_key=True)
-    date = db.Column(db.DateTime, nullable=False)
+    id = db.Column(db.Integer, nullable=False, primary_key=True, autoincrement=False)
+    date = db.Column(db.DateTime, nullable=False, index=True)
     subject = db.Column(db.String(256), nullable=False)
     body = db.Column(db.Text, nullable=False)
-    is_new = db.Column(db.Boolean, nullable=False)
+
+    @staticmethod
+    def create_feed_row(notification):
+        """
+        Creates notifications table row from a notifications feed item.
+        """
+        return {
+            "id": notification["id"],
+            "date": utils.convert_to_timestamp(notification["dateSent"]),
+            "subject": notification["subject"],
+            "body": notification["message"],
+        }
+
+
+class NotificationState(db.Model):
+    """
+    User's notifications high-water mark: notifications dated
+    at or before cleared_date are not shown to the user.
+    """
+
+    __tablename__ = "notification_state"
+    owner = db.Column(db.String(35), nullable=False, primary_key=True)
+    cleared_date = db.Column(db.DateTime, nullable=False)
+
+
+class NotificationRead(db.Model):
+    """
+    Notifications a user has read (i.e., no longer new).
+    """
+
+    __tablename__ = "notification_read"
+    owner = db.Column(db.String(35), nullable=False, primary_key=True)
+    notification_id = db.Column(
+        db.Integer,
+        db.ForeignKey("notifications.id"),
+        nullable=False,
+        primary_key=True,
+    )
 
 
 class Settings(db.Model):
@@ -80,9 +143,25 @@ class Settings(db.Model):
             "alert_value": 1000000
         }
 
+    @classmethod
+    def get_user_settings(cls, username):
+        """
+        Gets (user ID, settings) for a username in one query.
+        Settings is None if user has none yet, returns None if no user.
+        """
+        return (
+            db.session.query(User.id, cls)
+            .outerjoin(cls, cls.user_id == User.id)
+            .filter(User.username == username)
+            .first()
+        )
+
 
 class Comment(db.Model):
     __tablename__ = "comment"
+    __table_args__ = (
+        db.Index("ix_comment_date_id", "date", "id"),
+    )  # comments feed pagination
     id = db.Column(db.Integer, nullable=False, primary_key=True)
     title = db.Column(db.String(128), nullable=False)
     date = db.Column(db.DateTime, nullable=False)
@@ -97,14 +176,27 @@ class Comment(db.Model):
 class CommentImages(db.Model):
     __tablename__ = "comment_images"
     id = db.Column(db.Integer, nullable=False, primary_key=True)
-    comment_id = db.Column(db.Integer, db.ForeignKey("comment.id"), nullable=False)
-    comment_image = db.Column(db.String(256), nullable=False)  # path to image source
+    comment_id = db.Column(
+        db.Integer, db.ForeignKey("comment.id"), nullable=False, index=True
+    )
+    comment_image = db.Column(
+        db.String(256), nullable=False, index=True
+    )  # image filename (sha256 of image for content-addressed images)
+
+    @classmethod
+    def get_refcount(cls, comment_image):
+        """
+        Gets number of comment images referencing a stored image file.
+        """
+        return cls.query.filter_by(comment_image=comment_image).count()
 
 
 class Reply(db.Model):
     __tablename__ = "comment_reply"
     id = db.Column(db.Integer, nullable=False, primary_key=True)
-    comment_id = db.Column(db.Integer, db.ForeignKey("comment.id"), nullable=False)
+    comment_id = db.Column(
+        db.Integer, db.ForeignKey("comment.id"), nullable=False, index=True
+    )
     date = db.Column(db.DateTime, nullable=False)
     username = db.Column(db.String(32), nullable=False)
     body = db.Column(db.String(500), nullable=False)
@@ -112,6 +204,10 @@ class Reply(db.Model):
 
 class Job(db.Model):
     __tablename__ = "job"
+    __table_args__ = (
+        db.Index("ix_job_user_id_job_id", "user_id", "job_id"),
+        db.Index("ix_job_user_id_job_status", "user_id", "job_status"),
+    )  # user's job lookups and active job check
     id = db.Column(db.Integer, nullable=False, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     job_num = db.Column(db.Integer, nullable=False)
@@ -127,6 +223,48 @@ class Job(db.Model):
     finished_datetime = db.Column(db.DateTime, nullable=True)  # time job is complete
     queue_time = db.Column(db.Integer, nullable=True)  # time spent waiting in queue
     exec_time = db.Column(db.Integer, nullable=True)  # execution time
+    num_chunks = db.Column(
+        db.Integer, nullable=True
+    )  # location chunks of fanned out job (None if not fanned out)
+    chunks_done = db.Column(
+        db.Integer, nullable=False, server_default="0"
+    )  # location chunks finished
+
+    active_states = ("PENDING", "RECEIVED", "RETRY", "STARTED")
+
+    @classmethod
+    def _user_query(cls, username):
+        """
+        Query of a user's jobs, joining the user table on username.
+        """
+        return cls.query.join(User, User.id == cls.user_id).filter(
+            User.username == username
+        )
+
+    @classmethod
+    def get_user_job(cls, username, job_id):
+        """
+        Gets a user's job by job ID.
+        """
+        return cls._user_query(username).filter(cls.job_id == job_id).first()
+
+    @classmethod
+    def get_user_jobs(cls, username):
+        """
+        Gets all of a user's jobs.
+        """
+        return cls._user_query(username).all()
+
+    @classmethod
+    def get_active_user_job(cls, username):
+        """
+        Gets user's job that's still in progress, if any.
+        """
+        return (
+            cls._user_query(username)
+            .filter(cls.job_status.in_(cls.active_states))
+            .first()
+        )
 
     @staticmethod
     def job_response():
@@ -143,6 +281,8 @@ class Job(db.Model):
             "receivedDatetime": None,
             "startedDatetime": None,
             "finishedDatetime": None,
+            "numChunks": None,
+            "chunksDone": None,
         }
 
     @staticmethod
@@ -169,12 +309,18 @@ class Job(db.Model):
             job_obj["finishedDatetime"] = utils.get_datetime_string(
                 job.finished_datetime
             )
+            job_obj["numChunks"] = job.num_chunks
+            job_obj["chunksDone"] = job.chunks_done
             jobs_json.append(job_obj)
         return jobs_json
 
 
 class Report(db.Model):
     __tablename__ = "report"
+    __table_args__ = (
+        db.Index("ix_report_user_id_report_id", "user_id", "report_id"),
+        db.Index("ix_report_user_id_report_status", "user_id", "report_status"),
+    )  # user's report lookups and active report check
     id = db.Column(db.Integer, nullable=False, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     report_num = db.Column(db.Integer, nullable=False)
@@ -192,6 +338,48 @@ class Report(db.Model):
     )  # init time report was received
     finished_datetime = db.Column(db.DateTime, nullable=True)  # time report is complete
 
+    active_states = ("PENDING", "RECEIVED", "RETRY", "STARTED")
+    finished_states = (
+        "FAILED",
+        "FAILURE",
+        "REVOKED",
+        "SUCCESS",
+    )  # no further status changes ("FAILED" from older status checks)
+
+    @classmethod
+    def _user_query(cls, username):
+        """
+        Query of a user's reports, joining the user table on username.
+        """
+        return cls.query.join(User, User.id == cls.user_id).filter(
+            User.username == username
+        )
+
+    @classmethod
+    def get_user_report(cls, username, report_id):
+        """
+        Gets a user's report by report ID.
+        """
+        return cls._user_query(username).filter(cls.report_id == report_id).first()
+
+    @classmethod
+    def get_user_reports(cls, username):
+        """
+        Gets all of a user's reports.
+        """
+        return cls._user_query(username).all()
+
+    @classmethod
+    def get_active_user_report(cls, username):
+        """
+        Gets user's report that's still in progress, if any.
+        """
+        return (
+            cls._user_query(username)
+            .filter(cls.report_status.in_(cls.active_states))
+            .first()
+        )
+
     @staticmethod
     def report_response():
         return {"status": None, "report_id": None, "report_status": None}
@@ -0,0 +1,132 @@
+"""
+Shared HTTP client for upstream requests to the cyano
+API (TOMCAT_API) and waterbody API (WATERBODY_URL).
+
+Keeps a requests session per process with keep-alive connection
+pools per host, retries with jittered exponential backoff, and a
+timeout per class of upstream endpoint. Endpoints that start or
+cancel work upstream (e.g., "report") use a session without retries.
+"""
+import os
+import random
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class JitterRetry(Retry):
+    """
+    Retry that adds random jitter to urllib3's exponential
+    backoff so retries from concurrent requests spread out.
+    """
+
+    backoff_jitter_max = float(os.environ.get("UPSTREAM_BACKOFF_JITTER", 0.5))
+
+    def get_backoff_time(self):
+        backoff_time = super().get_backoff_time()
+        if backoff_time <= 0:
+            return backoff_time
+        return backoff_time + random.uniform(0, self.backoff_jitter_max)
+
+
+class UpstreamClient:
+    """
+    Pooled HTTP client for upstream APIs. A new session is created
+    for each process (e.g., after uWSGI or celery forks workers).
+    """
+
+    def __init__(self, pool_maxsize=None):
+        self.pool_connections = int(
+            os.environ.get("UPSTREAM_POOL_CONNECTIONS", 4)
+        )  # number of hosts with cached pools
+        self.pool_maxsize = pool_maxsize or int(
+            os.environ.get("UPSTREAM_POOL_MAXSIZE", 4)
+        )  # keep-alive connections per host
+        self.retries = int(os.environ.get("UPSTREAM_RETRIES", 3))
+        self.backoff_factor = float(os.environ.get("UPSTREAM_BACKOFF_FACTOR", 0.5))
+        self.retry_statuses = [429, 500, 502, 503, 504]
+        self.timeouts = {
+            "default": float(os.environ.get("UPSTREAM_TIMEOUT_DEFAULT", 15)),
+            "cyano": float(os.environ.get("UPSTREAM_TIMEOUT_CYANO", 30)),
+            "notifications": float(
+                os.environ.get("UPSTREAM_TIMEOUT_NOTIFICATIONS", 10)
+            ),
+            "report": float(os.environ.get("UPSTREAM_TIMEOUT_REPORT", 15)),
+            "report_status": float(
+                os.environ.get("UPSTREAM_TIMEOUT_REPORT_STATUS", 5)
+            ),
+            "report_cancel": float(
+                os.environ.get("UPSTREAM_TIMEOUT_REPORT_CANCEL", 10)
+            ),
+        }  # seconds, per endpoint class
+        self.no_retry_endpoints = {
+            "report",
+            "report_cancel",
+        }  # GETs with upstream side effects, never retried
+        self._sessions = {}  # retrying and non-retrying sessions
+        self._session_pid = None
+        self._lock = threading.Lock()
+
+    def create_session(self, retry=True):
+        """
+        Creates session with pooled adapters, retrying if 'retry'.
+        """
+        retry = JitterRetry(
+            total=self.retries if retry else 0,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.retry_statuses,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get_session(self, retry=True):
+        """
+        Gets the current process's (retrying or non-retrying)
+        session, creating it if needed.
+        """
+        pid = os.getpid()
+        if retry not in self._sessions or self._session_pid != pid:
+            with self._lock:
+                if self._session_pid != pid:
+                    self._sessions = {}
+                    self._session_pid = pid
+                if retry not in self._sessions:
+                    logging.info("Creating upstream session for pid {}".format(pid))
+                    self._sessions[retry] = self.create_session(retry)
+        return self._sessions[retry]
+
+    def get_timeout(self, endpoint):
+        """
+        Gets timeout for an endpoint class.
+        """
+        return self.timeouts.get(endpoint, self.timeouts["default"])
+
+    def get(self, url, endpoint="default", **kwargs):
+        """
+        Makes GET request to an upstream API.
+        """
+        kwargs.setdefault("timeout", self.get_timeout(endpoint))
+        return self.get_session(endpoint not in self.no_retry_endpoints).get(
+            url, **kwargs
+        )
+
+    def post(self, url, endpoint="default", **kwargs):
+        """
+        Makes POST request to an upstream API (not retried).
+        """
+        kwargs.setdefault("timeout", self.get_timeout(endpoint))
+        return self.get_session(False).post(url, **kwargs)
+
+
+client = UpstreamClient()  # shared client for the process
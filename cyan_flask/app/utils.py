@@ -6,12 +6,24 @@ import logging
 import os
 from pathlib import Path
 import calendar
+import base64
+import binascii
+import hmac
+import hashlib
+import mimetypes
+import re
+import tempfile
 
 # Local imports:
 from cyan_flask.crypt import CryptManager
+import upstream
 
 crypt_manager = CryptManager()
 
+THUMBNAIL_SUFFIX = ".thumb.jpg"  # comment image thumbnails
+CONTENT_FILENAME = re.compile(r"^[0-9a-f]{64}\.")  # sha256-named images
+IMAGE_EXTENSIONS = {"jpeg": "jpg", "jpe": "jpg", "tif": "tiff"}  # normalized
+
 
 def set_db_url():
     """
@@ -72,10 +84,42 @@ def make_notifications_request(latest_time):
         + "/cyan/cyano/notifications/"
     )
     start_date = "{}T00-00-00-000-0000".format(formatted_time)
-    response = _make_request(url + start_date)
+    response = _make_request(url + start_date, endpoint="notifications")
     return response
 
 
+def get_page_size(limit=None):
+    """
+    Gets comments page size, capped at COMMENTS_MAX_PAGE_SIZE.
+    """
+    if limit is None or limit == "":
+        return int(os.environ.get("COMMENTS_PAGE_SIZE", 50))
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("Page size must be positive")
+    return min(limit, int(os.environ.get("COMMENTS_MAX_PAGE_SIZE", 200)))
+
+
+def encode_comments_cursor(date, _id):
+    """
+    Creates opaque cursor from the last comment's (date, id).
+    """
+    cursor = "{}|{}".format(date.strftime("%Y-%m-%dT%H:%M:%S.%f"), _id)
+    return base64.urlsafe_b64encode(cursor.encode("utf-8")).decode("ascii")
+
+
+def decode_comments_cursor(cursor):
+    """
+    Gets (date, id) from cursor. Raises ValueError if invalid.
+    """
+    try:
+        cursor = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        date, _id = cursor.split("|")
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return datetime.datetime.strptime(date, "%Y-%m-%dT%H:%M:%S.%f"), int(_id)
+
+
 def build_comments_json(comments, images_sources=None):
     """
     Creates serializable json from comment DB objects.
@@ -92,6 +136,10 @@ def build_comments_json(comments, images_sources=None):
                 "browser": comment.browser,
                 "comment_text": comment.comment_text,
                 "comment_images": build_comment_images(comment.comment_images),
+                "comment_image_urls": [
+                    get_image_url(image.comment_image)
+                    for image in comment.comment_images
+                ],  # originals, for viewing the thumbnails enlarged
                 "replies": build_replies_json(comment.replies),
             }
         )
@@ -118,14 +166,13 @@ def build_replies_json(replies):
 
 def build_comment_images(comment_images, image_sources=[]):
     """
-    Creates serializable json from comment_body DB objects.
+    Creates serializable json from comment_body DB objects
+    (thumbnail URLs, images are served by the comment image endpoint).
     """
-    comment_images_json = []
-    for image in comment_images:
-        filename = _build_image_file_path(image.comment_image)
-        image_source = get_image_source(filename)
-        comment_images_json.append(image_source)
-    return comment_images_json
+    return [
+        get_image_url(get_thumbnail_filename(image.comment_image))
+        for image in comment_images
+    ]
 
 
 def get_datetime_string(datetime_obj):
@@ -136,14 +183,56 @@ def get_datetime_string(datetime_obj):
     return str(datetime_obj).split(".")[0]
 
 
+def sign_image_filename(filename):
+    """
+    Creates signature for an image URL. Browsers can't send the
+    auth token with <img> requests, so image URLs are signed instead.
+    """
+    return hmac.new(
+        os.environ.get("SECRET_KEY", "").encode("utf-8"),
+        filename.encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()[:32]
+
+
+def get_image_url(filename):
+    """
+    Gets signed URL of a user image.
+    """
+    return "{}comment/image/{}?sig={}".format(
+        os.environ.get("API_URL", "/cyan/app/api/"),
+        filename,
+        sign_image_filename(filename),
+    )
+
+
+def parse_image_source(image_source):
+    """
+    Gets (mimetype, bytes) from an image data URL
+    (e.g., "data:image/png;base64,iVBOR...").
+    Raises ValueError if not a base64 data URL.
+    """
+    try:
+        header, data = image_source.split(",", 1)
+        if not header.startswith("data:") or not header.endswith(";base64"):
+            raise ValueError("Image source is not a base64 data URL")
+        return header[5:-7], base64.b64decode(data, validate=True)
+    except (AttributeError, binascii.Error) as e:
+        raise ValueError("Invalid image source: {}".format(e))
+
+
 def get_image_source(image_path):
     """
-    Gets user image from file.
+    Gets user image from file as (mimetype, bytes).
+    Reads both binary images and legacy data URL text files.
     """
     try:
-        with open(image_path, "r") as image_file:
-            return image_file.read()
-    except IOError as e:
+        with open(image_path, "rb") as image_file:
+            image_data = image_file.read()
+        if image_data.startswith(b"data:"):
+            return parse_image_source(image_data.decode("ascii"))
+        return mimetypes.guess_type(str(image_path))[0], image_data
+    except (IOError, ValueError, UnicodeError) as e:
         logging.warning(
             " utils.py get_image_source error reading filename {}:\n {}".format(
                 image_path, e
@@ -152,62 +241,115 @@ def get_image_source(image_path):
         return {"error": "cannot find image"}
 
 
+def get_thumbnail_filename(filename):
+    """
+    Gets thumbnail filename for a user image.
+    Example: "user_2021.png" --> "user_2021.png.thumb.jpg"
+    """
+    return filename + THUMBNAIL_SUFFIX
+
+
+def get_original_filename(thumbnail_filename):
+    """
+    Gets user image filename from its thumbnail filename.
+    """
+    return thumbnail_filename[: -len(THUMBNAIL_SUFFIX)]
+
+
+def is_thumbnail_filename(filename):
+    return filename.endswith(THUMBNAIL_SUFFIX)
+
+
 def save_image_source(username, image_source, image_name):
     """
-    Saves user image to file.
+    Saves user image to file, decoded from its data URL to binary.
     """
+    try:
+        _, image_data = parse_image_source(image_source)
+    except ValueError as e:
+        logging.warning(
+            " utils.py save_image_source error saving image {}:\n {}".format(
+                image_name, e
+            )
+        )
+        return {"error": "error saving image"}
+    return save_image_data(username, image_data, image_name)
 
-    filename = _generate_image_filename(username, image_name)
+
+def save_image_data(username, image_data, image_name):
+    """
+    Saves decoded user image to the content-addressed image store.
+    Identical images are stored once, and saving is idempotent and
+    safe with concurrent uploads (write to temp file, then rename).
+    """
+
+    filename = _generate_image_filename(image_data, image_name)
     full_filename = _build_image_file_path(filename)
 
     try:
-        with open(full_filename, "w") as image_file:
-            image_file.write(image_source)
+        os.utime(full_filename)  # already stored, newer mtime keeps it from gc
+        thumbnail_filename = _build_image_file_path(get_thumbnail_filename(filename))
+        if os.path.exists(thumbnail_filename):
+            os.utime(thumbnail_filename)
+        return filename
+    except FileNotFoundError:
+        pass  # not stored (or just removed by gc)
+
+    try:
+        image_dir = os.path.dirname(full_filename)
+        os.makedirs(image_dir, exist_ok=True)
+        fd, temp_filename = tempfile.mkstemp(dir=image_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as image_file:
+                image_file.write(image_data)
+            os.replace(temp_filename, full_filename)
+        except Exception:
+            os.remove(temp_filename)
+            raise
         return filename
-    except IOError as e:
+    except (IOError, OSError) as e:
         logging.warning(
-            " utils.py save_image_source error saving image {}:\n {}".format(
+            " utils.py save_image_data error saving image {}:\n {}".format(
                 image_name, e
             )
         )
         return {"error": "error saving image"}
 
 
-def _generate_image_filename(username, image_name):
+def _generate_image_filename(image_data, image_name):
     """
-    Creates filename for user images
-    that are saved to disk.
+    Creates content-addressed filename for user images
+    that are saved to disk: sha256 of the image plus its extension.
     """
-    file_ext = image_name.split(".")[-1]  # gets file extension
-    timestamp = (
-        str(datetime.datetime.now())
-        .replace("-", "")
-        .replace(":", "")
-        .replace(".", "")
-        .replace(" ", "")
-    )
-    filename = "{}_{}.{}".format(username, timestamp, file_ext)
-    return filename
+    file_ext = image_name.split(".")[-1].lower()  # gets file extension
+    file_ext = IMAGE_EXTENSIONS.get(file_ext, file_ext)
+    if not file_ext.isalnum() or len(file_ext) > 5:
+        file_ext = "img"
+    return "{}.{}".format(hashlib.sha256(image_data).hexdigest(), file_ext)
 
 
 def _build_image_file_path(filename):
     """
-    Builds absolute path of image filename.
+    Builds absolute path of image filename. Content-addressed
+    images are sharded by hash prefix (e.g., "ab/cd/abcd...png"),
+    older username_timestamp images are at the top level.
     """
     cyan_flask_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    return os.path.join(cyan_flask_dir, "user_images", filename)
+    images_dir = os.path.join(cyan_flask_dir, "user_images")
+    if CONTENT_FILENAME.match(filename):
+        return os.path.join(images_dir, filename[0:2], filename[2:4], filename)
+    return os.path.join(images_dir, filename)
 
 
-def _make_request(url, data=None):
+def _make_request(url, data=None, endpoint="default"):
     try:
         if data:
-            response = requests.post(url, data=data)
+            response = upstream.client.post(url, endpoint=endpoint, data=data)
         else:
-            response = requests.get(url)
+            response = upstream.client.get(url, endpoint=endpoint)
         return json.loads(response.content)
     except requests.exceptions.Timeout:
         logging.warning("Request to {} timed out.".format(url))
-        # TODO: Retry request.
         return None
     except requests.exceptions.RequestException as e:
         logging.warning("Error making request to {}.\n{}".format(url, e))
@@ -7,16 +7,24 @@ import time
 import datetime
 import json
 import logging
-from sqlalchemy import desc
+from sqlalchemy import desc, and_, or_
+from sqlalchemy.orm import selectinload
 import os
-import requests
+import io
+import hmac
+import mimetypes
+import threading
+from flask import send_file, Response
 
 # Local imports:
 from auth import PasswordHandler, JwtHandler
+from hashing import PasswordHashingBusy
 from models import (
     User,
     Location,
     Notifications,
+    NotificationState,
+    NotificationRead,
     Settings,
     Comment,
     CommentImages,
@@ -26,11 +34,24 @@ from models import (
     db,
 )
 import utils
-from celery_tasks import CeleryHandler
+import upstream
+from celery_tasks import CeleryHandler, create_comment_thumbnail
+from cache import JobProgress, ReportStatusCache, StatusEvents, StreamTickets
+from image_handler import ImageHandler
 from csv_handler import CSVHandler
 
 celery_handler = CeleryHandler()
 csv_handler = CSVHandler()
+image_handler = ImageHandler()
+job_progress = JobProgress()
+report_status_cache = ReportStatusCache()
+status_events = StatusEvents()
+stream_tickets = StreamTickets()
+status_stream_slots = threading.BoundedSemaphore(
+    int(os.environ.get("STATUS_STREAMS_PER_PROCESS", 0))
+)  # each open stream holds one of the process's uwsgi threads, so streams
+# are served by a separate uwsgi instance (docker/flask/uwsgi_stream.ini)
+# with one slot per thread; 0 (main API) answers 503 and clients poll
 
 
 def register_user(post_data):
@@ -48,7 +69,10 @@ def register_user(post_data):
         return {"error": "Email address already taken"}, 400
     else:
         date = datetime.datetime.utcnow()
-        password_salted = PasswordHandler().hash_password(password)
+        try:
+            password_salted = PasswordHandler().hash_password(password)
+        except PasswordHashingBusy:
+            return {"error": "Server busy, please try again."}, 503
         new_user = User(
             username=user,
             email=email,
@@ -57,13 +81,11 @@ def register_user(post_data):
             last_visit=date,
         )
         db.session.add(new_user)
-        db.session.commit()
-
-        user_id = User.query.filter_by(username=user).first().id
+        db.session.flush()  # assigns new_user.id
 
         default_settings = Settings.get_default_settings()
         new_user_settings = Settings(
-            user_id=user_id,
+            user_id=new_user.id,
             level_low=default_settings["level_low"],
             level_medium=default_settings["level_medium"],
             level_high=default_settings["level_high"],
@@ -89,11 +111,18 @@ def login_user(post_data):
     if not user_obj:
         return {"error": "Invalid user credentials."}, 401
     else:
-        if not PasswordHandler().test_password(user_obj.password, password):
-            return {"error": "Invalid username and/or password."}, 401
-
-    last_visit_unix = time.mktime(user_obj.last_visit.timetuple())
-    notifications = get_notifications(user, last_visit_unix)
+        password_handler = PasswordHandler()
+        try:
+            if not password_handler.test_password(user_obj.password, password):
+                return {"error": "Invalid username and/or password."}, 401
+            if password_handler.needs_rehash(user_obj.password):
+                user_obj.password = password_handler.hash_password(
+                    password
+                )  # upgrades hash, saved with 'last_visit'
+        except PasswordHashingBusy:
+            return {"error": "Server busy, please try again."}, 503
+
+    notifications = get_notifications(user, user_obj.last_visit)
 
     settings = get_user_settings(user_obj.id)
 
@@ -228,111 +257,85 @@ def get_location(user="", _id=""):
 
 def get_notifications(user, last_visit):
     """
-    Populates the notifications list.
-    Populate with all notifications if new user / registered??
+    Gets user's notifications from the shared notifications table,
+    which is kept up to date by the refresh_notifications celery task.
+    New users get notifications sent after their last visit.
     """
-
-    all_notifications = get_users_notifications(
-        user
-    )  # gets any existing notifications from user
-
-    # Sets minimum time for getting notifications from cyano endpoint:
-    latest_time = None
-    if len(all_notifications) > 0:
-        latest_time = utils.convert_to_unix(all_notifications[-1][2])
-    else:
-        latest_time = last_visit
-
-    new_notifications = utils.make_notifications_request(
-        latest_time
-    )  # gets all notifications at /cyan/cyano/notifications
-
-    db_values = parse_notifications_response(new_notifications, latest_time, user)
-    db_values_list = []
-
-    if len(db_values) > 0:
-        for val in db_values:
-            existing_entry = Notifications.query.filter_by(owner=user, id=val.id).first()
-            if existing_entry != None:
-                logging.warning("Entry already exist: {}, user={}, id={}".format(existing_entry, user, val.id))
-                continue
-            db.session.add(val)  # trying to add list of Notifications objects
-            db_values_list.append(
-                convert_notification_to_list(val)
-            )  # NOTE: cannot json serialize orm objects
+    user_state = NotificationState.query.filter_by(owner=user).first()
+    if not user_state:
+        user_state = NotificationState(owner=user, cleared_date=last_visit)
+        db.session.add(user_state)
         db.session.commit()
-
-    all_notifications += (
-        db_values_list  # adds list of Notifications db vals to user's Notifications
-    )
-
-    return all_notifications
+    return get_users_notifications(user, user_state.cleared_date)
 
 
-def get_users_notifications(user):
-    """ Gets existing notifications from database """
+def get_users_notifications(user, cleared_date):
+    """ Gets notifications after user's cleared date, with user's read state """
     user_notifications = (
-        Notifications.query.filter_by(owner=user).order_by(Notifications.date).all()
+        db.session.query(Notifications, NotificationRead.notification_id)
+        .outerjoin(
+            NotificationRead,
+            and_(
+                NotificationRead.notification_id == Notifications.id,
+                NotificationRead.owner == user,
+            ),
+        )
+        .filter(Notifications.date > cleared_date)
+        .order_by(Notifications.date)
+        .all()
     )
     _notifications = []
-    for notification in user_notifications:
-        notification.date = notification.date.strftime("%Y-%m-%d %H:%M:%S")
-        _notifications.append(convert_notification_to_list(notification))
+    for notification, read_id in user_notifications:
+        _notifications.append(
+            convert_notification_to_list(user, notification, read_id is None)
+        )
     return _notifications
 
 
-def convert_notification_to_list(notification_obj):
+def convert_notification_to_list(user, notification_obj, is_new):
     """ Creates ordered list for noticiation object """
     notification_list = [
-        notification_obj.owner,
+        user,
         notification_obj.id,
-        notification_obj.date,
+        notification_obj.date.strftime("%Y-%m-%d %H:%M:%S"),
         notification_obj.subject,
         notification_obj.body,
-        notification_obj.is_new,
+        is_new,
     ]
     return notification_list
 
 
-def parse_notifications_response(new_notifications, latest_time, user):
-    values = []
-    if new_notifications is None:
-        return values
-
-    for notification in new_notifications:
-        # NOTE: Assuming ascending order of dates
-        notification_time = int(
-            str(notification["dateSent"])[:-3]
-        )  # NOTE: trimming off 3 trailing 0s
-        if notification_time <= latest_time:
-            continue
-        val = Notifications(
-            owner=user,
-            id=notification["id"],
-            date=utils.convert_to_timestamp(notification["dateSent"]),
-            subject=notification["subject"],
-            body=notification["message"],
-            is_new=True,
-        )
-        values.append(val)
-    return values
-
-
 def edit_notifications(user, _id):
     """
-    Updates user's notification that has been read,
-    e.g., sets is_new to false.
+    Marks user's notification as read, e.g., sets is_new to false.
     """
-    Notifications.query.filter_by(owner=user, id=_id).update(dict(is_new=False))
+    try:
+        notification_id = int(_id)
+    except ValueError:
+        return {"error": "Invalid notification id"}, 400
+    db.session.execute(
+        NotificationRead.__table__.insert()
+        .prefix_with("IGNORE")
+        .values(owner=user, notification_id=notification_id)
+    )
     db.session.commit()
     return {"status": "success"}, 200
 
 
 def delete_notifications(user):
     """
-    Removes user's notifications (event: "Clear" button hit)
+    Clears user's notifications (event: "Clear" button hit) by moving
+    the user's high-water mark to the latest notification.
     """
-    user_notifications = Notifications.query.filter_by(owner=user).delete()
+    latest_date = db.session.query(db.func.max(Notifications.date)).scalar()
+    if not latest_date:
+        return {"status": "success"}, 200
+    user_state = NotificationState.query.filter_by(owner=user).first()
+    if not user_state:
+        db.session.add(NotificationState(owner=user, cleared_date=latest_date))
+    else:
+        user_state.cleared_date = latest_date
+    NotificationRead.query.filter_by(owner=user).delete()  # all read are now cleared
     db.session.commit()
     return {"status": "success"}, 200
 
@@ -373,8 +376,7 @@ def edit_settings(post_data):
         alert_value = post_data["alert_value"]
     except KeyError:
         return {"error": "Invalid key in request"}, 400
-    user_id = User.query.filter_by(username=user).first().id
-    user_settings = Settings.query.filter_by(user_id=user_id).first()
+    user_id, user_settings = Settings.get_user_settings(user)
     if not user_settings:
         db.session.add(
             Settings(
@@ -431,7 +433,10 @@ def set_new_password(request):
     except KeyError:
         return {"error", "No email provided."}, 400
 
-    password_salted = PasswordHandler().hash_password(request["newPassword"])
+    try:
+        password_salted = PasswordHandler().hash_password(request["newPassword"])
+    except PasswordHashingBusy:
+        return {"error": "Server busy, please try again."}, 503
 
     result = User.query.filter_by(email=user_email).update(
         dict(password=password_salted)
@@ -445,17 +450,92 @@ def set_new_password(request):
     return {"status": "success"}, 200
 
 
-def get_comments():
+def get_comments(cursor=None, limit=None):
     """
-    Gets all user comments.
+    Gets a page of user comments, newest first.
+    Pages are keyed on (date, id), so each page is one
+    index range scan regardless of board size.
+    Returns comments, cursor for next page (None on last page), and status.
     """
-    comments = Comment.query.order_by(
-        desc(Comment.date)
-    ).all()  # gets all users' comments
+    try:
+        limit = utils.get_page_size(limit)
+        cursor_date, cursor_id = (
+            utils.decode_comments_cursor(cursor) if cursor else (None, None)
+        )
+    except ValueError:
+        return {"error": "Invalid cursor or limit"}, None, 400
+    query = Comment.query.options(
+        selectinload(Comment.comment_images), selectinload(Comment.replies)
+    ).order_by(
+        desc(Comment.date), desc(Comment.id)
+    )  # page + images + replies in 3 queries
+    if cursor:
+        query = query.filter(
+            or_(
+                Comment.date < cursor_date,
+                and_(Comment.date == cursor_date, Comment.id < cursor_id),
+            )
+        )
+    comments = query.limit(limit + 1).all()  # extra row checks for a next page
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = utils.encode_comments_cursor(comments[-1].date, comments[-1].id)
     if len(comments) < 1:
-        return [], 200
+        return [], None, 200
     comments_json = utils.build_comments_json(comments)
-    return comments_json, 200
+    return comments_json, next_cursor, 200
+
+
+def get_comment_image(filename, signature):
+    """
+    Gets user image response with caching headers.
+    Saved images never change, so they're cached long-term.
+    """
+    if (
+        not signature
+        or os.path.basename(filename) != filename
+        or not hmac.compare_digest(signature, utils.sign_image_filename(filename))
+    ):
+        return {"error": "Image not found"}, 404
+    image_path = utils._build_image_file_path(filename)
+    max_age = int(os.getenv("COMMENT_IMAGE_MAX_AGE", 31536000))
+    immutable = True
+    if utils.is_thumbnail_filename(filename) and not os.path.exists(image_path):
+        # Serves original until the worker has created the thumbnail:
+        filename = utils.get_original_filename(filename)
+        image_path = utils._build_image_file_path(filename)
+        max_age = int(os.getenv("COMMENT_THUMBNAIL_PENDING_MAX_AGE", 60))
+        immutable = False
+    try:
+        image_stat = os.stat(image_path)
+        with open(image_path, "rb") as image_file:
+            is_data_url = image_file.read(5) == b"data:"
+    except OSError:
+        return {"error": "Image not found"}, 404
+    if is_data_url:
+        # Images saved before binary storage are data URL text:
+        image = utils.get_image_source(image_path)
+        if isinstance(image, dict):
+            return {"error": "Image not found"}, 404
+        mimetype, image_data = image
+        response = send_file(
+            io.BytesIO(image_data),
+            mimetype=mimetype,
+            etag="{}-{}".format(int(image_stat.st_mtime), image_stat.st_size),
+            last_modified=image_stat.st_mtime,
+            max_age=max_age,
+            conditional=True,
+        )
+    else:
+        response = send_file(
+            image_path,
+            mimetype=mimetypes.guess_type(filename)[0],
+            max_age=max_age,
+            conditional=True,
+        )
+    response.cache_control.immutable = immutable
+    return response
 
 
 def add_user_comment(post_data):
@@ -475,6 +555,18 @@ def add_user_comment(post_data):
     except KeyError:
         return {"error": "Invalid key in request"}, 400
 
+    images = []
+    for image in comment_images:
+        try:
+            _, image_data = utils.parse_image_source(image["source"])
+            image_name = image["name"]
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Invalid image in request"}, 400
+        image_error = image_handler.validate_image(image_data)
+        if image_error:
+            return {"error": "{}: {}".format(image_error, image_name)}, 400
+        images.append((image_name, image_data))
+
     comment_obj = Comment(
         # id=_id,
         title=title,
@@ -488,10 +580,10 @@ def add_user_comment(post_data):
     db.session.add(comment_obj)
     db.session.flush()
 
-    image_sources = []
-    for image in comment_images:
+    image_files = []
+    for image_name, image_data in images:
 
-        image_file = utils.save_image_source(username, image["source"], image["name"])
+        image_file = utils.save_image_data(username, image_data, image_name)
 
         if "error" in image_file:
             continue  # skips storing image filename if error
@@ -502,11 +594,25 @@ def add_user_comment(post_data):
         )
         db.session.add(comment_images_obj)
 
-        image_sources.append(image["source"])
+        image_files.append(image_file)
 
     db.session.commit()
 
-    comment_json = utils.build_comments_json([comment_obj], image_sources)[
+    for image_file in set(image_files):
+        if os.path.exists(
+            utils._build_image_file_path(utils.get_thumbnail_filename(image_file))
+        ):
+            continue  # duplicate of an already stored image
+        try:
+            create_comment_thumbnail.delay(image_file)  # thumbnails made by worker
+        except Exception as e:
+            logging.warning(
+                "add_user_comment error queuing thumbnail for {}: {}".format(
+                    image_file, e
+                )
+            )  # image endpoint serves the original until a thumbnail exists
+
+    comment_json = utils.build_comments_json([comment_obj])[
         0
     ]  # creates json object from comment db object
 
@@ -559,6 +665,7 @@ def get_batch_status(response_obj):
 
     if not user_job:
         response_obj["status"] = "Failed - job not found."
+        return response_obj, 200
     elif user_job.job_status in celery_handler.fail_states:
         response_obj["status"] = "Failed - error processing job."
     else:
@@ -567,6 +674,11 @@ def get_batch_status(response_obj):
     response_obj["job_id"] = user_job.job_id
     response_obj["job_status"] = user_job.job_status
     response_obj["job"] = Job.create_jobs_json([user_job])[0]
+    response_obj["progress"] = (
+        job_progress.get(job_id)
+        if user_job.job_status in celery_handler.pending_states
+        else None
+    )  # locations done/failed, throughput and eta (s) from the worker
     return response_obj, 200
 
 
@@ -609,7 +721,7 @@ def start_batch_job(request_obj):
         return response_obj, 200
 
     try:
-        job_obj = celery_handler.start_task(request_obj)  # starts a new job
+        job_obj = celery_handler.start_task(request_obj, user)  # starts a new job
         job_status = celery_handler.check_celery_job_status(job_obj.job_id)
     except Exception as e:
         logging.error("start_batch_job exception: {}".format(e))
@@ -660,6 +772,7 @@ def cancel_batch_job(request_obj):
     # Updates job status in DB.
     user_job.job_status = "REVOKED"
     db.session.commit()
+    celery_handler.publish_job_status(user_job)
 
     response_obj = dict(Job.user_jobs_response())
     response_obj["status"] = cancel_response["status"]
@@ -711,8 +824,7 @@ def get_all_reports(request_obj):
     """
     username = request_obj["username"]
 
-    user = User.query.filter_by(username=username).first()
-    user_reports = Report.query.filter_by(user_id=user.id).all()
+    user_reports = Report.get_user_reports(username)
 
     reports = list(
         reversed(Report.create_reports_json(user_reports))
@@ -734,13 +846,11 @@ def get_report(request_obj):
 
     # TODO: Error handling
 
-    # user_reports = celery_handler.get_report_from_db(username, report_id)
-    user = User.query.filter_by(username=username).first()  # gets user from db
-    user_report = Report.query.filter_by(user_id=user.id, report_id=report_id).first()
+    user_report = Report.get_user_report(username, report_id)
 
-    response_obj = dict(report.user_reports_response())
+    response_obj = dict(Report.user_reports_response())
     response_obj["status"] = "success"
-    response_obj["reports"] = Report.create_reports_json([user_reports])
+    response_obj["reports"] = Report.create_reports_json([user_report])
 
     return response_obj, 200
 
@@ -761,19 +871,8 @@ def start_report(request_obj):
     except KeyError:
         return {"error": "Invalid key in request"}, 400
 
-    user = User.query.filter_by(username=username).first()  # gets user from db
-    user_report = (
-        Report.query.filter_by(user_id=user.id)
-        .filter(
-            (Report.report_status == "PENDING")
-            | (Report.report_status == "RECEIVED")
-            | (Report.report_status == "RETRY")
-            | (Report.report_status == "STARTED")
-        )
-        .first()
-    )
-
-    user_settings = Settings.query.filter_by(user_id=user.id).first()
+    user_report = Report.get_active_user_report(username)
+    user_id, user_settings = Settings.get_user_settings(username)
 
     response_obj = dict(Report.report_response())
     report_obj = None
@@ -808,18 +907,15 @@ def start_report(request_obj):
 
         # Makes request to wb-flask to start report generation:
         url = os.getenv("WATERBODY_URL") + "/waterbody/report"
-        response = requests.get(url, params=request_params, timeout=15)
+        response = upstream.client.get(url, endpoint="report", params=request_params)
         if response.status_code != 200:
             raise
         request_obj["report_id"] = json.loads(response.content)["report_id"]
 
-        user = User.query.filter_by(username=username).first()  # gets user from db
-        user_reports = Report.query.filter_by(user_id=user.id).all()  # gets user jobs
-
         # Creates initial report entry:
         report_obj = Report(
-            user_id=user.id,
-            report_num=len(user_reports) + 1,
+            user_id=user_id,
+            report_num=User.next_report_num(user_id),
             report_id=request_obj["report_id"],
             report_status="RECEIVED",
             report_date=date,
@@ -868,6 +964,11 @@ def start_report(request_obj):
 
 
 def get_report_status(request_obj):
+    """
+    Gets a user's report status. Finished reports are read from the
+    report table, in-flight reports from the WB celery worker; the
+    table is only written when the report's status changes.
+    """
     try:
         report_id = request_obj["report_id"]
         username = request_obj["username"]
@@ -875,32 +976,25 @@ def get_report_status(request_obj):
         return {"error": "Invalid key in request"}, 400
 
     # Gets user report from table:
-    user = User.query.filter_by(username=username).first()  # gets user from db
-    user_report = Report.query.filter_by(user_id=user.id, report_id=report_id).first()
-
-    # Gets report status from WB celery worker:
-    user_report_status = None
-    url = os.getenv("WATERBODY_URL") + "/waterbody/report/status"
-    try:
-        status_response = requests.get(url, params={"report_id": user_report.report_id}, timeout=5)
-        user_report_status = json.loads(status_response.content)
-    except Exception as e:
-        logging.error("Error making request to {}: {}".format(url, e))
-        logging.warning("Marking report {} as FAILED.".format(user_report.report_id))
-        user_report_status = {"report_id": user_report.report_id, "report_status": "FAILED"}
-
-    logging.info("User report status (from WB celery worker): {}".format(user_report_status))
-
-    # Updates user report table with celery task status:
-    user_report.report_status = user_report_status["report_status"]
-    user_report.finished_datetime = datetime.datetime.strftime(datetime.datetime.utcnow(), "%Y-%m-%d %H:%M:%S")
-    db.session.commit()
+    user_report = Report.get_user_report(username, report_id)
 
     response_obj = dict(Report.report_response())
 
     if not user_report:
         response_obj["status"] = "Failed - report not found."
-    elif user_report.report_status in celery_handler.fail_states:
+        return response_obj, 200
+
+    if user_report.report_status not in Report.finished_states:
+        upstream_status = get_waterbody_report_status(user_report.report_id)
+        if upstream_status and upstream_status != user_report.report_status:
+            # Updates user report table with celery task status:
+            user_report.report_status = upstream_status
+            if user_report.report_status in Report.finished_states:
+                user_report.finished_datetime = datetime.datetime.utcnow()
+            db.session.commit()
+            publish_report_status(user_report)
+
+    if user_report.report_status in celery_handler.fail_states:
         response_obj["status"] = "Failed - error processing report."
     else:
         response_obj["status"] = "success"
@@ -911,6 +1005,37 @@ def get_report_status(request_obj):
     return response_obj, 200
 
 
+def get_waterbody_report_status(report_id):
+    """
+    Gets an in-flight report's status from the WB celery worker,
+    cached briefly so repeated polls share one request.
+    Returns None if the WB worker didn't report a status (e.g., request
+    failed), so the caller keeps the report's current status.
+    """
+    user_report_status = report_status_cache.get(report_id)
+    if user_report_status:
+        return user_report_status.get("report_status")
+
+    url = os.getenv("WATERBODY_URL") + "/waterbody/report/status"
+    try:
+        status_response = upstream.client.get(
+            url, endpoint="report_status", params={"report_id": report_id}
+        )
+        user_report_status = json.loads(status_response.content)
+    except Exception as e:
+        logging.error("Error making request to {}: {}".format(url, e))
+        return None
+
+    logging.info("User report status (from WB celery worker): {}".format(user_report_status))
+    if not isinstance(user_report_status, dict) or not user_report_status.get(
+        "report_status"
+    ):
+        logging.warning("No status for report {} from {}.".format(report_id, url))
+        return None
+    report_status_cache.set(report_id, user_report_status)
+    return user_report_status["report_status"]
+
+
 def cancel_report(request_obj):
     """
     Cancels a user's report.
@@ -921,9 +1046,7 @@ def cancel_report(request_obj):
     except KeyError:
         return {"error": "Invalid key in request"}, 400
 
-    # user_report = celery_handler.get_report_from_db(username, report_id)
-    user = User.query.filter_by(username=username).first()  # gets user from db
-    user_report = Report.query.filter_by(user_id=user.id, report_id=report_id).first()
+    user_report = Report.get_user_report(username, report_id)
 
     if not user_report:
         # No report to cancel, user doesn't have this report, skip revoking.
@@ -934,7 +1057,9 @@ def cancel_report(request_obj):
     # TODO: Make request to WB API to cancel report from user
     # NOTE: If same celery instance, could directly make request to worker and not an api request
     url = os.getenv("WATERBODY_URL") + "/waterbody/report/cancel"
-    cancel_response = requests.get(url, params={"report_id": user_report.report_id}, timeout=10)
+    cancel_response = upstream.client.get(
+        url, endpoint="report_cancel", params={"report_id": user_report.report_id}
+    )
 
     # TODO: Add error handling to json and above request
 
@@ -944,6 +1069,7 @@ def cancel_report(request_obj):
     user_report.report_status = "REVOKED"
     user_report.finished_datetime = datetime.datetime.strftime(datetime.datetime.utcnow(), "%Y-%m-%d %H:%M:%S")
     db.session.commit()
+    publish_report_status(user_report)
 
     response_obj = dict(Report.report_response())
     response_obj["status"] = cancel_response_obj["status"]
@@ -973,8 +1099,7 @@ def update_report(request_obj):
         return {"error": "Missing keys in request"}, 400
 
     # Updates row in report table:
-    user = User.query.filter_by(username=username).first()  # gets user from db
-    user_report = Report.query.filter_by(user_id=user.id, report_id=report_id).first()
+    user_report = Report.get_user_report(username, report_id)
 
     if not user_report:
         return {"error": "User report not found"}, 200
@@ -983,9 +1108,115 @@ def update_report(request_obj):
     user_report.finished_datetime = finished_datetime
 
     db.session.commit()
+    publish_report_status(user_report)
 
     response_obj = dict(Report.user_reports_response())
     response_obj["report_id"] = user_report.report_id
     response_obj["report_status"] = user_report.report_status
     response_obj["report"] = Report.create_reports_json([user_report])[0]
-    return response_obj, 200
\ No newline at end of file
+    return response_obj, 200
+
+
+def create_report_status(user_report):
+    """
+    Creates a report's status response (same as the report/status endpoint).
+    """
+    return {
+        "status": "Failed - error processing report."
+        if user_report.report_status in celery_handler.fail_states
+        else "success",
+        "report_id": user_report.report_id,
+        "report_status": user_report.report_status,
+        "report": Report.create_reports_json([user_report])[0],
+    }
+
+
+def publish_report_status(user_report):
+    """
+    Publishes a report's status to the user's status event stream.
+    """
+    status_events.publish(user_report.user_id, "report", create_report_status(user_report))
+
+
+def format_status_event(event, data):
+    """
+    Formats a server-sent event.
+    """
+    return "event: {}\ndata: {}\n\n".format(event, json.dumps(data))
+
+
+def create_stream_ticket(username, token_expiry):
+    """
+    Creates a single-use ticket for opening the user's status stream,
+    valid no longer than the user's session token.
+    """
+    ticket = stream_tickets.create(username, token_expiry)
+    if not ticket:
+        return {"error": "Status stream unavailable"}, 503  # client polls instead
+    return {"ticket": ticket}, 200
+
+
+def get_status_stream(username, token_expiry):
+    """
+    Streams a user's job and report status changes as server-sent events,
+    starting with the user's active job/report. Streams end before uwsgi's
+    harakiri and the session token's expiry; the browser reconnects with a new ticket.
+    """
+    user_id = db.session.query(User.id).filter_by(username=username).scalar()
+    if not user_id:
+        return {"error": "User not found"}, 401
+
+    if not status_stream_slots.acquire(blocking=False):
+        return {"error": "Status stream unavailable"}, 503  # client polls instead
+
+    pubsub = None
+    try:
+        duration = max(
+            min(
+                int(os.environ.get("STATUS_STREAM_MAX_SECONDS", 240)),
+                token_expiry - time.time(),
+            ),
+            0,
+        )
+        heartbeat = int(os.environ.get("STATUS_STREAM_HEARTBEAT_SECONDS", 15))
+        pubsub = status_events.subscribe(
+            user_id
+        )  # subscribes before the snapshot so no change is missed
+
+        initial_events = ["retry: 5000\n\n"]
+        user_job = celery_handler.get_active_user_job(username)
+        if user_job:
+            initial_events.append(
+                format_status_event("job", celery_handler.create_job_status(user_job))
+            )
+        user_report = Report.get_active_user_report(username)
+        if user_report:
+            initial_events.append(
+                format_status_event("report", create_report_status(user_report))
+            )
+    except Exception as e:
+        logging.warning("get_status_stream error for user {}: {}".format(username, e))
+        if pubsub:
+            pubsub.close()
+        status_stream_slots.release()
+        return {"error": "Status stream unavailable"}, 503
+    finally:
+        db.session.close()  # returns connection to the pool while streaming
+
+    def generate():
+        for initial_event in initial_events:
+            yield initial_event
+        for status_event in status_events.get_events(pubsub, duration, heartbeat):
+            if status_event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield format_status_event(*status_event)
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # disables nginx buffering
+    response.call_on_close(
+        pubsub.close
+    )  # unsubscribes when the response closes, even if never iterated
+    response.call_on_close(status_stream_slots.release)
+    return response
@@ -0,0 +1,118 @@
+"""
+Benchmarks API response serialization.
+
+Compares the old simplejson dumps->loads round trip followed by
+flask-restful's json.dumps against a single JSONProvider.dumps, for
+payloads shaped like the /locations and /comment responses.
+
+Usage:
+    python cyan_flask/benchmarks/json_responses.py [--rows 500] [--repeat 200]
+"""
+import os
+import sys
+import json
+import timeit
+import argparse
+import datetime
+from decimal import Decimal
+import flask
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+sys.path.insert(
+    0, APP_DIR
+)  # imports the module directly, skipping the app package's init (db, secrets)
+
+import json_provider
+
+try:
+    import simplejson  # previous serialization (no longer a requirement)
+except ImportError:
+    simplejson = None
+
+
+def build_locations(rows):
+    """
+    Builds payload like web_app_api.get_user_locations.
+    """
+    return [
+        {
+            "owner": "benchmark",
+            "id": i,
+            "name": "Location {}".format(i),
+            "latitude": Decimal("40.1234567890") + i,
+            "longitude": Decimal("-80.1234567890") - i,
+            "marked": False,
+            "compare": False,
+            "notes": [{"timestamp": "2021-01-01", "note": "note text"}],
+        }
+        for i in range(rows)
+    ]
+
+
+def build_comments(rows):
+    """
+    Builds payload like utils.build_comments_json.
+    """
+    date = str(datetime.datetime(2021, 1, 2, 3, 4, 5))
+    return [
+        {
+            "id": i,
+            "title": "Comment {}".format(i),
+            "date": date,
+            "username": "benchmark",
+            "device": "Desktop",
+            "browser": "Firefox",
+            "comment_text": "comment text " * 20,
+            "comment_images": [],
+            "replies": [
+                {
+                    "id": j,
+                    "comment_id": i,
+                    "date": date,
+                    "username": "benchmark",
+                    "body": "reply text " * 10,
+                }
+                for j in range(3)
+            ],
+        }
+        for i in range(rows)
+    ]
+
+
+def old_serialization(results):
+    results = simplejson.loads(simplejson.dumps(results))
+    return json.dumps(results) + "\n"  # flask-restful output_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    app = flask.Flask(__name__)
+    app.json = json_provider.JSONProvider(app)
+    backend = "orjson" if json_provider.orjson else "json"
+
+    print("JSONProvider backend: {}".format(backend))
+    print("{:<12}{:>16}{:>16}{:>10}".format("endpoint", "old ms/resp", "new ms/resp", "speedup"))
+    for endpoint, payload in [
+        ("/locations", build_locations(args.rows)),
+        ("/comment", build_comments(args.rows)),
+    ]:
+        new_time = timeit.timeit(lambda: app.json.dumps(payload), number=args.repeat)
+        new_ms = new_time / args.repeat * 1000
+        if simplejson is None:
+            print("{:<12}{:>16}{:>16.3f}{:>10}".format(endpoint, "n/a", new_ms, "n/a"))
+            continue
+        old_time = timeit.timeit(lambda: old_serialization(payload), number=args.repeat)
+        old_ms = old_time / args.repeat * 1000
+        print(
+            "{:<12}{:>16.3f}{:>16.3f}{:>9.1f}x".format(
+                endpoint, old_ms, new_ms, old_ms / new_ms
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
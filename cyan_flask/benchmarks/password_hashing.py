@@ -0,0 +1,78 @@
+"""
+Benchmarks password hashing settings.
+
+Reports logins/second per core (one password verify per login)
+for each scheme and cost, to help pick PASSWORD_HASH_SCHEME,
+PASSWORD_PBKDF2_ROUNDS and PASSWORD_BCRYPT_ROUNDS.
+
+Usage:
+    python cyan_flask/benchmarks/password_hashing.py [--seconds 3] [--processes 1]
+"""
+import os
+import sys
+import time
+import argparse
+from multiprocessing import Pool
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+sys.path.insert(
+    0, APP_DIR
+)  # imports the module directly, skipping the app package's init (db, secrets)
+
+from hashing import PasswordHasher
+
+
+SETTINGS = [
+    ("pbkdf2-sha512", 100000),  # legacy/current default
+    ("pbkdf2-sha512", 50000),
+    ("pbkdf2-sha512", 25000),
+    ("bcrypt", 12),
+    ("bcrypt", 11),
+    ("bcrypt", 10),
+]
+
+
+def run_logins(args):
+    """
+    Verifies a password repeatedly for a number of seconds,
+    returning the number of verifies completed.
+    """
+    scheme, rounds, seconds = args
+    hasher = PasswordHasher(scheme, rounds)
+    password_hash = hasher.hash("benchmark-password")
+    count = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        hasher.verify(password_hash, "benchmark-password")
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument(
+        "--processes", type=int, default=1, help="cores to run in parallel"
+    )
+    args = parser.parse_args()
+
+    print(
+        "{:<16}{:>8}{:>14}{:>18}".format(
+            "scheme", "rounds", "ms/login", "logins/s/core"
+        )
+    )
+    with Pool(args.processes) as pool:
+        for scheme, rounds in SETTINGS:
+            counts = pool.map(
+                run_logins, [(scheme, rounds, args.seconds)] * args.processes
+            )
+            per_core = sum(counts) / args.seconds / args.processes
+            print(
+                "{:<16}{:>8}{:>14.1f}{:>18.1f}".format(
+                    scheme, rounds, 1000 / per_core if per_core else 0, per_core
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
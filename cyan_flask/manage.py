@@ -179,6 +179,93 @@ def db_downgrade(migrations_path="migrations"):
     as_root(flask_migrate.downgrade, directory=migrations_path)
 
 
+@app.cli.command("job-result-usage")
+@click.argument("username")
+def job_result_usage(username):
+    """
+    Prints memory used in the redis result backend by each of a user's batch jobs.
+    Example: flask job-result-usage username
+    """
+    from celery_tasks import CeleryHandler
+
+    celery_handler = CeleryHandler()
+    for job in celery_handler.get_all_jobs(username):
+        print(
+            "Job {} ({}): {} bytes".format(
+                job.job_num,
+                job.job_id,
+                celery_handler.get_result_memory_usage(job.job_id),
+            )
+        )
+
+
+@app.cli.command("cyano-cache-stats")
+def cyano_cache_stats():
+    """
+    Prints hit/miss counters and number of entries of the cyano location data cache.
+    Example: flask cyano-cache-stats
+    """
+    from cache import CyanoCache
+
+    print(CyanoCache().get_stats())
+
+
+@app.cli.command("comment-thumbnails")
+def create_comment_thumbnails():
+    """
+    Creates missing thumbnails for saved comment images.
+    Example: flask comment-thumbnails
+    """
+    from models import CommentImages
+    from image_handler import ImageHandler
+    import utils
+
+    image_handler = ImageHandler()
+    for image in CommentImages.query.all():
+        thumbnail_path = utils._build_image_file_path(
+            utils.get_thumbnail_filename(image.comment_image)
+        )
+        if os.path.exists(thumbnail_path):
+            continue
+        result = image_handler.create_thumbnail(image.comment_image)
+        print("{}: {}".format(image.comment_image, result or "failed"))
+
+
+@app.cli.command("comment-images-gc")
+@click.option("--min-age", default=3600, help="Seconds before unreferenced files are removed.")
+def remove_unreferenced_comment_images(min_age):
+    """
+    Removes stored comment images (and thumbnails) no comment references,
+    and temp files left by interrupted image saves.
+    Example: flask comment-images-gc
+    """
+    from models import CommentImages
+    import utils
+
+    images_dir = os.path.dirname(utils._build_image_file_path("image"))
+    for dir_path, _, filenames in os.walk(images_dir):
+        for filename in filenames:
+            if filename.endswith(".tmp"):
+                file_path = os.path.join(dir_path, filename)
+                if time.time() - os.path.getmtime(file_path) >= min_age:
+                    os.remove(file_path)
+                    print("Removed {}".format(filename))
+                continue
+            if not utils.CONTENT_FILENAME.match(filename):
+                continue  # only content-addressed images are refcounted
+            image_filename = (
+                utils.get_original_filename(filename)
+                if utils.is_thumbnail_filename(filename)
+                else filename
+            )
+            file_path = os.path.join(dir_path, filename)
+            if time.time() - os.path.getmtime(file_path) < min_age:
+                continue  # may belong to a comment still being saved
+            if CommentImages.get_refcount(image_filename) == 0:
+                os.remove(file_path)
+                print("Removed {}".format(filename))
+
+
 @app.cli.command("user-create")
 @click.argument("user")
 @click.argument("host")
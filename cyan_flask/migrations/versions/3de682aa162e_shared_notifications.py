@@ -0,0 +1,97 @@
+"""shared_notifications
+
+Revision ID: 3de682aa162e
+Revises: a061d1f3c5c4
+Create Date: 2026-10-18 09:12:40.318262
+
+Stores each notification once instead of a copy per user. Per-user
+state moves to notification_state (cleared high-water mark) and
+notification_read (read notifications).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3de682aa162e"
+down_revision = "a061d1f3c5c4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "notification_state",
+        sa.Column("owner", sa.String(length=35), nullable=False),
+        sa.Column("cleared_date", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("owner"),
+    )
+    op.create_table(
+        "notification_shared",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("date", sa.DateTime(), nullable=False),
+        sa.Column("subject", sa.String(length=256), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # Users see notifications after their oldest existing one:
+    op.execute(
+        "INSERT INTO notification_state (owner, cleared_date) "
+        "SELECT owner, DATE_SUB(MIN(date), INTERVAL 1 SECOND) "
+        "FROM notifications GROUP BY owner"
+    )
+    op.execute(
+        "INSERT INTO notification_shared (id, date, subject, body) "
+        "SELECT id, MAX(date), MAX(subject), MAX(body) "
+        "FROM notifications GROUP BY id"
+    )
+    op.create_table(
+        "notification_read",
+        sa.Column("owner", sa.String(length=35), nullable=False),
+        sa.Column("notification_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("owner", "notification_id"),
+    )
+    op.execute(
+        "INSERT INTO notification_read (owner, notification_id) "
+        "SELECT owner, id FROM notifications WHERE is_new = 0"
+    )
+
+    op.drop_table("notifications")
+    op.rename_table("notification_shared", "notifications")
+    op.create_index(
+        op.f("ix_notifications_date"), "notifications", ["date"], unique=False
+    )
+    op.create_foreign_key(
+        "notification_read_ibfk_1",
+        "notification_read",
+        "notifications",
+        ["notification_id"],
+        ["id"],
+    )
+
+
+def downgrade():
+    op.create_table(
+        "notification_user",
+        sa.Column("owner", sa.String(length=35), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("date", sa.DateTime(), nullable=False),
+        sa.Column("subject", sa.String(length=256), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("is_new", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("owner", "id"),
+    )
+    op.execute(
+        "INSERT INTO notification_user (owner, id, date, subject, body, is_new) "
+        "SELECT s.owner, n.id, n.date, n.subject, n.body, r.owner IS NULL "
+        "FROM notification_state s "
+        "JOIN notifications n ON n.date > s.cleared_date "
+        "LEFT JOIN notification_read r "
+        "ON r.owner = s.owner AND r.notification_id = n.id"
+    )
+    op.drop_table("notification_read")
+    op.drop_table("notification_state")
+    op.drop_table("notifications")
+    op.rename_table("notification_user", "notifications")
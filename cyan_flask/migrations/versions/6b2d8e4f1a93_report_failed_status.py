@@ -0,0 +1,27 @@
+"""report_failed_status
+
+Revision ID: 6b2d8e4f1a93
+Revises: 4a8c1e5d7b93
+Create Date: 2026-10-18 14:05:12.481326
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6b2d8e4f1a93"
+down_revision = "4a8c1e5d7b93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reports marked "FAILED" on report status errors are failed reports:
+    op.execute(
+        "UPDATE report SET report_status = 'FAILURE' WHERE report_status = 'FAILED'"
+    )
+
+
+def downgrade():
+    pass  # "FAILED" and "FAILURE" rows can't be told apart
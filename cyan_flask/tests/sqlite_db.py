@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+import datetime
+import flask
+import sqlalchemy
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from cyan_flask.app import web_app_api
+
+
+class SqliteDBTestCase(unittest.TestCase):
+    """
+    Base class for tests that run queries against the models' tables
+    and indexes in an in-memory sqlite db, created for each test.
+    """
+
+    date = datetime.datetime(2021, 1, 2, 3, 4, 5)
+
+    def setUp(self):
+        """
+        Creates the models' tables in a new in-memory sqlite db.
+        """
+        self.db = web_app_api.db
+        self.app = flask.Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI="sqlite://",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        )
+        self.db.init_app(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.db.create_all()
+
+    def tearDown(self):
+        self.db.session.remove()
+        self.db.drop_all()
+        self.app_context.pop()
+
+    def add_users(self):
+        """
+        Adds users "test" (id 1) and "other" (id 2).
+        """
+        for user_id, username in [(1, "test"), (2, "other")]:
+            self.db.session.add(
+                web_app_api.User(
+                    id=user_id,
+                    username=username,
+                    email="{}@test.com".format(username),
+                    password="password",
+                    created=self.date,
+                    last_visit=self.date,
+                )
+            )
+
+    def record_statements(self):
+        """
+        Returns a list that collects the SQL statements run from now on.
+        """
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sqlalchemy.event.listen(
+            self.db.engine, "before_cursor_execute", before_cursor_execute
+        )
+        self.addCleanup(
+            sqlalchemy.event.remove,
+            self.db.engine,
+            "before_cursor_execute",
+            before_cursor_execute,
+        )
+        return statements
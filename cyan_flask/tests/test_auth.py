@@ -16,6 +16,7 @@ sys.path.insert(
 # Local imports:
 from config.set_environment import DeployEnv
 from cyan_flask.app.auth import PasswordHandler, JwtHandler
+from cyan_flask.app import hashing
 from cyan_flask.crypt import CryptManager
 
 # Sets up runtime environment:
@@ -165,17 +166,18 @@ class TestAuth(unittest.TestCase):
 
         self.assertEqual(actual_result, expected_result)
 
-    @patch("cyan_flask.app.auth.hashlib.sha256")
+    @patch("cyan_flask.app.auth.password_hasher", hashing.PasswordHasher("pbkdf2-sha512", 100000))
+    @patch("cyan_flask.app.hashing.hashlib.sha256")
     def test_hash_password(self, salt_mock):
         """
         hash_password
         """
         test_pass = "testpass"
-        test_salt = b"57f2503ff578a334cc7de42a6270ee7a762a543c49ff286f1807ef791171daac"
+        test_salt = "57f2503ff578a334cc7de42a6270ee7a762a543c49ff286f1807ef791171daac"
 
-        salt_mock.return_value.hexdigest.return_value.encode.return_value = test_salt
+        salt_mock.return_value.hexdigest.return_value = test_salt
 
-        expected_result = "57f2503ff578a334cc7de42a6270ee7a762a543c49ff286f1807ef791171daac697900f85f1cfa8102863a3125cbe3fa437827732e2f3d4e1e8f5459af10bd8c30cef0c10c714863994eac2790e21e87971fac85fddbb3311c528ce4fa67c9b3"
+        expected_result = "$pbkdf2-sha512$100000$57f2503ff578a334cc7de42a6270ee7a762a543c49ff286f1807ef791171daac$697900f85f1cfa8102863a3125cbe3fa437827732e2f3d4e1e8f5459af10bd8c30cef0c10c714863994eac2790e21e87971fac85fddbb3311c528ce4fa67c9b3"
         actual_result = PasswordHandler().hash_password(test_pass)
 
         self.assertEqual(actual_result, expected_result)
@@ -0,0 +1,321 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import datetime
+import json
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app import cache
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+
+class TestCache(unittest.TestCase):
+    """
+    Unit test class for cache.py module, which has the
+    redis caches shared by the app and celery workers.
+    """
+
+    print(
+        "cyan_flask cache.py unittests conducted at " + str(datetime.datetime.today())
+    )
+
+    def setUp(self):
+        """
+        Setup routine called before each unit tests.
+        :return:
+        """
+        self.redis_mock = MagicMock()
+        self.cyano_cache = cache.CyanoCache(client=self.redis_mock)
+        self.cyano_cache.enabled = True
+        self.cyano_cache.ingest_hour = 12
+        self.cyano_cache.weekly_ingest_day = 1  # Tuesday
+
+    def tearDown(self):
+        """
+        teardown called after each test
+        :return:
+        """
+        pass
+
+    def test_get_data_period_1(self):
+        """
+        get_data_period daily period starts at the last ingest hour.
+        """
+        now = datetime.datetime(2021, 6, 9, 8, 30)  # Wednesday, before ingest hour
+        expected_result = (
+            datetime.datetime(2021, 6, 8, 12),
+            datetime.datetime(2021, 6, 9, 12),
+        )
+        actual_result = self.cyano_cache.get_data_period("daily", now)
+
+        self.assertEqual(actual_result, expected_result)
+
+    def test_get_data_period_2(self):
+        """
+        get_data_period weekly period starts on the last ingest weekday.
+        """
+        now = datetime.datetime(2021, 6, 8, 8, 30)  # Tuesday, before ingest hour
+        expected_result = (
+            datetime.datetime(2021, 6, 1, 12),
+            datetime.datetime(2021, 6, 8, 12),
+        )
+        actual_result = self.cyano_cache.get_data_period("weekly", now)
+
+        self.assertEqual(actual_result, expected_result)
+
+    def test_build_key(self):
+        """
+        build_key snaps nearby coordinates to the same key.
+        """
+        now = datetime.datetime(2021, 6, 9, 13)
+        location_1 = {"latitude": 40.123449, "longitude": -80.5, "type": "weekly"}
+        location_2 = {"latitude": "40.12342", "longitude": "-80.50001", "type": "weekly"}
+        location_3 = {"latitude": 40.1237, "longitude": -80.5, "type": "weekly"}
+
+        key = self.cyano_cache.build_key(location_1, now)
+
+        self.assertEqual(key, "cyano_cache:weekly:2021060812:401234:-805000")
+        self.assertEqual(self.cyano_cache.build_key(location_2, now), key)
+        self.assertNotEqual(self.cyano_cache.build_key(location_3, now), key)
+
+    def test_get_1(self):
+        """
+        get returns cached response and counts a hit.
+        """
+        location = {"latitude": 40.0, "longitude": -80.0, "type": "daily"}
+        self.redis_mock.get.return_value = json.dumps({"outputs": []})
+        pipeline_mock = self.redis_mock.pipeline.return_value
+
+        actual_result = self.cyano_cache.get(location)
+
+        self.assertEqual(actual_result, {"outputs": []})
+        pipeline_mock.incr.assert_called_once_with(self.cyano_cache.hits_key)
+
+    def test_get_2(self):
+        """
+        get returns None when redis is unavailable.
+        """
+        location = {"latitude": 40.0, "longitude": -80.0, "type": "daily"}
+        self.redis_mock.get.side_effect = cache.redis.exceptions.ConnectionError()
+
+        self.assertIsNone(self.cyano_cache.get(location))
+
+    def test_set(self):
+        """
+        set evicts least recently used entries over max_entries.
+        """
+        location = {"latitude": 40.0, "longitude": -80.0, "type": "daily"}
+        self.cyano_cache.max_entries = 2
+        pipeline_mock = self.redis_mock.pipeline.return_value
+        pipeline_mock.execute.return_value = [True, 1, 1, 3]
+        self.redis_mock.zpopmin.return_value = [("cyano_cache:old", 1.0)]
+
+        self.cyano_cache.set(location, {"outputs": []})
+
+        ttl = pipeline_mock.set.call_args.kwargs["ex"]
+        self.assertTrue(0 < ttl <= 86400)
+        key = pipeline_mock.set.call_args[0][0]
+        expiry = pipeline_mock.zadd.call_args_list[1][0][1][key]
+        lru_time = pipeline_mock.zadd.call_args_list[0][0][1][key]
+        self.assertAlmostEqual(expiry - lru_time, ttl)  # indexed by expiry time
+        script_mock = self.redis_mock.register_script.return_value
+        script_mock.assert_called_once_with(
+            keys=[self.cyano_cache.lru_key, self.cyano_cache.expiry_key],
+            args=[lru_time],
+            client=pipeline_mock,
+        )  # expired entries dropped before counting
+        self.redis_mock.zpopmin.assert_called_once_with(self.cyano_cache.lru_key, 1)
+        self.redis_mock.zrem.assert_called_once_with(
+            self.cyano_cache.expiry_key, "cyano_cache:old"
+        )
+        self.redis_mock.delete.assert_called_once_with("cyano_cache:old")
+
+    def test_job_progress_get(self):
+        """
+        JobProgress.get sums chunk counters and computes throughput
+        and eta from the progress hash.
+        """
+        job_progress = cache.JobProgress(client=self.redis_mock)
+        self.redis_mock.hgetall.return_value = {
+            b"total": b"1000",
+            b"done": b"0",
+            b"failed": b"0",
+            b"done:0": b"100",
+            b"done:1": b"80",
+            b"failed:1": b"20",
+            b"started": b"100.0",
+            b"updated": b"140.0",
+        }
+
+        actual_result = job_progress.get("job-id", now=150.0)
+
+        self.redis_mock.hgetall.assert_called_once_with("job_progress:job-id")
+        self.assertEqual(
+            actual_result,
+            {"total": 1000, "done": 180, "failed": 20, "throughput": 4.0, "eta": 200},
+        )
+        self.redis_mock.hgetall.return_value = {}
+        self.assertIsNone(job_progress.get("job-id"))
+
+    def test_progress_reporter(self):
+        """
+        ProgressReporter sends buffered counts at most once per interval.
+        """
+        job_progress = cache.JobProgress(client=self.redis_mock)
+        job_progress.update_interval = 60
+        pipeline_mock = self.redis_mock.pipeline.return_value
+        reporter = job_progress.reporter("job-id")
+
+        for _ in range(10):
+            reporter.add(done=1)
+        reporter.add(failed=1)
+        pipeline_mock.hincrby.assert_not_called()  # within update interval
+
+        reporter.flush()
+        pipeline_mock.hincrby.assert_any_call("job_progress:job-id", "done", 10)
+        pipeline_mock.hincrby.assert_any_call("job_progress:job-id", "failed", 1)
+
+        job_progress.update_interval = 0
+        reporter.add(done=1)
+        pipeline_mock.hincrby.assert_any_call("job_progress:job-id", "done", 1)
+        self.assertEqual(pipeline_mock.execute.call_count, 2)
+
+        on_flush_mock = MagicMock()
+        chunk_reporter = job_progress.reporter("job-id", 3, on_flush_mock)
+        chunk_reporter.add(done=1)
+        pipeline_mock.hincrby.assert_any_call("job_progress:job-id", "done:3", 1)
+        on_flush_mock.assert_called_once()  # e.g., publishes progress
+
+    def test_job_progress_seed(self):
+        """
+        JobProgress.seed resets a chunk's counters to its saved locations.
+        """
+        job_progress = cache.JobProgress(client=self.redis_mock)
+        pipeline_mock = self.redis_mock.pipeline.return_value
+        job_progress.seed("job-id", 2, 12)
+        mapping = pipeline_mock.hset.call_args.kwargs["mapping"]
+        self.assertEqual((mapping["done:2"], mapping["failed:2"]), (12, 0))
+        pipeline_mock.hset.assert_called_once()
+        self.assertEqual(pipeline_mock.hset.call_args[0][0], "job_progress:job-id")
+
+    def test_chunk_leases(self):
+        """
+        ChunkLeases lets one owner hold a chunk, renewing and
+        releasing only its own lease.
+        """
+        chunk_leases = cache.ChunkLeases(client=self.redis_mock)
+        self.redis_mock.set.return_value = True
+        self.assertTrue(chunk_leases.acquire("job-id", 1, "owner"))
+        self.redis_mock.set.assert_called_once_with(
+            "job_chunk_lease:job-id:1", "owner", nx=True, ex=chunk_leases.ttl
+        )
+        self.redis_mock.set.return_value = None
+        self.assertFalse(chunk_leases.acquire("job-id", 1, "other"))
+
+        self.redis_mock.eval.return_value = 0
+        self.assertFalse(chunk_leases.renew("job-id", 1, "other"))
+        self.redis_mock.eval.return_value = 1
+        self.assertTrue(chunk_leases.renew("job-id", 1, "owner"))
+        chunk_leases.release("job-id", 1, "owner")
+        self.assertEqual(
+            self.redis_mock.eval.call_args[0][1:],
+            (1, "job_chunk_lease:job-id:1", "owner", chunk_leases.ttl),
+        )
+
+        self.redis_mock.set.side_effect = cache.redis.exceptions.ConnectionError()
+        self.assertTrue(chunk_leases.acquire("job-id", 1, "owner"))  # runs unfenced
+
+    def test_status_events(self):
+        """
+        StatusEvents publishes to a user's channel and yields its events,
+        or None as heartbeat, then unsubscribes.
+        """
+        status_events = cache.StatusEvents(client=self.redis_mock)
+        status_events.publish(1, "job", {"job_id": "job-id"})
+        self.redis_mock.publish.assert_called_once_with(
+            "status_events:1", json.dumps({"event": "job", "data": {"job_id": "job-id"}})
+        )
+
+        pubsub_mock = self.redis_mock.pubsub.return_value
+        pubsub_mock.get_message.side_effect = [
+            {"data": self.redis_mock.publish.call_args[0][1]},
+            None,
+        ]
+        pubsub = status_events.subscribe(1)
+        pubsub_mock.subscribe.assert_called_once_with("status_events:1")
+
+        events = status_events.get_events(pubsub, duration=60, heartbeat=15)
+        self.assertEqual(next(events), ("job", {"job_id": "job-id"}))
+        self.assertIsNone(next(events))
+        self.assertEqual(list(status_events.get_events(pubsub, duration=0, heartbeat=15)), [])
+
+        pubsub_mock.subscribe.side_effect = cache.redis.exceptions.ConnectionError()
+        with self.assertRaises(cache.redis.exceptions.ConnectionError):
+            status_events.subscribe(1)
+        pubsub_mock.close.assert_called_once()  # closed if subscribe fails
+
+    def test_stream_tickets(self):
+        """
+        StreamTickets creates a user's ticket that can be redeemed once.
+        """
+        stream_tickets = cache.StreamTickets(client=self.redis_mock)
+        ticket = stream_tickets.create("test", 1000)
+        key, value = self.redis_mock.set.call_args[0]
+        self.assertEqual(key, "stream_ticket:{}".format(ticket))
+        self.assertEqual(json.loads(value), {"username": "test", "exp": 1000})
+        self.assertEqual(self.redis_mock.set.call_args[1], {"ex": stream_tickets.ttl})
+
+        pipeline_mock = self.redis_mock.pipeline.return_value
+        pipeline_mock.execute.return_value = [value, 1]
+        self.assertEqual(stream_tickets.redeem(ticket), {"username": "test", "exp": 1000})
+        pipeline_mock.delete.assert_called_once_with(key)
+        pipeline_mock.execute.return_value = [None, 0]
+        self.assertIsNone(stream_tickets.redeem(ticket))  # already used
+
+        self.redis_mock.set.side_effect = cache.redis.exceptions.ConnectionError()
+        self.assertIsNone(stream_tickets.create("test", 1000))
+
+    def test_shared_rate_limiter(self):
+        """
+        SharedRateLimiter reserves request slots in redis, spacing
+        requests locally when redis is unavailable.
+        """
+        rate_limiter = cache.SharedRateLimiter("job-id", 10, client=self.redis_mock)
+        script_mock = self.redis_mock.register_script.return_value
+        script_mock.return_value = b"0.25"
+
+        self.assertEqual(rate_limiter.reserve(), 0.25)
+        script_mock.assert_called_once_with(keys=["rate_limit:job-id"], args=[0.1, 3600])
+
+        script_mock.side_effect = cache.redis.exceptions.ConnectionError()
+        delays = [rate_limiter.reserve() for _ in range(3)]
+        self.assertAlmostEqual(delays[2] - delays[0], 0.2, places=2)
+
+    def test_job_checkpoints(self):
+        """
+        JobCheckpoints saves and parses a chunk's checkpoint.
+        """
+        job_checkpoints = cache.JobCheckpoints(client=self.redis_mock)
+        pipeline_mock = self.redis_mock.pipeline.return_value
+
+        job_checkpoints.save("job-id", 2, 10, 4096, 25)
+        pipeline_mock.hset.assert_called_once_with("job_checkpoint:job-id", 2, "10:4096:25")
+
+        self.redis_mock.hget.return_value = b"10:4096:25"
+        self.assertEqual(
+            job_checkpoints.get("job-id", 2), {"locations": 10, "offset": 4096, "rows": 25}
+        )
+        self.redis_mock.hget.assert_called_once_with("job_checkpoint:job-id", 2)
+        self.redis_mock.hget.return_value = None
+        self.assertIsNone(job_checkpoints.get("job-id", 3))
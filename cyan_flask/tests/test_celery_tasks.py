@@ -0,0 +1,335 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import datetime
+import time
+from sqlalchemy.dialects import mysql
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app import celery_tasks
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+
+class TestCeleryTasks(unittest.TestCase):
+    """
+    Unit test class for celery_tasks.py module, which runs
+    the batch jobs on the celery worker.
+    """
+
+    print(
+        "cyan_flask celery_tasks.py unittests conducted at "
+        + str(datetime.datetime.today())
+    )
+
+    def setUp(self):
+        """
+        Setup routine called before each unit tests.
+        :return:
+        """
+        self.celery_handler = celery_tasks.CeleryHandler()
+        self.celery_handler.max_concurrent_requests = 4
+        self.celery_handler.requests_per_second = 0  # no rate limit
+        self.locations = [
+            {"latitude": i, "longitude": -i, "type": "weekly"} for i in range(20)
+        ]
+
+    def tearDown(self):
+        """
+        teardown called after each test
+        :return:
+        """
+        pass
+
+    @patch("cyan_flask.app.celery_tasks.CeleryHandler.make_cyano_request")
+    def test_fetch_locations_1(self, make_cyano_request_mock):
+        """
+        fetch_locations keeps input order when responses finish out of order.
+        """
+
+        def delayed_response(location):
+            time.sleep(0.01 * (location["latitude"] % 3))
+            return {"metaInfo": {}, "outputs": [], "id": location["latitude"]}
+
+        make_cyano_request_mock.side_effect = delayed_response
+
+        actual_result = list(self.celery_handler.fetch_locations(self.locations))
+
+        self.assertEqual([r["id"] for r in actual_result], list(range(20)))
+        self.assertEqual(actual_result[5]["input_latitude"], 5)
+        self.assertEqual(actual_result[5]["input_longitude"], -5)
+
+    @patch("cyan_flask.app.celery_tasks.CeleryHandler.make_cyano_request")
+    def test_fetch_locations_2(self, make_cyano_request_mock):
+        """
+        fetch_locations raises the first failed request.
+        """
+        make_cyano_request_mock.side_effect = celery_tasks.requests.exceptions.Timeout()
+
+        with self.assertRaises(celery_tasks.requests.exceptions.Timeout):
+            list(self.celery_handler.fetch_locations(self.locations))
+
+    def test_split_locations(self):
+        """
+        split_locations chunks locations, or not at all if disabled.
+        """
+        self.celery_handler.chunk_size = 8
+        chunks = self.celery_handler.split_locations(self.locations)
+        self.assertEqual([len(chunk) for chunk in chunks], [8, 8, 4])
+        self.assertEqual(sum(chunks, []), self.locations)
+
+        self.celery_handler.chunk_size = 0
+        self.assertEqual(
+            self.celery_handler.split_locations(self.locations), [self.locations]
+        )
+        self.assertEqual(self.celery_handler.split_locations([]), [[]])
+
+    @patch("cyan_flask.app.celery_tasks.CeleryHandler.store_job_result")
+    @patch("cyan_flask.app.celery_tasks.csv_handler")
+    @patch("cyan_flask.app.celery_tasks.CeleryHandler.complete_job")
+    @patch("cyan_flask.app.celery_tasks.CeleryHandler.handle_failed_job")
+    @patch("cyan_flask.app.celery_tasks.CeleryHandler.get_job_from_db")
+    def test_merge_batch_job(
+        self,
+        get_job_from_db_mock,
+        handle_failed_job_mock,
+        complete_job_mock,
+        csv_handler_mock,
+        store_job_result_mock,
+    ):
+        """
+        merge_batch_job fails the job on any chunk error, else completes it.
+        """
+        request_obj = {"username": "test", "job_id": "job-id", "filename": "a.csv"}
+        user_job = get_job_from_db_mock.return_value
+        user_job.job_status = "STARTED"
+        chunk_summaries = [
+            {"chunk": 0, "row_count": 2},
+            {"chunk": 1, "row_count": 3},
+        ]
+
+        celery_tasks.merge_batch_job(
+            chunk_summaries + [{"chunk": 2, "error": "timeout"}], request_obj
+        )
+        handle_failed_job_mock.assert_called_once_with(user_job)
+        complete_job_mock.assert_not_called()
+
+        celery_tasks.merge_batch_job(chunk_summaries, request_obj)
+        csv_handler_mock.merge_csv_chunks.assert_called_once_with(
+            "job-id", "a.csv", chunk_summaries
+        )
+        complete_job_mock.assert_called_once_with(
+            user_job, request_obj, csv_handler_mock.merge_csv_chunks.return_value
+        )
+        self.assertEqual(csv_handler_mock.remove_csv_chunks.call_count, 2)
+        store_job_result_mock.assert_called_once_with(
+            "job-id", complete_job_mock.return_value
+        )  # job's result describes its output
+
+    @patch("cyan_flask.app.celery_tasks.chunk_leases")
+    @patch("cyan_flask.app.celery_tasks.job_progress")
+    @patch("cyan_flask.app.celery_tasks.job_checkpoints")
+    @patch("cyan_flask.app.celery_tasks.csv_handler")
+    @patch("cyan_flask.app.celery_tasks.CeleryHandler.fetch_locations")
+    def test_run_chunk(
+        self,
+        fetch_locations_mock,
+        csv_handler_mock,
+        job_checkpoints_mock,
+        job_progress_mock,
+        chunk_leases_mock,
+    ):
+        """
+        run_chunk resumes after checkpointed locations, skips saved
+        chunks, and fails chunks that keep losing their worker.
+        """
+        request_obj = {"job_id": "job-id", "locations": self.locations}
+        checkpoint = {"locations": 12, "offset": 4096, "rows": 30}
+        csv_handler_mock.get_chunk_summary.return_value = None
+        csv_handler_mock.check_chunk_checkpoint.return_value = checkpoint
+        csv_handler_mock.save_csv_chunk.return_value = {"row_count": 50}
+        job_checkpoints_mock.add_attempt.return_value = 2
+        chunk_leases_mock.acquire.return_value = True
+        chunk_leases_mock.ttl = 120
+
+        actual_result = self.celery_handler.run_chunk(request_obj, 1)
+
+        self.assertEqual(actual_result, {"chunk": 1, "row_count": 50})
+        locations, progress, rate_limiter = fetch_locations_mock.call_args[0]
+        self.assertEqual(locations, self.locations[12:])
+        job_progress_mock.seed.assert_called_once_with(
+            "job-id", 1, 12
+        )  # checkpointed locations aren't counted again
+        job_progress_mock.reporter.assert_called_once_with("job-id", 1, None)
+        self.assertEqual(progress, job_progress_mock.reporter.return_value)
+        self.assertEqual(rate_limiter.key, "rate_limit:job-id")  # shared by job's chunks
+        self.assertEqual(csv_handler_mock.save_csv_chunk.call_args[0][3], checkpoint)
+        csv_handler_mock.save_csv_chunk.call_args[0][4](20, 8192, 45)
+        job_checkpoints_mock.save.assert_called_once_with("job-id", 1, 20, 8192, 45)
+        owner = chunk_leases_mock.acquire.call_args[0][2]
+        chunk_leases_mock.release.assert_called_once_with("job-id", 1, owner)
+
+        job_checkpoints_mock.add_attempt.return_value = self.celery_handler.max_attempts + 1
+        self.assertIn("error", self.celery_handler.run_chunk(request_obj, 1))
+
+        csv_handler_mock.get_chunk_summary.return_value = {"chunk": 1, "row_count": 50}
+        self.assertEqual(
+            self.celery_handler.run_chunk(request_obj, 1), {"chunk": 1, "row_count": 50}
+        )
+        self.assertEqual(csv_handler_mock.save_csv_chunk.call_count, 1)
+
+    @patch("cyan_flask.app.celery_tasks.time.sleep")
+    @patch("cyan_flask.app.celery_tasks.chunk_leases")
+    @patch("cyan_flask.app.celery_tasks.job_progress")
+    @patch("cyan_flask.app.celery_tasks.job_checkpoints")
+    @patch("cyan_flask.app.celery_tasks.csv_handler")
+    @patch("cyan_flask.app.celery_tasks.CeleryHandler.fetch_locations")
+    def test_run_chunk_leased(
+        self,
+        fetch_locations_mock,
+        csv_handler_mock,
+        job_checkpoints_mock,
+        job_progress_mock,
+        chunk_leases_mock,
+        sleep_mock,
+    ):
+        """
+        A redelivered chunk waits while its first run holds the lease,
+        then returns that run's saved chunk without writing it again.
+        A run that loses its lease stops writing and waits too.
+        """
+        request_obj = {"job_id": "job-id", "locations": self.locations}
+        chunk_leases_mock.acquire.side_effect = [False, False, True]
+        csv_handler_mock.get_chunk_summary.return_value = {"chunk": 1, "row_count": 50}
+
+        actual_result = self.celery_handler.run_chunk(request_obj, 1)
+
+        self.assertEqual(actual_result, {"chunk": 1, "row_count": 50})
+        self.assertEqual(sleep_mock.call_count, 2)
+        csv_handler_mock.save_csv_chunk.assert_not_called()
+
+        def save_csv_chunk(job_id, chunk_index, locations_data, checkpoint, save_checkpoint):
+            save_checkpoint(1, 100, 2)  # lease renewal fails
+            return {"chunk": 1, "row_count": 2}
+
+        chunk_leases_mock.acquire.side_effect = [True, True]
+        chunk_leases_mock.ttl = 0
+        chunk_leases_mock.renew.return_value = False
+        csv_handler_mock.get_chunk_summary.side_effect = [None, {"chunk": 1, "row_count": 50}]
+        csv_handler_mock.check_chunk_checkpoint.return_value = None
+        csv_handler_mock.save_csv_chunk.side_effect = save_csv_chunk
+        job_checkpoints_mock.add_attempt.return_value = 1
+
+        actual_result = self.celery_handler.run_chunk(request_obj, 1)
+
+        self.assertEqual(actual_result, {"chunk": 1, "row_count": 50})
+        job_checkpoints_mock.save.assert_not_called()
+        self.assertEqual(chunk_leases_mock.release.call_count, 3)
+
+    @patch("cyan_flask.app.celery_tasks.status_events")
+    @patch("cyan_flask.app.celery_tasks.job_progress")
+    def test_create_progress_publisher(self, job_progress_mock, status_events_mock):
+        """
+        create_progress_publisher's callback publishes the running job's
+        status with its latest progress.
+        """
+        user_job = celery_tasks.Job(
+            user_id=1, job_num=1, job_id="job-id", job_status="STARTED"
+        )
+        job_progress_mock.get.side_effect = [None, {"total": 10, "done": 4}]
+
+        publish_progress = self.celery_handler.create_progress_publisher(user_job)
+        publish_progress()
+
+        user_id, event, job_status = status_events_mock.publish.call_args[0]
+        self.assertEqual((user_id, event), (1, "job"))
+        self.assertEqual(job_status["job_id"], "job-id")
+        self.assertEqual(job_status["progress"], {"total": 10, "done": 4})
+
+    def test_rate_limiter(self):
+        """
+        RateLimiter spaces out request starts.
+        """
+        rate_limiter = celery_tasks.RateLimiter(100)
+        start = time.monotonic()
+        for _ in range(5):
+            rate_limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04 - 0.005)
+
+    def test_create_result_metadata(self):
+        """
+        create_result_metadata keeps only the job summary.
+        """
+        user_job = celery_tasks.Job(job_id="abc", job_status="SUCCESS", exec_time=12)
+        csv_summary = {
+            "output_file": "test_results.csv",
+            "file_path": "/cyan_flask/user_jobs/test_results.csv",
+            "row_count": 10,
+            "byte_size": 1024,
+        }
+
+        expected_result = {
+            "job_id": "abc",
+            "job_status": "SUCCESS",
+            "row_count": 10,
+            "byte_size": 1024,
+            "exec_time": 12,
+        }
+        actual_result = self.celery_handler.create_result_metadata(
+            user_job, csv_summary
+        )
+
+        self.assertEqual(actual_result, expected_result)
+
+    @patch("cyan_flask.app.celery_tasks.save_notifications")
+    @patch("cyan_flask.app.celery_tasks.utils.make_notifications_request")
+    def test_refresh_notifications(
+        self, make_notifications_request_mock, save_notifications_mock
+    ):
+        """
+        refresh_notifications saves the notifications feed.
+        """
+        notifications = [{"id": 1, "dateSent": 1446772133000}]
+        make_notifications_request_mock.return_value = notifications
+
+        celery_tasks.refresh_notifications()
+
+        save_notifications_mock.assert_called_once_with(notifications)
+
+    @patch("cyan_flask.app.celery_tasks.db")
+    def test_save_notifications(self, db_mock):
+        """
+        save_notifications upserts the feed in one statement.
+        """
+        notifications = [
+            {
+                "id": 1,
+                "subject": "Hello hello...",
+                "message": "Can anyone hear me?",
+                "dateSent": 1446772133000,
+            },
+            {
+                "id": 2,
+                "subject": "Subject",
+                "message": "Message",
+                "dateSent": 1446772134000,
+            },
+        ]
+
+        celery_tasks.save_notifications(notifications)
+
+        db_mock.session.execute.assert_called_once()
+        statement = db_mock.session.execute.call_args.args[0]
+        compiled = str(statement.compile(dialect=mysql.dialect()))
+        self.assertIn("ON DUPLICATE KEY UPDATE", compiled)
+        db_mock.session.commit.assert_called_once()
@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import csv
+import datetime
+import tempfile
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app.csv_handler import CSVHandler
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+
+class TestCSVHandler(unittest.TestCase):
+    """
+    Unit test class for csv_handler.py module, which creates
+    the batch job results files.
+    """
+
+    print(
+        "cyan_flask csv_handler.py unittests conducted at "
+        + str(datetime.datetime.today())
+    )
+
+    def setUp(self):
+        """
+        Setup routine called before each unit tests.
+        :return:
+        """
+        self.csv_handler = CSVHandler()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        teardown called after each test
+        :return:
+        """
+        self.temp_dir.cleanup()
+
+    def create_location_response(self, num_outputs):
+        output = {
+            "imageDate": "2021-01-01",
+            "satelliteImageType": "OLCI",
+            "satelliteImageFrequency": "weekly",
+            "cellConcentration": 1000,
+            "maxCellConcentration": 2000,
+            "latitude": 40.0,
+            "longitude": -80.0,
+            "validCellsCount": 9,
+        }
+        return {
+            "input_latitude": 40.0,
+            "input_longitude": -80.0,
+            "metaInfo": {
+                "locationName": "test",
+                "requestTimestamp": "2021-01-02",
+                "queryDate": "2021-01-02",
+            },
+            "outputs": [dict(output) for _ in range(num_outputs)],
+        }
+
+    def test_merge_csv_chunks(self):
+        """
+        merge_csv_chunks joins chunks in order under one header.
+        """
+        with patch.object(
+            self.csv_handler,
+            "build_csv_file_path",
+            side_effect=lambda f: os.path.join(self.temp_dir.name, f),
+        ):
+            chunk_summaries = [
+                self.csv_handler.save_csv_chunk(
+                    "job-id", chunk_index, [self.create_location_response(num_outputs)]
+                )
+                for chunk_index, num_outputs in [(1, 3), (0, 1)]  # out of order
+            ]
+            actual_result = self.csv_handler.merge_csv_chunks(
+                "job-id", "test.csv", chunk_summaries
+            )
+            self.csv_handler.remove_csv_chunks("job-id")
+            chunks_dir = self.csv_handler.build_chunks_dir("job-id")
+
+        with open(actual_result["file_path"], newline="") as csv_file:
+            rows = list(csv.reader(csv_file))
+
+        self.assertEqual(chunk_summaries[0], {"chunk": 1, "row_count": 3})
+        self.assertEqual(actual_result["row_count"], 1 + 1 + 3)
+        self.assertEqual(len(rows), actual_result["row_count"])
+        self.assertEqual(rows[0], self.csv_handler.csv_headers)
+        self.assertEqual(len(rows), 5)
+        self.assertFalse(os.path.exists(chunks_dir))
+
+    def test_save_csv_chunk_resume(self):
+        """
+        save_csv_chunk resumes an interrupted chunk from its checkpoint.
+        """
+        locations = [self.create_location_response(i % 3) for i in range(6)]
+        checkpoints = []
+
+        def interrupted_locations():
+            for location in locations[0:4]:
+                yield location
+            raise RuntimeError("worker lost")
+
+        with patch.object(
+            self.csv_handler,
+            "build_csv_file_path",
+            side_effect=lambda f: os.path.join(self.temp_dir.name, f),
+        ):
+            with self.assertRaises(RuntimeError):
+                self.csv_handler.save_csv_chunk(
+                    "job-id", 0, interrupted_locations(), None, lambda *c: checkpoints.append(c)
+                )
+            with open(self.csv_handler.build_spool_path("job-id", 0), "a") as spool_file:
+                spool_file.write("partial,row")  # written after the last checkpoint
+
+            locations_done, offset, row_count = checkpoints[-2]  # older checkpoint
+            checkpoint = self.csv_handler.check_chunk_checkpoint(
+                "job-id",
+                0,
+                {"locations": locations_done, "offset": offset, "rows": row_count},
+            )
+            self.assertIsNone(self.csv_handler.get_chunk_summary("job-id", 0))
+            actual_result = self.csv_handler.save_csv_chunk(
+                "job-id", 0, locations[locations_done:], checkpoint
+            )
+            self.assertEqual(
+                self.csv_handler.get_chunk_summary("job-id", 0), actual_result
+            )
+            self.assertIsNone(
+                self.csv_handler.check_chunk_checkpoint("job-id", 0, checkpoint)
+            )  # spool file moved into place
+            with open(self.csv_handler.build_chunk_path("job-id", 0), newline="") as f:
+                resumed_rows = list(csv.reader(f))
+            self.csv_handler.save_csv_chunk("job-id", 1, locations)
+            with open(self.csv_handler.build_chunk_path("job-id", 1), newline="") as f:
+                expected_rows = list(csv.reader(f))
+
+        self.assertEqual(len(checkpoints), 4)
+        self.assertEqual(actual_result, {"chunk": 0, "row_count": len(expected_rows)})
+        self.assertEqual(resumed_rows, expected_rows)
+
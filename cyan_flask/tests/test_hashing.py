@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import datetime
+import threading
+import time
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app import hashing
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+
+class TestHashing(unittest.TestCase):
+    """
+    Unit test class for hashing.py module, which hashes
+    and verifies user passwords.
+    """
+
+    print(
+        "cyan_flask hashing.py unittests conducted at " + str(datetime.datetime.today())
+    )
+
+    def setUp(self):
+        """
+        Setup routine called before each unit tests.
+        :return:
+        """
+        self.legacy_hash = "57f2503ff578a334cc7de42a6270ee7a762a543c49ff286f1807ef791171daac697900f85f1cfa8102863a3125cbe3fa437827732e2f3d4e1e8f5459af10bd8c30cef0c10c714863994eac2790e21e87971fac85fddbb3311c528ce4fa67c9b3"
+
+    def tearDown(self):
+        """
+        teardown called after each test
+        :return:
+        """
+        pass
+
+    def test_verify_legacy(self):
+        """
+        verify accepts hashes in the original salt+hash format.
+        """
+        hasher = hashing.PasswordHasher("pbkdf2-sha512", 100000)
+
+        self.assertTrue(hasher.verify(self.legacy_hash, "testpass"))
+        self.assertFalse(hasher.verify(self.legacy_hash, "wrongpass"))
+
+    def test_hash_pbkdf2(self):
+        """
+        hash/verify round trip for pbkdf2-sha512.
+        """
+        hasher = hashing.PasswordHasher("pbkdf2-sha512", 1000)
+
+        password_hash = hasher.hash("testpass")
+
+        self.assertTrue(password_hash.startswith("$pbkdf2-sha512$1000$"))
+        self.assertTrue(hasher.verify(password_hash, "testpass"))
+        self.assertFalse(hasher.verify(password_hash, "wrongpass"))
+
+    def test_hash_bcrypt(self):
+        """
+        hash/verify round trip for bcrypt.
+        """
+        hasher = hashing.PasswordHasher("bcrypt", 4)
+
+        password_hash = hasher.hash("testpass")
+
+        self.assertTrue(password_hash.startswith("$2b$04$"))
+        self.assertTrue(hasher.verify(password_hash, "testpass"))
+        self.assertFalse(hasher.verify(password_hash, "wrongpass"))
+
+    def test_needs_rehash(self):
+        """
+        needs_rehash flags hashes with another scheme or cost.
+        """
+        hasher = hashing.PasswordHasher("bcrypt", 4)
+
+        self.assertTrue(hasher.needs_rehash(self.legacy_hash))
+        self.assertTrue(hasher.needs_rehash(hashing.PasswordHasher("bcrypt", 5).hash("a")))
+        self.assertFalse(hasher.needs_rehash(hasher.hash("a")))
+        self.assertFalse(
+            hashing.PasswordHasher("pbkdf2-sha512", 100000).needs_rehash(
+                self.legacy_hash
+            )
+        )
+
+    def test_verify_unknown_format(self):
+        """
+        verify rejects unrecognized hashes.
+        """
+        hasher = hashing.PasswordHasher("pbkdf2-sha512", 1000)
+
+        self.assertFalse(hasher.verify("$unknown$1$abc", "testpass"))
+        self.assertFalse(hasher.verify("short", "testpass"))
+
+    def test_executor_busy(self):
+        """
+        HashingExecutor rejects work past its queue limit.
+        """
+        executor = hashing.HashingExecutor(max_workers=1, max_queued=1, timeout=5)
+        release = threading.Event()
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(executor.run(release.wait)))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        while executor._slots._value > 0:  # waits for both slots to fill
+            time.sleep(0.01)
+
+        with self.assertRaises(hashing.PasswordHashingBusy):
+            executor.run(len, "a")
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [True, True])
+        self.assertEqual(executor.run(len, "abc"), 3)
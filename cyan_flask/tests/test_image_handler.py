@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import io
+import datetime
+import tempfile
+from PIL import Image
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app.image_handler import ImageHandler
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+
+class TestImageHandler(unittest.TestCase):
+    """
+    Unit test class for image_handler.py module, which validates
+    and thumbnails comment images.
+    """
+
+    print(
+        "cyan_flask image_handler.py unittests conducted at "
+        + str(datetime.datetime.today())
+    )
+
+    def setUp(self):
+        """
+        Setup routine called before each unit tests.
+        :return:
+        """
+        self.image_handler = ImageHandler()
+        self.image_handler.max_bytes = 100000
+        self.image_handler.max_pixels = 1000000
+        self.image_handler.thumbnail_size = 100
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        teardown called after each test
+        :return:
+        """
+        self.temp_dir.cleanup()
+
+    def create_image_data(self, size, mode="RGB", image_format="PNG"):
+        image_buffer = io.BytesIO()
+        Image.new(mode, size).save(image_buffer, image_format)
+        return image_buffer.getvalue()
+
+    def test_validate_image_1(self):
+        """
+        validate_image valid image.
+        """
+        image_data = self.create_image_data((50, 50))
+        self.assertIsNone(self.image_handler.validate_image(image_data))
+
+    def test_validate_image_2(self):
+        """
+        validate_image over byte and pixel limits, and invalid image.
+        """
+        self.assertEqual(
+            self.image_handler.validate_image(b"0" * 100001),
+            "Image exceeds 0.0953674 MB",
+        )
+        self.assertEqual(
+            self.image_handler.validate_image(self.create_image_data((1001, 1000))),
+            "Image exceeds 1 megapixels",
+        )
+        self.assertEqual(
+            self.image_handler.validate_image(b"not an image"), "Invalid image"
+        )
+
+    @patch("cyan_flask.app.image_handler.utils._build_image_file_path")
+    def test_create_thumbnail(self, _build_image_file_path_mock):
+        """
+        create_thumbnail creates downscaled JPEG from transparent PNG.
+        """
+        _build_image_file_path_mock.side_effect = lambda f: os.path.join(
+            self.temp_dir.name, f
+        )
+        with open(os.path.join(self.temp_dir.name, "test_1.png"), "wb") as f:
+            f.write(self.create_image_data((400, 200), "RGBA"))
+
+        actual_result = self.image_handler.create_thumbnail("test_1.png")
+
+        self.assertEqual(actual_result, "test_1.png.thumb.jpg")
+        with Image.open(os.path.join(self.temp_dir.name, actual_result)) as thumbnail:
+            self.assertEqual(thumbnail.format, "JPEG")
+            self.assertEqual(thumbnail.size, (100, 50))
+        self.assertEqual(
+            sorted(os.listdir(self.temp_dir.name)),
+            ["test_1.png", "test_1.png.thumb.jpg"],
+        )  # no temp files left
+
+    @patch("cyan_flask.app.image_handler.utils._build_image_file_path")
+    def test_create_thumbnail_missing(self, _build_image_file_path_mock):
+        """
+        create_thumbnail missing image.
+        """
+        _build_image_file_path_mock.side_effect = lambda f: os.path.join(
+            self.temp_dir.name, f
+        )
+        self.assertIsNone(self.image_handler.create_thumbnail("missing.png"))
@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import datetime
+import json
+from decimal import Decimal
+import flask
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app import json_provider
+from cyan_flask.app.models import Notifications
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+app = flask.Flask(__name__)
+app.json = json_provider.JSONProvider(app)
+
+
+class TestJSONProvider(unittest.TestCase):
+    """
+    Unit test class for json_provider.py module, which serializes
+    API responses.
+    """
+
+    print(
+        "cyan_flask json_provider.py unittests conducted at "
+        + str(datetime.datetime.today())
+    )
+
+    def test_dumps_1(self):
+        """
+        dumps encodes Decimal and datetime values.
+        """
+        data = {
+            "latitude": Decimal("40.1234000000"),
+            "longitude": Decimal("-80.5000000000"),
+            "date": datetime.datetime(2021, 1, 2, 3, 4, 5, 123456),
+            "day": datetime.date(2021, 1, 2),
+        }
+
+        expected_result = {
+            "latitude": 40.1234,
+            "longitude": -80.5,
+            "date": "2021-01-02 03:04:05",
+            "day": "2021-01-02",
+        }
+        actual_result = json.loads(app.json.dumps(data))
+
+        self.assertEqual(actual_result, expected_result)
+
+    def test_dumps_2(self):
+        """
+        dumps encodes ORM rows by column.
+        """
+        notification = Notifications(
+            id=1,
+            date=datetime.datetime(2021, 1, 2, 3, 4, 5),
+            subject="subject",
+            body="body",
+        )
+
+        expected_result = {
+            "id": 1,
+            "date": "2021-01-02 03:04:05",
+            "subject": "subject",
+            "body": "body",
+        }
+        actual_result = json.loads(app.json.dumps(notification))
+
+        self.assertEqual(actual_result, expected_result)
+
+    def test_dumps_3(self):
+        """
+        dumps raises TypeError for unsupported types.
+        """
+        with self.assertRaises(TypeError):
+            app.json.dumps({"value": object()})
+
+    def test_output_json(self):
+        """
+        output_json returns response with headers.
+        """
+        with app.test_request_context():
+            response = json_provider.output_json(
+                [{"latitude": Decimal("1.5")}], 200, {"Authorization": "Bearer abc"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertEqual(response.headers["Authorization"], "Bearer abc")
+        self.assertEqual(response.get_json(), [{"latitude": 1.5}])
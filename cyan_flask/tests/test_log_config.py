@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import datetime
+import logging
+import threading
+import time
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app import log_config
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+
+class TestLogConfig(unittest.TestCase):
+    """
+    Unit test class for log_config.py module, which sets up
+    logging for the app and workers.
+    """
+
+    print(
+        "cyan_flask log_config.py unittests conducted at "
+        + str(datetime.datetime.today())
+    )
+
+    @patch.dict(os.environ, {"LOG_LEVEL": ""})
+    def test_get_log_level_1(self):
+        """
+        get_log_level defaults by environment.
+        """
+        self.assertEqual(log_config.get_log_level("local_docker_dev"), "DEBUG")
+        self.assertEqual(log_config.get_log_level("aws_prod"), "WARNING")
+        self.assertEqual(log_config.get_log_level("other"), "INFO")
+
+    @patch.dict(os.environ, {"LOG_LEVEL": "error"})
+    def test_get_log_level_2(self):
+        """
+        get_log_level uses LOG_LEVEL when set.
+        """
+        self.assertEqual(log_config.get_log_level("local_docker_dev"), "ERROR")
+
+    def test_process_queue_handler(self):
+        """
+        ProcessQueueHandler writes records from its listener thread.
+        """
+        records = []
+
+        class ListHandler(logging.Handler):
+            def emit(self, record):
+                records.append(record.getMessage())
+
+        handler = log_config.ProcessQueueHandler([ListHandler()])
+        logger = logging.getLogger("test_process_queue_handler")
+        logger.propagate = False
+        logger.addHandler(handler)
+
+        logger.warning("queued %s", "message")
+        handler.stop_listener()  # flushes the queue
+
+        self.assertEqual(records, ["queued message"])
+
+    @patch("cyan_flask.app.log_config.os.getpid")
+    def test_process_queue_handler_threads(self, getpid_mock):
+        """
+        ProcessQueueHandler starts one listener when several threads
+        log for the first time in a process.
+        """
+        getpid_mock.return_value = 1
+        handler = log_config.ProcessQueueHandler([logging.NullHandler()])
+        start_listener = handler.start_listener
+
+        def slow_start_listener():
+            time.sleep(0.01)  # widens the race between first records
+            start_listener()
+
+        with patch.object(
+            handler, "start_listener", side_effect=slow_start_listener
+        ) as start_listener_mock:
+            threads = [
+                threading.Thread(
+                    target=handler.enqueue,
+                    args=(logging.makeLogRecord({"msg": "message", "levelno": logging.INFO}),),
+                )
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        handler.stop_listener()
+
+        start_listener_mock.assert_called_once()
@@ -16,7 +16,13 @@ sys.path.insert(
 
 # Local imports:
 from config.set_environment import DeployEnv
-from cyan_flask.app.middleware import _check_for_refresh, login_required
+from cyan_flask.app.middleware import (
+    _check_for_refresh,
+    get_refresh_window,
+    login_required,
+    stream_login_required,
+    HeaderValidator,
+)
 from cyan_flask.app.auth import JwtHandler
 
 # Sets up runtime environment:
@@ -59,12 +65,148 @@ class TestAuth(unittest.TestCase):
         token_obj = jwt_handler.decode_auth_token(token)
         return token, token_obj
 
-    def test__check_for_refresh(self):
+    def test__check_for_refresh_1(self):
         """
-        Test _check_for_refresh.
+        Test _check_for_refresh keeps a token that isn't near expiring.
         """
         user = "test"
         token, token_obj = self.create_test_token(user)
-        expected_result = token.encode()  # str -> bytes
-        actual_result = _check_for_refresh(token_obj)
+        token_obj["exp"] = time.time() + 3600
+        expected_result = token
+        actual_result = _check_for_refresh(token, token_obj)
         self.assertEqual(actual_result, expected_result)
+
+    @patch.dict(os.environ)
+    @patch("cyan_flask.app.middleware.jwt_handler.encode_auth_token")
+    def test__check_for_refresh_3(self, encode_mock):
+        """
+        Test _check_for_refresh keeps a fresh token under the default settings.
+        """
+        os.environ.pop("SESSION_EXPIRE_SECONDS", None)
+        os.environ.pop("TOKEN_REFRESH_WINDOW_SECONDS", None)
+        self.assertEqual(get_refresh_window(), 75)
+        user = "test"
+        token, token_obj = self.create_test_token(user)
+        token_obj["exp"] = time.time() + 300  # default session length
+        with patch("cyan_flask.app.middleware.refresh_window", get_refresh_window()):
+            actual_result = _check_for_refresh(token, token_obj)
+        self.assertEqual(actual_result, token)
+        encode_mock.assert_not_called()
+
+    @patch("cyan_flask.app.middleware.jwt_handler.encode_auth_token")
+    def test__check_for_refresh_2(self, encode_mock):
+        """
+        Test _check_for_refresh gets new token inside the expiry window.
+        """
+        user = "test"
+        token, token_obj = self.create_test_token(user)
+        token_obj["exp"] = time.time() + 1
+        encode_mock.return_value = b"new token"
+        expected_result = b"new token"
+        actual_result = _check_for_refresh(token, token_obj)
+        self.assertEqual(actual_result, expected_result)
+        encode_mock.assert_called_once_with(user)
+
+    @patch("cyan_flask.app.middleware.jwt_handler.decode_auth_token")
+    def test_login_required_1(self, decode_mock):
+        """
+        Test login_required decodes token once and sets auth context on g.
+        """
+        user = "test"
+        token, token_obj = self.create_test_token(user)
+        token_obj["exp"] = time.time() + 3600
+        decode_mock.return_value = token_obj
+
+        @login_required
+        def view():
+            return flask.g.user, flask.g.claims, flask.g.token
+
+        with app.test_request_context(
+            headers={"Authorization": "Bearer {}".format(token)}
+        ):
+            actual_result = view()
+
+        self.assertEqual(actual_result, (user, token_obj, token))
+        decode_mock.assert_called_once_with(token)
+
+    def test_login_required_2(self):
+        """
+        Test login_required rejects an invalid token.
+        """
+
+        @login_required
+        def view():
+            return "ok"
+
+        with app.test_request_context(headers={"Authorization": "Bearer invalid"}):
+            actual_result = view()
+
+        self.assertEqual(actual_result[1], 401)
+
+    @patch("cyan_flask.app.middleware.stream_tickets")
+    def test_stream_login_required(self, stream_tickets_mock):
+        """
+        Test stream_login_required redeems the ticket from the query string.
+        """
+        user = "test"
+        token, token_obj = self.create_test_token(user)
+        stream_tickets_mock.redeem.side_effect = [{"username": user, "exp": 1000}, None]
+
+        @stream_login_required
+        def view():
+            return flask.g.user, flask.g.claims["exp"]
+
+        with app.test_request_context("/?ticket=ticket"):
+            self.assertEqual(view(), (user, 1000))
+        with app.test_request_context("/?ticket=ticket"):
+            self.assertEqual(view()[1], 401)  # ticket already used
+        with app.test_request_context(
+            headers={"Authorization": "Bearer {}".format(token)}
+        ):
+            self.assertEqual(view()[1], 401)  # session token not accepted
+        self.assertEqual(stream_tickets_mock.redeem.call_count, 2)
+
+    def test_header_validator_1(self):
+        """
+        Test HeaderValidator accepts allowed origins and app name.
+        """
+        validator = HeaderValidator(
+            ["https://cyan.epa.gov/", "http://localhost:4200"], "Cyanweb"
+        )
+        self.assertTrue(validator.is_valid("https://cyan.epa.gov", "Cyanweb"))
+        self.assertTrue(validator.is_valid("http://localhost:4200", "Cyanweb"))
+        self.assertTrue(validator.is_valid("", "Cyanweb"))  # no Origin header
+
+    @patch.dict(
+        os.environ,
+        {"HOST_DOMAIN": "https://cyan.epa.gov/cyanweb/", "ALLOWED_ORIGINS": "http://localhost:4200/app"},
+    )
+    def test_header_validator_path(self):
+        """
+        Test HeaderValidator matches origins of configured URLs with paths.
+        """
+        validator = HeaderValidator(app_name="Cyanweb")
+        self.assertTrue(validator.is_valid("https://cyan.epa.gov", "Cyanweb"))
+        self.assertTrue(validator.is_valid("http://localhost:4200", "Cyanweb"))
+        self.assertFalse(
+            validator.is_valid("https://cyan.epa.gov/cyanweb", "Cyanweb")
+        )
+
+    def test_header_validator_2(self):
+        """
+        Test HeaderValidator rejects other origins and app names.
+        """
+        validator = HeaderValidator(["https://cyan.epa.gov"], "Cyanweb")
+        self.assertFalse(validator.is_valid("https://cyan.epa", "Cyanweb"))
+        self.assertFalse(validator.is_valid("https://example.com", "Cyanweb"))
+        self.assertFalse(validator.is_valid("https://cyan.epa.gov", "Other"))
+
+    @patch("cyan_flask.app.middleware.logging.warning")
+    def test_header_validator_3(self, warning_mock):
+        """
+        Test HeaderValidator logs a sample of rejections.
+        """
+        validator = HeaderValidator(["https://cyan.epa.gov"], "Cyanweb", log_every=10)
+        for _ in range(25):
+            validator.log_rejection("https://example.com", "Cyanweb")
+        self.assertEqual(warning_mock.call_count, 3)
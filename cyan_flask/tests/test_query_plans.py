@@ -0,0 +1,169 @@
+import unittest
+import sys
+import os
+import re
+import datetime
+import sqlalchemy
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app import web_app_api
+from cyan_flask.tests.sqlite_db import SqliteDBTestCase
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+
+class TestQueryPlans(SqliteDBTestCase):
+    """
+    Audits the query plans of the hot queries in web_app_api.py and
+    celery_tasks.py, failing if any of them scans a whole table.
+    """
+
+    full_scan = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$")  # SCAN without index
+
+    print(
+        "cyan_flask query plan unittests conducted at " + str(datetime.datetime.today())
+    )
+
+    def setUp(self):
+        """
+        Creates the models' tables and indexes in an in-memory sqlite db.
+        """
+        super().setUp()
+        self._add_rows()
+
+    def _add_rows(self):
+        date = self.date
+        self.add_users()
+        for user_id, username in [(1, "test"), (2, "other")]:
+            self.db.session.add(
+                web_app_api.NotificationState(owner=username, cleared_date=date)
+            )
+            for i in range(1, 4):
+                self.db.session.add(
+                    web_app_api.Location(
+                        owner=username,
+                        id=i,
+                        name="location",
+                        latitude=40,
+                        longitude=-80,
+                        notes="[]",
+                    )
+                )
+                self.db.session.add(
+                    web_app_api.Job(
+                        user_id=user_id,
+                        job_num=i,
+                        job_id="{}-job-{}".format(username, i),
+                        job_status="SUCCESS",
+                        input_file="input.csv",
+                        output_file="output.csv",
+                        num_locations=1,
+                        received_datetime=date,
+                    )
+                )
+                self.db.session.add(
+                    web_app_api.Report(
+                        user_id=user_id,
+                        report_num=i,
+                        report_id="{}-report-{}".format(username, i),
+                        report_status="SUCCESS",
+                        report_date="2021 001",
+                        report_range_low=1,
+                        report_range_medium=2,
+                        report_range_high=3,
+                        received_datetime=date,
+                    )
+                )
+        for i in range(1, 4):
+            self.db.session.add(
+                web_app_api.Notifications(
+                    id=i,
+                    date=date + datetime.timedelta(days=i),
+                    subject="subject",
+                    body="body",
+                )
+            )
+            self.db.session.add(
+                web_app_api.Comment(
+                    id=i,
+                    title="title",
+                    date=date + datetime.timedelta(days=i),
+                    username="test",
+                    comment_text="text",
+                )
+            )
+            self.db.session.add(
+                web_app_api.CommentImages(comment_id=i, comment_image="image.png")
+            )
+            self.db.session.add(
+                web_app_api.Reply(comment_id=i, date=date, username="test", body="reply")
+            )
+        self.db.session.add(web_app_api.NotificationRead(owner="test", notification_id=1))
+        self.db.session.commit()
+        self.db.session.expunge_all()
+
+    def _run_hot_queries(self):
+        """
+        Runs the hot queries, returns each SELECT statement with its parameters.
+        """
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, *args):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        sqlalchemy.event.listen(
+            self.db.engine, "before_cursor_execute", before_cursor_execute
+        )
+        try:
+            web_app_api.get_user_locations("test")
+            web_app_api.get_location("test", 1)
+            web_app_api.get_notifications("test", datetime.datetime(2021, 1, 1))
+            web_app_api.get_user_settings(1)
+            _, next_cursor, _ = web_app_api.get_comments(limit=2)
+            web_app_api.get_comments(cursor=next_cursor, limit=2)
+            web_app_api.get_all_reports({"username": "test"})
+            web_app_api.celery_handler.get_active_user_job("test")
+            web_app_api.celery_handler.get_job_from_db("test", "test-job-1")
+            web_app_api.celery_handler.get_all_jobs("test")
+            web_app_api.User.query.filter_by(email="test@test.com").first()
+            web_app_api.get_report({"username": "test", "report_id": "test-report-1"})
+            web_app_api.Report.get_active_user_report("test")
+            web_app_api.Settings.get_user_settings("test")
+        finally:
+            sqlalchemy.event.remove(
+                self.db.engine, "before_cursor_execute", before_cursor_execute
+            )
+        return statements
+
+    def test_hot_queries_use_indexes(self):
+        """
+        Hot queries search by index instead of scanning tables.
+        """
+        statements = self._run_hot_queries()
+        self.assertGreater(len(statements), 10)
+
+        with self.db.engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = conn.exec_driver_sql(
+                    "EXPLAIN QUERY PLAN " + statement, parameters
+                ).fetchall()
+                full_scans = [row[-1] for row in plan if self.full_scan.match(row[-1])]
+                self.assertEqual(
+                    full_scans,
+                    [],
+                    "Full table scan:\n{}\n{}".format(statement, plan),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
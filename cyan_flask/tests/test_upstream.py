@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import datetime
+
+# Loads environment based on deployment location:
+script_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(
+    0, os.path.join(script_path, "..", "..")
+)  # adds EPA-Cyano-Web project to sys.path
+
+# Local imports:
+from config.set_environment import DeployEnv
+from cyan_flask.app import upstream
+
+# Sets up runtime environment:
+runtime_env = DeployEnv()
+runtime_env.load_deployment_environment()
+
+
+class TestUpstream(unittest.TestCase):
+    """
+    Unit test class for upstream.py module, which makes
+    requests to the cyano and waterbody APIs.
+    """
+
+    print(
+        "cyan_flask upstream.py unittests conducted at "
+        + str(datetime.datetime.today())
+    )
+
+    def setUp(self):
+        """
+        Setup routine called before each unit tests.
+        :return:
+        """
+        self.client = upstream.UpstreamClient(pool_maxsize=8)
+
+    def tearDown(self):
+        """
+        teardown called after each test
+        :return:
+        """
+        pass
+
+    def test_get_session_1(self):
+        """
+        get_session reuses the session within a process.
+        """
+        session = self.client.get_session()
+        adapter = session.get_adapter("https://cyan.epa.gov")
+
+        self.assertIs(self.client.get_session(), session)
+        self.assertEqual(adapter._pool_maxsize, 8)
+        self.assertEqual(adapter.max_retries.total, self.client.retries)
+
+    @patch("cyan_flask.app.upstream.os.getpid")
+    def test_get_session_2(self, getpid_mock):
+        """
+        get_session creates a new session in a forked process.
+        """
+        getpid_mock.return_value = 1
+        session = self.client.get_session()
+        getpid_mock.return_value = 2
+
+        self.assertIsNot(self.client.get_session(), session)
+
+    @patch("cyan_flask.app.upstream.requests.Session.get", autospec=True)
+    def test_get_no_retry(self, session_get_mock):
+        """
+        get doesn't retry endpoints that start work upstream.
+        """
+        session = self.client.get_session(False)
+        adapter = session.get_adapter("https://cyan.epa.gov")
+        self.assertEqual(adapter.max_retries.total, 0)
+        self.assertIsNot(session, self.client.get_session())
+
+        self.client.get("https://cyan.epa.gov", endpoint="report")
+        self.client.get("https://cyan.epa.gov", endpoint="report_status")
+        sessions = [c.args[0] for c in session_get_mock.call_args_list]
+        self.assertEqual(sessions, [session, self.client.get_session()])
+
+    @patch("cyan_flask.app.upstream.requests.Session.get")
+    def test_get(self, session_get_mock):
+        """
+        get uses the endpoint class timeout unless one is given.
+        """
+        self.client.get("https://cyan.epa.gov", endpoint="report_status")
+        self.client.get("https://cyan.epa.gov", endpoint="cyano", timeout=1)
+        self.client.get("https://cyan.epa.gov", endpoint="unknown")
+
+        timeouts = [c.kwargs["timeout"] for c in session_get_mock.call_args_list]
+        self.assertEqual(
+            timeouts,
+            [
+                self.client.timeouts["report_status"],
+                1,
+                self.client.timeouts["default"],
+            ],
+        )
+
+    def test_jitter_retry(self):
+        """
+        JitterRetry adds at most backoff_jitter_max to the backoff time.
+        """
+        retry = upstream.JitterRetry(total=3, backoff_factor=1)
+        self.assertEqual(retry.get_backoff_time(), 0)  # no backoff before retries
+        retry = retry.increment(method="GET", url="/").increment(method="GET", url="/")
+        backoff_time = retry.get_backoff_time()
+        self.assertGreaterEqual(backoff_time, 2)
+        self.assertLessEqual(backoff_time, 2 + retry.backoff_jitter_max)
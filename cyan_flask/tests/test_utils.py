@@ -8,6 +8,7 @@ import requests
 from flask import Response
 import time
 from pathlib import Path
+import tempfile
 
 # Loads environment based on deployment location:
 script_path = os.path.dirname(os.path.abspath(__file__))
@@ -118,6 +119,7 @@ class TestAuth(unittest.TestCase):
             # 'body': {},
             "comment_text": "test comment",
             "comment_images": [],
+            "comment_image_urls": [],
             "replies": [],
         }
         comment_obj = Comment(
@@ -139,6 +141,23 @@ class TestAuth(unittest.TestCase):
 
         self.assertEqual(actual_result, expected_result)
 
+    @patch.dict(os.environ, {"SECRET_KEY": "secret", "API_URL": "/cyan/app/api/"})
+    def test_build_comments_json_image_urls(self):
+        """
+        build_comments_json returns thumbnail and original image URLs.
+        """
+        comment_obj = Comment(
+            date=datetime.datetime(2021, 1, 2, 3, 4, 5),
+            comment_images=[CommentImages(comment_image="a.jpg")],
+            replies=[],
+        )
+        actual_result = utils.build_comments_json([comment_obj])[0]
+        self.assertEqual(
+            actual_result["comment_images"],
+            [utils.get_image_url(utils.get_thumbnail_filename("a.jpg"))],
+        )
+        self.assertEqual(actual_result["comment_image_urls"], [utils.get_image_url("a.jpg")])
+
     def test_build_replies_json(self):
         """
         build_replies_json
@@ -188,11 +207,12 @@ class TestAuth(unittest.TestCase):
 
     def test_get_image_source_2(self):
         """
-        get_image_source
+        get_image_source legacy data URL file
         """
-        image_path = Path(__file__).parent / "mock_data" / "test_image_source_new.jpg"
-        actual_result = utils.get_image_source(image_path)
-        self.assertIsInstance(actual_result, str)
+        image_path = Path(__file__).parent / "mock_data" / "test_image_source.jpg"
+        mimetype, image_data = utils.get_image_source(image_path)
+        self.assertEqual(mimetype, "image/jpeg")
+        self.assertTrue(image_data.startswith(b"\xff\xd8"))  # jpeg magic number
 
     @patch("cyan_flask.app.utils._build_image_file_path")
     @patch("cyan_flask.app.utils._generate_image_filename")
@@ -203,7 +223,7 @@ class TestAuth(unittest.TestCase):
         save_image_source
         """
         username = "test"
-        image_source = "imagebase64source"
+        image_source = "data:image/jpeg;base64,aW1hZ2U="
         image_name = "test_image_source_new.jpg"
 
         _generate_image_filename_mock.return_value = ""
@@ -223,28 +243,132 @@ class TestAuth(unittest.TestCase):
         save_image_source
         """
         username = "test"
-        image_source = "imagebase64source"
+        image_source = "data:image/jpeg;base64,aW1hZ2U="
         image_name = "test_image_source_new.jpg"
-        image_path = Path(__file__).parent / "mock_data" / image_name
 
-        _generate_image_filename_mock.return_value = image_name
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, image_name)
+            _generate_image_filename_mock.return_value = image_name
+            _build_image_file_path_mock.return_value = image_path
 
-        _build_image_file_path_mock.return_value = image_path
+            expected_result = image_name
+            actual_result = utils.save_image_source(
+                username, image_source, image_name
+            )
+            self.assertEqual(actual_result, expected_result)
+            with open(image_path, "rb") as image_file:
+                self.assertEqual(image_file.read(), b"image")  # saved as binary
 
-        expected_result = image_name
-        actual_result = utils.save_image_source(username, image_source, image_name)
+    def test_save_image_source_3(self):
+        """
+        save_image_source invalid image source
+        """
+        expected_result = {"error": "error saving image"}
+        actual_result = utils.save_image_source("test", "imagebase64source", "a.jpg")
         self.assertEqual(actual_result, expected_result)
 
+    @patch.dict(os.environ, {"SECRET_KEY": "secret", "API_URL": "/cyan/app/api/"})
+    def test_get_image_url(self):
+        """
+        get_image_url
+        """
+        actual_result = utils.get_image_url("test_1.jpg")
+        self.assertEqual(
+            actual_result,
+            "/cyan/app/api/comment/image/test_1.jpg?sig={}".format(
+                utils.sign_image_filename("test_1.jpg")
+            ),
+        )
+        self.assertNotEqual(
+            utils.sign_image_filename("test_1.jpg"),
+            utils.sign_image_filename("test_2.jpg"),
+        )
+
     def test__generate_image_filename(self):
-        username = "test"
-        image_name = "test_image_source_new.jpg"
-        image_ext = image_name.split(".")[-1]
-        actual_result = utils._generate_image_filename(username, image_name)
-        self.assertIn(username, actual_result)
-        self.assertIn(image_ext, actual_result)
+        """
+        _generate_image_filename is the image hash with normalized extension.
+        """
+        image_data = b"image"
+        image_name = "test_image_source_new.JPEG"
+        expected_result = (
+            "6105d6cc76af400325e94d588ce511be5bfdbb73b437dc51eca43917d7a43e3d.jpg"
+        )
+        actual_result = utils._generate_image_filename(image_data, image_name)
+        self.assertEqual(actual_result, expected_result)
+        self.assertEqual(
+            utils._generate_image_filename(image_data, "noextension"),
+            expected_result.replace(".jpg", ".img"),
+        )
 
     def test__build_image_file_path(self):
         filename = "test_image_source_new.jpg"
         expected_result = os.path.join("cyan_flask", "user_images", filename)
         actual_result = utils._build_image_file_path(filename)
         self.assertIn(expected_result, actual_result)
+
+    def test__build_image_file_path_sharded(self):
+        filename = "6105d6cc76af400325e94d588ce511be5bfdbb73b437dc51eca43917d7a43e3d.jpg"
+        expected_result = os.path.join("cyan_flask", "user_images", "61", "05", filename)
+        actual_result = utils._build_image_file_path(filename)
+        self.assertTrue(actual_result.endswith(expected_result))
+        self.assertTrue(
+            utils._build_image_file_path(filename + ".thumb.jpg").endswith(
+                expected_result + ".thumb.jpg"
+            )
+        )
+
+    @patch("cyan_flask.app.utils._build_image_file_path")
+    def test_save_image_data_dedupe(self, _build_image_file_path_mock):
+        """
+        save_image_data stores identical images once.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            _build_image_file_path_mock.side_effect = lambda f: os.path.join(
+                temp_dir, f[0:2], f
+            )
+            filename_1 = utils.save_image_data("user1", b"image", "a.jpg")
+            os.utime(_build_image_file_path_mock(filename_1), (0, 0))
+            filename_2 = utils.save_image_data("user2", b"image", "b.jpg")
+            self.assertGreater(
+                os.path.getmtime(_build_image_file_path_mock(filename_1)), 0
+            )  # dedup hit refreshes mtime so gc keeps the file
+            filename_3 = utils.save_image_data("user1", b"other image", "a.jpg")
+
+            self.assertEqual(filename_1, filename_2)
+            self.assertNotEqual(filename_1, filename_3)
+            with open(_build_image_file_path_mock(filename_1), "rb") as image_file:
+                self.assertEqual(image_file.read(), b"image")
+            self.assertEqual(
+                sorted(os.listdir(temp_dir)), sorted({filename_1[0:2], filename_3[0:2]})
+            )  # no temp files left
+
+    def test_comments_cursor_1(self):
+        """
+        Tests encode_comments_cursor/decode_comments_cursor round trip.
+        """
+        date = datetime.datetime(2021, 1, 2, 3, 4, 5, 123456)
+
+        cursor = utils.encode_comments_cursor(date, 42)
+
+        self.assertEqual(utils.decode_comments_cursor(cursor), (date, 42))
+
+    def test_comments_cursor_2(self):
+        """
+        Tests decode_comments_cursor with invalid cursor.
+        """
+        for cursor in ["not a cursor", "YWJj", "MjAyMS0wMS0wMnxhYmM="]:
+            with self.assertRaises(ValueError):
+                utils.decode_comments_cursor(cursor)
+
+    @patch.dict(os.environ, {"COMMENTS_PAGE_SIZE": "50", "COMMENTS_MAX_PAGE_SIZE": "200"})
+    def test_get_page_size(self):
+        """
+        Tests get_page_size default, cap, and invalid sizes.
+        """
+        self.assertEqual(utils.get_page_size(), 50)
+        self.assertEqual(utils.get_page_size("10"), 10)
+        self.assertEqual(utils.get_page_size(1000), 200)
+        with self.assertRaises(ValueError):
+            utils.get_page_size("0")
+        with self.assertRaises(ValueError):
+            utils.get_page_size("abc")
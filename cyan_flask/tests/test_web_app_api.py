@@ -3,6 +3,13 @@ from unittest.mock import patch
 import sys
 import os
 import datetime
+import time
+import json
+import flask
+import tempfile
+import io
+import base64
+from PIL import Image
 
 # Loads environment based on deployment location:
 script_path = os.path.dirname(os.path.abspath(__file__))
@@ -13,10 +20,12 @@ sys.path.insert(
 # Local imports:
 from config.set_environment import DeployEnv
 from cyan_flask.app import web_app_api
+from cyan_flask.tests.sqlite_db import SqliteDBTestCase
 from cyan_flask.app.models import (
     User,
     Location,
     Notifications,
+    NotificationState,
     Settings,
     Comment,
     Reply,
@@ -194,6 +203,67 @@ class TestWebAppApi(unittest.TestCase):
 
         self.assertEqual(actual_result, expected_result)
 
+    @patch("cyan_flask.app.web_app_api.PasswordHandler")
+    @patch("cyan_flask.app.web_app_api.User")
+    def test_login_user_busy(self, user_mock, password_mock):
+        """
+        login_user when the password hashing pool is full.
+        """
+        test_request = {"user": "test", "password": "test"}
+
+        password_mock.return_value.test_password.side_effect = (
+            web_app_api.PasswordHashingBusy()
+        )
+
+        expected_result = {"error": "Server busy, please try again."}, 503
+        actual_result = web_app_api.login_user(test_request)
+
+        self.assertEqual(actual_result, expected_result)
+
+    @patch("cyan_flask.app.web_app_api.db")
+    @patch("cyan_flask.app.web_app_api.get_user_locations")
+    @patch("cyan_flask.app.web_app_api.JwtHandler")
+    @patch("cyan_flask.app.web_app_api.get_user_settings")
+    @patch("cyan_flask.app.web_app_api.get_notifications")
+    @patch("cyan_flask.app.web_app_api.PasswordHandler")
+    @patch("cyan_flask.app.web_app_api.User")
+    def test_login_user_rehash(
+        self,
+        user_mock,
+        password_mock,
+        notifications_mock,
+        settings_mock,
+        jwt_mock,
+        user_locations_mock,
+        db_mock,
+    ):
+        """
+        login_user upgrades an outdated password hash.
+        """
+        example_db_result = User(
+            username="test",
+            email="test@email.com",
+            password="legacyhash",
+            created=datetime.date.today(),
+            last_visit=datetime.date.today(),
+        )
+        test_request = {"user": "test", "password": "test"}
+
+        user_mock.query.filter_by.return_value.first.return_value = example_db_result
+        password_mock.return_value.test_password.return_value = True
+        password_mock.return_value.needs_rehash.return_value = True
+        password_mock.return_value.hash_password.return_value = "$2b$12$newhash"
+        notifications_mock.return_value = []
+        settings_mock.return_value = {}
+        jwt_mock.return_value.encode_auth_token.return_value = ""
+        user_locations_mock.return_value = []
+
+        actual_result = web_app_api.login_user(test_request)
+
+        self.assertEqual(actual_result[1], 200)
+        self.assertEqual(example_db_result.password, "$2b$12$newhash")
+        db_mock.session.commit.assert_called()
+
     @patch("cyan_flask.app.web_app_api.get_user_locations")
     @patch("cyan_flask.app.web_app_api.JwtHandler")
     @patch("cyan_flask.app.web_app_api.db")
@@ -240,6 +310,7 @@ class TestWebAppApi(unittest.TestCase):
         )
 
         password_mock.return_value.test_password.return_value = True
+        password_mock.return_value.needs_rehash.return_value = False
 
         notifications_mock.return_value = expected_data["notifications"]
 
@@ -299,6 +370,7 @@ class TestWebAppApi(unittest.TestCase):
         )
 
         password_mock.return_value.test_password.return_value = True
+        password_mock.return_value.needs_rehash.return_value = False
 
         notifications_mock.return_value = expected_data["notifications"]
 
@@ -358,6 +430,7 @@ class TestWebAppApi(unittest.TestCase):
         )
 
         password_mock.return_value.test_password.return_value = True
+        password_mock.return_value.needs_rehash.return_value = False
 
         notifications_mock.return_value = expected_data["notifications"]
 
@@ -637,90 +710,86 @@ class TestWebAppApi(unittest.TestCase):
 
         self.assertEqual(actual_result, expected_result)
 
-    @patch("cyan_flask.app.web_app_api.parse_notifications_response")
-    @patch("cyan_flask.app.web_app_api.utils.make_notifications_request")
+    @patch("cyan_flask.app.web_app_api.db")
     @patch("cyan_flask.app.web_app_api.get_users_notifications")
+    @patch("cyan_flask.app.web_app_api.NotificationState")
     def test_get_notifications_1(
-        self,
-        get_users_notifications_mock,
-        make_notifications_request_mock,
-        parse_notifications_response_mock,
+        self, notification_state_mock, get_users_notifications_mock, db_mock
     ):
         """
-        get_notifications no notifications
+        get_notifications existing user state.
         """
         user = "test"
-        last_visit = datetime.date.today().isoformat()
-
+        last_visit = datetime.datetime(2021, 1, 2)
+        user_state = NotificationState(
+            owner=user, cleared_date=datetime.datetime(2021, 1, 1)
+        )
+        notification_state_mock.query.filter_by.return_value.first.return_value = (
+            user_state
+        )
         get_users_notifications_mock.return_value = []
 
-        make_notifications_request_mock.return_value = None
-
-        parse_notifications_response_mock.return_value = []
-
         expected_result = []
         actual_result = web_app_api.get_notifications(user, last_visit)
 
         self.assertEqual(actual_result, expected_result)
+        get_users_notifications_mock.assert_called_once_with(
+            user, user_state.cleared_date
+        )
+        db_mock.session.commit.assert_not_called()  # login writes nothing
 
-    @patch("cyan_flask.app.web_app_api.convert_notification_to_list")
     @patch("cyan_flask.app.web_app_api.db")
-    @patch("cyan_flask.app.web_app_api.parse_notifications_response")
-    @patch("cyan_flask.app.web_app_api.utils.make_notifications_request")
     @patch("cyan_flask.app.web_app_api.get_users_notifications")
+    @patch("cyan_flask.app.web_app_api.NotificationState")
     def test_get_notifications_2(
-        self,
-        get_users_notifications_mock,
-        make_notifications_request_mock,
-        parse_notifications_response_mock,
-        db_mock,
-        convert_notification_to_list_mock,
+        self, notification_state_mock, get_users_notifications_mock, db_mock
     ):
         """
-        get_notifications with notifications
+        get_notifications new user state starts at last visit.
         """
         user = "test"
-        last_visit = str(datetime.datetime.now()).split(".")[0]
-        example_notification = {
-            "id": 1,
-            "subject": "Hello hello...",
-            "message": "Can anyone hear me?",
-            "dateSent": 1446772133000,
-            "image": {
-                "name": "epa-logo.png",
-                "width": 72,
-                "height": 72,
-                "format": "PNG",
-                "thumb": False,
-            },
-        }
-        example_db_result = Notifications(
-            owner=user,
-            id=1,
-            date=last_visit,
-            subject="example subject",
-            body="example body",
-            is_new=True,
+        last_visit = datetime.datetime(2021, 1, 2)
+        notification_state_mock.query.filter_by.return_value.first.return_value = (
+            None
         )
-        example_db_result_list = [
-            example_db_result.owner,
-            example_db_result.id,
-            example_db_result.date,
-            example_db_result.subject,
-            example_db_result.body,
-            example_db_result.is_new,
-        ]
-
-        get_users_notifications_mock.return_value = [example_db_result_list]
+        get_users_notifications_mock.return_value = []
 
-        make_notifications_request_mock.return_value = [example_notification]
+        web_app_api.get_notifications(user, last_visit)
 
-        parse_notifications_response_mock.return_value = [example_db_result]
+        notification_state_mock.assert_called_once_with(
+            owner=user, cleared_date=last_visit
+        )
+        db_mock.session.commit.assert_called_once()
+        get_users_notifications_mock.assert_called_once_with(
+            user, notification_state_mock.return_value.cleared_date
+        )
 
-        convert_notification_to_list_mock.return_value = example_db_result_list
+    @patch("cyan_flask.app.web_app_api.db")
+    def test_get_users_notifications_1(self, db_mock):
+        """
+        get_users_notifications with read and unread notifications.
+        """
+        user = "test"
+        date = datetime.datetime(2021, 1, 2, 3, 4, 5)
+        notification_1 = Notifications(
+            id=1, date=date, subject="subject 1", body="body 1"
+        )
+        notification_2 = Notifications(
+            id=2, date=date, subject="subject 2", body="body 2"
+        )
+        query_mock = db_mock.session.query.return_value
+        query_mock.outerjoin.return_value.filter.return_value.order_by.return_value.all.return_value = [
+            (notification_1, None),
+            (notification_2, 2),
+        ]
 
-        expected_result = [example_db_result_list, example_db_result_list]
-        actual_result = web_app_api.get_notifications(user, last_visit)
+        expected_result = [
+            [user, 1, "2021-01-02 03:04:05", "subject 1", "body 1", True],
+            [user, 2, "2021-01-02 03:04:05", "subject 2", "body 2", False],
+        ]
+        actual_result = web_app_api.get_users_notifications(
+            user, datetime.datetime(2021, 1, 1)
+        )
 
         self.assertEqual(actual_result, expected_result)
 
@@ -729,112 +798,83 @@ class TestWebAppApi(unittest.TestCase):
         convert_notification_to_list
         """
         user = "test"
-        last_visit = str(datetime.datetime.now()).split(".")[0]
+        date = datetime.datetime(2021, 1, 2, 3, 4, 5)
         example_db_result = Notifications(
-            owner=user,
             id=1,
-            date=last_visit,
+            date=date,
             subject="example subject",
             body="example body",
-            is_new=True,
         )
         example_db_result_list = [
-            example_db_result.owner,
+            user,
             example_db_result.id,
-            example_db_result.date,
+            "2021-01-02 03:04:05",
             example_db_result.subject,
             example_db_result.body,
-            example_db_result.is_new,
+            True,
         ]
 
         expected_result = example_db_result_list
-        actual_result = web_app_api.convert_notification_to_list(example_db_result)
-
-        self.assertEqual(actual_result, expected_result)
-
-    def test_parse_notifications_response_1(self):
-        """
-        parse_notifications_response no new notifications
-        """
-        new_notifications = None
-        last_visit = str(datetime.datetime.now()).split(".")[0]
-        user = "test"
-
-        expected_result = []
-        actual_result = web_app_api.parse_notifications_response(
-            new_notifications, last_visit, user
+        actual_result = web_app_api.convert_notification_to_list(
+            user, example_db_result, True
         )
 
         self.assertEqual(actual_result, expected_result)
 
-    @patch("cyan_flask.app.web_app_api.utils.convert_to_timestamp")
-    def test_parse_notifications_response_2(self, convert_to_timestamp_mock):
+    @patch("cyan_flask.app.web_app_api.db")
+    def test_edit_notifications_1(self, db_mock):
         """
-        parse_notifications_response new notifications
+        edit_notifications
         """
-        new_notifications = None
-        last_visit = str(datetime.datetime.now()).split(".")[0]
         user = "test"
-        example_notification = {
-            "id": 1,
-            "subject": "Hello hello...",
-            "message": "Can anyone hear me?",
-            "dateSent": 1446772133000,
-            "image": {
-                "name": "epa-logo.png",
-                "width": 72,
-                "height": 72,
-                "format": "PNG",
-                "thumb": False,
-            },
-        }
-        converted_timestamp = (
-            "2015-11-05 20:08:53"
-        )  # example notification dateSent converted to timestamp
-        example_db_result = Notifications(
-            owner=user,
-            id=example_notification["id"],
-            date=converted_timestamp,
-            subject=example_notification["subject"],
-            body=example_notification["message"],
-            is_new=True,
-        )
-
-        convert_to_timestamp_mock.return_value = converted_timestamp
+        _id = "1"
 
-        expected_result = []
-        actual_result = web_app_api.parse_notifications_response(
-            new_notifications, last_visit, user
-        )
+        expected_result = {"status": "success"}, 200
+        actual_result = web_app_api.edit_notifications(user, _id)
 
         self.assertEqual(actual_result, expected_result)
+        db_mock.session.execute.assert_called_once()
 
     @patch("cyan_flask.app.web_app_api.db")
-    @patch("flask_sqlalchemy._QueryProperty.__get__")
-    def test_edit_notifications_1(self, notification_query_mock, db_mock):
+    def test_edit_notifications_2(self, db_mock):
         """
-        edit_notifications
+        edit_notifications invalid id
         """
         user = "test"
-        _id = 1
+        _id = "abc"
 
-        expected_result = {"status": "success"}, 200
+        expected_result = {"error": "Invalid notification id"}, 400
         actual_result = web_app_api.edit_notifications(user, _id)
 
         self.assertEqual(actual_result, expected_result)
+        db_mock.session.execute.assert_not_called()
 
+    @patch("cyan_flask.app.web_app_api.NotificationRead")
+    @patch("cyan_flask.app.web_app_api.NotificationState")
     @patch("cyan_flask.app.web_app_api.db")
-    @patch("flask_sqlalchemy._QueryProperty.__get__")
-    def test_delete_notifications_1(self, notification_query_mock, db_mock):
+    def test_delete_notifications_1(
+        self, db_mock, notification_state_mock, notification_read_mock
+    ):
         """
-        delete_notifications
+        delete_notifications moves user's cleared date to latest notification.
         """
         user = "test"
+        latest_date = datetime.datetime(2021, 1, 2)
+        user_state = NotificationState(
+            owner=user, cleared_date=datetime.datetime(2021, 1, 1)
+        )
+        db_mock.session.query.return_value.scalar.return_value = latest_date
+        notification_state_mock.query.filter_by.return_value.first.return_value = (
+            user_state
+        )
 
         expected_result = {"status": "success"}, 200
         actual_result = web_app_api.delete_notifications(user)
 
         self.assertEqual(actual_result, expected_result)
+        self.assertEqual(user_state.cleared_date, latest_date)
+        notification_read_mock.query.filter_by.return_value.delete.assert_called_once()
+        db_mock.session.commit.assert_called_once()
 
     @patch("flask_sqlalchemy._QueryProperty.__get__")
     def test_get_user_settings_1(self, settings_query_mock):
@@ -907,44 +947,225 @@ class TestWebAppApi(unittest.TestCase):
         self.assertEqual(actual_result, expected_result)
 
     @patch("cyan_flask.app.web_app_api.db")
-    @patch("flask_sqlalchemy._QueryProperty.__get__")
-    def test_edit_settings_2(self, settings_query_mock, db_mock):
+    @patch("cyan_flask.app.web_app_api.Settings.get_user_settings")
+    def test_edit_settings_2(self, get_user_settings_mock, db_mock):
         """
         edit_settings
         """
         request_obj = {
             "owner": "test",
-            "level_low": 100000,
+            "level_low": 200000,
             "level_medium": 300000,
             "level_high": 1000000,
             "enable_alert": False,
             "alert_value": 1000000,
         }
         example_db_result = Settings(
-            level_low=request_obj["level_low"],
-            level_medium=request_obj["level_medium"],
-            level_high=request_obj["level_high"],
-            enable_alert=request_obj["enable_alert"],
-            alert_value=request_obj["alert_value"],
-        )
-        example_db_user = User(
-            id=1,
-            username="test",
-            email="test@email.com",
-            password="test",
-            created=datetime.date.today(),
-            last_visit=datetime.date.today(),
+            level_low=100000,
+            level_medium=300000,
+            level_high=1000000,
+            enable_alert=False,
+            alert_value=1000000,
         )
 
-        settings_query_mock.return_value.filter_by.return_value.first.side_effect = [
-            example_db_user,
-            example_db_result,
-        ]
+        get_user_settings_mock.return_value = (1, example_db_result)
 
         expected_result = {"status": "success"}, 200
         actual_result = web_app_api.edit_settings(request_obj)
 
         self.assertEqual(actual_result, expected_result)
+        self.assertEqual(example_db_result.level_low, 200000)
+        get_user_settings_mock.assert_called_once_with("test")
+        db_mock.session.commit.assert_called_once()
+
+    @patch("cyan_flask.app.web_app_api.job_progress")
+    @patch("cyan_flask.app.web_app_api.celery_handler.get_job_from_db")
+    def test_get_batch_status(self, get_job_from_db_mock, job_progress_mock):
+        """
+        get_batch_status returns redis progress of active jobs.
+        """
+        user_job = web_app_api.Job(
+            job_num=1,
+            job_id="job-id",
+            job_status="STARTED",
+            input_file="input.csv",
+            num_locations=1000,
+            received_datetime=datetime.datetime(2021, 1, 2, 3, 4, 5),
+        )
+        get_job_from_db_mock.return_value = user_job
+        progress = {"total": 1000, "done": 200, "failed": 0, "throughput": 4.0, "eta": 200}
+        job_progress_mock.get.return_value = progress
+
+        response_obj, status_code = web_app_api.get_batch_status(
+            {"job_id": "job-id", "username": "test"}
+        )
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(response_obj["progress"], progress)
+        job_progress_mock.get.assert_called_once_with("job-id")
+
+        user_job.job_status = "SUCCESS"
+        response_obj, _ = web_app_api.get_batch_status(
+            {"job_id": "job-id", "username": "test"}
+        )
+        self.assertIsNone(response_obj["progress"])
+        job_progress_mock.get.assert_called_once()  # no redis call for finished jobs
+
+    @patch("cyan_flask.app.web_app_api.status_stream_slots")
+    @patch("cyan_flask.app.web_app_api.status_events")
+    @patch("cyan_flask.app.web_app_api.Report.get_active_user_report")
+    @patch("cyan_flask.app.web_app_api.celery_handler.get_active_user_job")
+    @patch("cyan_flask.app.web_app_api.db")
+    def test_get_status_stream(
+        self,
+        db_mock,
+        get_active_user_job_mock,
+        get_active_user_report_mock,
+        status_events_mock,
+        status_stream_slots_mock,
+    ):
+        """
+        get_status_stream sends the active job, then the user's status
+        events, and unsubscribes and frees its stream slot on close.
+        """
+        db_mock.session.query.return_value.filter_by.return_value.scalar.return_value = 1
+        user_job = web_app_api.Job(
+            job_num=1,
+            job_id="job-id",
+            job_status="STARTED",
+            input_file="input.csv",
+            num_locations=1,
+            received_datetime=datetime.datetime(2021, 1, 2, 3, 4, 5),
+        )
+        get_active_user_job_mock.return_value = user_job
+        get_active_user_report_mock.return_value = None
+        pubsub_mock = status_events_mock.subscribe.return_value
+        status_events_mock.get_events.return_value = (
+            status_event
+            for status_event in [
+                None,
+                ("job", {"job_id": "job-id", "job_status": "SUCCESS"}),
+            ]
+        )
+
+        response = web_app_api.get_status_stream("test", time.time() + 100)
+        body = response.get_data(as_text=True)
+        response.close()
+
+        self.assertEqual(response.mimetype, "text/event-stream")
+        status_events_mock.subscribe.assert_called_once_with(1)
+        self.assertEqual(status_events_mock.get_events.call_args[0][0], pubsub_mock)
+        self.assertLessEqual(status_events_mock.get_events.call_args[0][1], 100)
+        self.assertEqual(
+            body.split("\n\n")[1:],
+            [
+                "event: job\ndata: {}".format(
+                    json.dumps(web_app_api.celery_handler.create_job_status(user_job))
+                ),
+                ": keepalive",
+                'event: job\ndata: {"job_id": "job-id", "job_status": "SUCCESS"}',
+                "",
+            ],
+        )
+        db_mock.session.close.assert_called_once()
+        pubsub_mock.close.assert_called_once()
+        status_stream_slots_mock.release.assert_called_once()
+
+        # Unsubscribes when the snapshot fails:
+        get_active_user_job_mock.side_effect = Exception("db error")
+        self.assertEqual(
+            web_app_api.get_status_stream("test", time.time() + 100)[1], 503
+        )
+        self.assertEqual(pubsub_mock.close.call_count, 2)
+        self.assertEqual(status_stream_slots_mock.release.call_count, 2)
+
+        status_stream_slots_mock.acquire.return_value = False
+        self.assertEqual(
+            web_app_api.get_status_stream("test", time.time() + 100)[1], 503
+        )
+
+    @patch("cyan_flask.app.web_app_api.stream_tickets")
+    def test_create_stream_ticket(self, stream_tickets_mock):
+        """
+        create_stream_ticket returns a ticket, or 503 so the client polls.
+        """
+        stream_tickets_mock.create.return_value = "ticket"
+        self.assertEqual(
+            web_app_api.create_stream_ticket("test", 1000), ({"ticket": "ticket"}, 200)
+        )
+        stream_tickets_mock.create.assert_called_once_with("test", 1000)
+        stream_tickets_mock.create.return_value = None
+        self.assertEqual(web_app_api.create_stream_ticket("test", 1000)[1], 503)
+
+    @patch.dict(os.environ, {"WATERBODY_URL": "http://waterbody"})
+    @patch("cyan_flask.app.web_app_api.status_events")
+    @patch("cyan_flask.app.web_app_api.report_status_cache")
+    @patch("cyan_flask.app.web_app_api.upstream.client")
+    @patch("cyan_flask.app.web_app_api.Report.get_user_report")
+    @patch("cyan_flask.app.web_app_api.db")
+    def test_get_report_status(
+        self,
+        db_mock,
+        get_user_report_mock,
+        upstream_client_mock,
+        report_status_cache_mock,
+        status_events_mock,
+    ):
+        """
+        get_report_status only writes to the report table when the
+        report's status changes (not on upstream errors), and skips
+        upstream for finished reports.
+        """
+        user_report = web_app_api.Report(
+            user_id=1,
+            report_num=1,
+            report_id="report-id",
+            report_status="STARTED",
+            received_datetime=datetime.datetime(2021, 1, 2, 3, 4, 5),
+        )
+        get_user_report_mock.return_value = user_report
+        report_status_cache_mock.get.return_value = None
+        upstream_client_mock.get.return_value.content = json.dumps(
+            {"report_id": "report-id", "report_status": "STARTED"}
+        )
+        request_obj = {"report_id": "report-id", "username": "test"}
+
+        response_obj, status_code = web_app_api.get_report_status(request_obj)
+        self.assertEqual((response_obj["report_status"], status_code), ("STARTED", 200))
+        report_status_cache_mock.set.assert_called_once()
+        db_mock.session.commit.assert_not_called()  # unchanged status
+        self.assertIsNone(user_report.finished_datetime)
+
+        upstream_client_mock.get.side_effect = Exception("timeout")
+        response_obj, _ = web_app_api.get_report_status(request_obj)
+        self.assertEqual(response_obj["report_status"], "STARTED")  # not marked failed
+        db_mock.session.commit.assert_not_called()
+        status_events_mock.publish.assert_not_called()
+        upstream_client_mock.get.side_effect = None
+
+        report_status_cache_mock.get.return_value = {
+            "report_id": "report-id",
+            "report_status": "SUCCESS",
+        }
+        response_obj, _ = web_app_api.get_report_status(request_obj)
+        self.assertEqual(response_obj["report_status"], "SUCCESS")
+        self.assertEqual(upstream_client_mock.get.call_count, 2)  # cached status used
+        db_mock.session.commit.assert_called_once()
+        self.assertIsNotNone(user_report.finished_datetime)
+        status_events_mock.publish.assert_called_once()
+
+        report_status_cache_mock.get.reset_mock()
+        web_app_api.get_report_status(request_obj)
+        report_status_cache_mock.get.assert_not_called()  # finished report
+        db_mock.session.commit.assert_called_once()
+
+        user_report.report_status = "FAILED"  # written by older status checks
+        web_app_api.get_report_status(request_obj)
+        report_status_cache_mock.get.assert_not_called()
+
+        get_user_report_mock.return_value = None
+        response_obj, _ = web_app_api.get_report_status(request_obj)
+        self.assertEqual(response_obj["status"], "Failed - report not found.")
 
     def test_reset_password_1(self):
         """
@@ -1052,22 +1273,22 @@ class TestWebAppApi(unittest.TestCase):
 
         self.assertEqual(actual_result, expected_result)
 
-    @patch("flask_sqlalchemy._QueryProperty.__get__")
-    def test_get_comments_1(self, comments_query_mock):
+    @patch("flask_sqlalchemy.model._QueryProperty.__get__")
+    def test_get_comments_1(self, comment_query_mock):
         """
         get_comments no comments
         """
+        query_mock = comment_query_mock.return_value.options.return_value.order_by.return_value
+        query_mock.limit.return_value.all.return_value = []
 
-        comments_query_mock.return_value.order_by.return_value.all.return_value = []
-
-        expected_result = [], 200
+        expected_result = [], None, 200
         actual_result = web_app_api.get_comments()
 
         self.assertEqual(actual_result, expected_result)
 
     @patch("cyan_flask.app.web_app_api.utils.build_comments_json")
-    @patch("flask_sqlalchemy._QueryProperty.__get__")
-    def test_get_comments_2(self, comments_query_mock, build_comments_json_mock):
+    @patch("flask_sqlalchemy.model._QueryProperty.__get__")
+    def test_get_comments_2(self, comment_query_mock, build_comments_json_mock):
         """
         get_comments with comments
         """
@@ -1082,17 +1303,49 @@ class TestWebAppApi(unittest.TestCase):
             "replies": [],
         }
 
-        comments_query_mock.return_value.order_by.return_value.all.return_value = [
-            comment_json
-        ]
+        query_mock = comment_query_mock.return_value.options.return_value.order_by.return_value
+        query_mock.limit.return_value.all.return_value = [comment_json]
 
         build_comments_json_mock.return_value = [comment_json]
 
-        expected_result = [comment_json], 200
+        expected_result = [comment_json], None, 200
         actual_result = web_app_api.get_comments()
 
         self.assertEqual(actual_result, expected_result)
 
+    @patch("cyan_flask.app.web_app_api.utils.build_comments_json")
+    @patch("flask_sqlalchemy.model._QueryProperty.__get__")
+    def test_get_comments_3(self, comment_query_mock, build_comments_json_mock):
+        """
+        get_comments page from cursor with a next page.
+        """
+        date = datetime.datetime(2021, 1, 2, 3, 4, 5)
+        comments = [Comment(id=i, date=date) for i in [5, 4, 3]]
+        cursor = web_app_api.utils.encode_comments_cursor(date, 6)
+
+        query_mock = comment_query_mock.return_value.options.return_value.order_by.return_value
+        query_mock.filter.return_value.limit.return_value.all.return_value = comments
+        build_comments_json_mock.side_effect = lambda page: [c.id for c in page]
+
+        expected_result = (
+            [5, 4],
+            web_app_api.utils.encode_comments_cursor(date, 4),
+            200,
+        )
+        actual_result = web_app_api.get_comments(cursor, "2")
+
+        self.assertEqual(actual_result, expected_result)
+        query_mock.filter.return_value.limit.assert_called_once_with(3)
+
+    def test_get_comments_4(self):
+        """
+        get_comments invalid cursor
+        """
+        expected_result = {"error": "Invalid cursor or limit"}, None, 400
+        actual_result = web_app_api.get_comments("not a cursor")
+
+        self.assertEqual(actual_result, expected_result)
+
     def test_add_user_comment_1(self):
         """
         add_user_comment invalid key
@@ -1111,11 +1364,23 @@ class TestWebAppApi(unittest.TestCase):
 
         self.assertEqual(actual_result, expected_result)
 
-    @patch("cyan_flask.app.web_app_api.utils.save_image_source")
+    def create_image_source(self, size=(10, 10)):
+        image_buffer = io.BytesIO()
+        Image.new("RGB", size).save(image_buffer, "PNG")
+        return "data:image/png;base64,{}".format(
+            base64.b64encode(image_buffer.getvalue()).decode("ascii")
+        )
+
+    @patch("cyan_flask.app.web_app_api.create_comment_thumbnail")
+    @patch("cyan_flask.app.web_app_api.utils.save_image_data")
     @patch("cyan_flask.app.web_app_api.utils.build_comments_json")
     @patch("cyan_flask.app.web_app_api.db")
     def test_add_user_comment_2(
-        self, db_mock, build_comments_json_mock, save_image_source_mock
+        self,
+        db_mock,
+        build_comments_json_mock,
+        save_image_data_mock,
+        create_comment_thumbnail_mock,
     ):
         """
         add_user_comment
@@ -1129,20 +1394,11 @@ class TestWebAppApi(unittest.TestCase):
             "browser": "N/A",
             "comment_text": "test comment text",
             "comment_images": [
-                {"source": "base64encodedimagestring", "name": "testpic.jpg"}
+                {"source": self.create_image_source(), "name": "testpic.png"}
             ],
         }
-        comment_obj = Comment(
-            id=request_obj["id"],
-            title=request_obj["title"],
-            date=request_obj["date"],
-            username=request_obj["username"],
-            device=request_obj["device"],
-            browser=request_obj["browser"]
-            # body=body
-        )
 
-        save_image_source_mock.return_value = request_obj["comment_images"][0]["source"]
+        save_image_data_mock.return_value = "test_1.png"
 
         build_comments_json_mock.return_value = [request_obj]
 
@@ -1150,6 +1406,40 @@ class TestWebAppApi(unittest.TestCase):
         actual_result = web_app_api.add_user_comment(request_obj)
 
         self.assertEqual(actual_result, expected_result)
+        create_comment_thumbnail_mock.delay.assert_called_once_with("test_1.png")
+
+    @patch("cyan_flask.app.web_app_api.utils.save_image_data")
+    @patch("cyan_flask.app.web_app_api.db")
+    def test_add_user_comment_3(self, db_mock, save_image_data_mock):
+        """
+        add_user_comment image over pixel limit or invalid
+        """
+        request_obj = {
+            "title": "test title",
+            "date": datetime.datetime.now(),
+            "username": "test",
+            "device": "N/A",
+            "browser": "N/A",
+            "comment_text": "test comment text",
+            "comment_images": [
+                {"source": self.create_image_source((200, 200)), "name": "big.png"}
+            ],
+        }
+
+        with patch.object(web_app_api.image_handler, "max_pixels", 100):
+            actual_result = web_app_api.add_user_comment(request_obj)
+        self.assertEqual(
+            actual_result, ({"error": "Image exceeds 0.0001 megapixels: big.png"}, 400)
+        )
+
+        request_obj["comment_images"] = [
+            {"source": "base64encodedimagestring", "name": "testpic.jpg"}
+        ]
+        actual_result = web_app_api.add_user_comment(request_obj)
+        self.assertEqual(actual_result, ({"error": "Invalid image in request"}, 400))
+
+        save_image_data_mock.assert_not_called()
+        db_mock.session.add.assert_not_called()
 
     def test_add_comment_reply_1(self):
         """
@@ -1195,3 +1485,218 @@ class TestWebAppApi(unittest.TestCase):
         actual_result = web_app_api.add_comment_reply(request_obj)
 
         self.assertEqual(actual_result, expected_result)
+
+    @patch("cyan_flask.app.web_app_api.utils._build_image_file_path")
+    def test_get_comment_image_1(self, _build_image_file_path_mock):
+        """
+        get_comment_image with caching headers and conditional requests.
+        """
+        filename = "test_1.png"
+        signature = web_app_api.utils.sign_image_filename(filename)
+        app = flask.Flask(__name__)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = os.path.join(temp_dir, filename)
+            with open(image_path, "wb") as image_file:
+                image_file.write(b"\x89PNG image")
+            _build_image_file_path_mock.return_value = image_path
+
+            with app.test_request_context():
+                response = web_app_api.get_comment_image(filename, signature)
+                response.direct_passthrough = False
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.mimetype, "image/png")
+                self.assertEqual(response.get_data(), b"\x89PNG image")
+                self.assertIn("immutable", response.headers["Cache-Control"])
+                self.assertIn("max-age=31536000", response.headers["Cache-Control"])
+                self.assertIsNotNone(response.last_modified)
+                etag = response.headers["ETag"]
+
+            with app.test_request_context(headers={"If-None-Match": etag}):
+                response = web_app_api.get_comment_image(filename, signature)
+                self.assertEqual(response.status_code, 304)
+
+    @patch("cyan_flask.app.web_app_api.utils._build_image_file_path")
+    def test_get_comment_image_2(self, _build_image_file_path_mock):
+        """
+        get_comment_image legacy data URL file.
+        """
+        filename = "test_1.jpg"
+        signature = web_app_api.utils.sign_image_filename(filename)
+        _build_image_file_path_mock.return_value = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "mock_data",
+            "test_image_source.jpg",
+        )
+        app = flask.Flask(__name__)
+
+        with app.test_request_context():
+            response = web_app_api.get_comment_image(filename, signature)
+            response.direct_passthrough = False
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, "image/jpeg")
+            self.assertTrue(response.get_data().startswith(b"\xff\xd8"))
+
+    def test_get_comment_image_3(self):
+        """
+        get_comment_image invalid signature or filename.
+        """
+        expected_result = {"error": "Image not found"}, 404
+        self.assertEqual(
+            web_app_api.get_comment_image("test_1.jpg", "bad"), expected_result
+        )
+        self.assertEqual(
+            web_app_api.get_comment_image(
+                "../test_1.jpg", web_app_api.utils.sign_image_filename("../test_1.jpg")
+            ),
+            expected_result,
+        )
+        self.assertEqual(web_app_api.get_comment_image("test_1.jpg", None), expected_result)
+
+    @patch("cyan_flask.app.web_app_api.utils._build_image_file_path")
+    def test_get_comment_image_4(self, _build_image_file_path_mock):
+        """
+        get_comment_image serves original while thumbnail is pending.
+        """
+        filename = "test_1.png.thumb.jpg"
+        signature = web_app_api.utils.sign_image_filename(filename)
+        app = flask.Flask(__name__)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, "test_1.png"), "wb") as image_file:
+                image_file.write(b"\x89PNG image")
+            _build_image_file_path_mock.side_effect = lambda f: os.path.join(
+                temp_dir, f
+            )
+
+            with app.test_request_context():
+                response = web_app_api.get_comment_image(filename, signature)
+                response.direct_passthrough = False
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get_data(), b"\x89PNG image")
+                self.assertNotIn("immutable", response.headers["Cache-Control"])
+                self.assertIn("max-age=60", response.headers["Cache-Control"])
+
+
+class TestWebAppApiQueries(SqliteDBTestCase):
+    """
+    Query counts of web_app_api.py lookups against an in-memory sqlite db.
+    """
+
+    def test_user_lookups_query_count(self):
+        """
+        Job, report, and settings lookups by username are one query each.
+        """
+        self.add_users()
+        for user_id, username in [(1, "test"), (2, "other")]:
+            self.db.session.add(
+                web_app_api.Job(
+                    user_id=user_id,
+                    job_num=1,
+                    job_id="job-{}".format(username),
+                    job_status="STARTED",
+                    input_file="input.csv",
+                    output_file="output.csv",
+                    num_locations=1,
+                    received_datetime=self.date,
+                )
+            )
+            self.db.session.add(
+                web_app_api.Report(
+                    user_id=user_id,
+                    report_num=1,
+                    report_id="report-{}".format(username),
+                    report_status="SUCCESS",
+                    report_date="2021 001",
+                    report_range_low=1,
+                    report_range_medium=2,
+                    report_range_high=3,
+                    received_datetime=self.date,
+                )
+            )
+        self.db.session.add(
+            web_app_api.Settings(
+                user_id=1,
+                level_low=1,
+                level_medium=2,
+                level_high=3,
+                enable_alert=False,
+            )
+        )
+        self.db.session.commit()
+
+        statements = self.record_statements()
+        job = web_app_api.celery_handler.get_job_from_db("test", "job-test")
+        other_job = web_app_api.celery_handler.get_job_from_db("test", "job-other")
+        active_job = web_app_api.celery_handler.get_active_user_job("test")
+        report = web_app_api.Report.get_user_report("test", "report-test")
+        active_report = web_app_api.Report.get_active_user_report("test")
+        user_id, settings = web_app_api.Settings.get_user_settings("test")
+        other_user_id, other_settings = web_app_api.Settings.get_user_settings("other")
+
+        self.assertEqual(job.job_id, "job-test")
+        self.assertIsNone(other_job)  # another user's job
+        self.assertEqual(active_job.job_id, "job-test")
+        self.assertEqual(report.report_id, "report-test")
+        self.assertIsNone(active_report)
+        self.assertEqual((user_id, settings.level_low), (1, 1))
+        self.assertEqual((other_user_id, other_settings), (2, None))
+        self.assertEqual(len(statements), 7)
+
+    def test_next_job_num(self):
+        """
+        User.next_job_num/next_report_num count per user without reading jobs.
+        """
+        self.add_users()
+        self.db.session.commit()
+
+        statements = self.record_statements()
+        job_nums = [web_app_api.User.next_job_num(1) for _ in range(3)]
+        other_job_num = web_app_api.User.next_job_num(2)
+        report_num = web_app_api.User.next_report_num(1)
+        self.db.session.commit()
+
+        self.assertEqual(job_nums, [1, 2, 3])
+        self.assertEqual(other_job_num, 1)
+        self.assertEqual(report_num, 1)
+        self.assertFalse(any("FROM job" in statement for statement in statements))
+        self.assertEqual(self.db.session.get(web_app_api.User, 1).job_count, 3)
+
+    def test_get_comments_query_count(self):
+        """
+        get_comments loads a page with its images and replies in 3 queries.
+        """
+        for i in range(1, 11):
+            self.db.session.add(
+                web_app_api.Comment(
+                    id=i,
+                    title="title",
+                    date=self.date + datetime.timedelta(minutes=i),
+                    username="test",
+                    comment_text="text",
+                )
+            )
+            self.db.session.add(
+                web_app_api.CommentImages(comment_id=i, comment_image="image.png")
+            )
+            for _ in range(2):
+                self.db.session.add(
+                    web_app_api.Reply(
+                        comment_id=i, date=self.date, username="test", body="reply"
+                    )
+                )
+        self.db.session.commit()
+        self.db.session.expunge_all()
+
+        statements = self.record_statements()
+        results, next_cursor, status_code = web_app_api.get_comments(limit=5)
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual([result["id"] for result in results], [10, 9, 8, 7, 6])
+        self.assertEqual(len(results[0]["replies"]), 2)
+        self.assertEqual(
+            results[0]["comment_images"],
+            [web_app_api.utils.get_image_url("image.png.thumb.jpg")],
+        )
+        self.assertIsNotNone(next_cursor)
+        self.assertEqual(len(statements), 3)